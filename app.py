@@ -2,8 +2,19 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import altair as alt
+import os
 import re
 
+from best_config import (MERGE, MERGE_BUBBLE, MERGE_INSERTION, MERGE_THRESHOLD, RANDOM_INPUT,
+                         baseline_rows, best_for, build_best_index, relative_grid, scaling_table,
+                         tag_summaries, threshold_by_element)
+from chart_data import (LOG_CONSTANT, POINT_BUDGET, VIEW_MODES, cached_chart, downsample_lines,
+                        enable_budget_transformer, normalize_times, size_quantiles)
+from cost_model import fit_cost_model, model_surface, predict_time, predicted_thresholds
+from data_store import list_partitions, load_csv, read_partition
+from process_results import (COUNTER_COLUMNS, COUNTER_COVERAGE, MISS_COUNTERS, counter_rates, robust_stats,
+                             stable_threshold, tie_bands, tied_thresholds)
+
 ####################################################################
 ####################################################################
 # --- Configuração da Página ---
@@ -16,30 +27,141 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Specs geradas por chart.to_dict() embutem no máximo CHART_MAX_ROWS linhas (ver chart_data.py).
+# Os gráficos do app são funções com @cached_chart: a spec é gerada uma vez por conteúdo dos
+# dados + parâmetros, guardada em um cache LRU e exibida com st.vega_lite_chart.
+enable_budget_transformer()
+
 ####################################################################
 ####################################################################
 # --- Funções de Carregamento de Dados ---
 ####################################################################
 ####################################################################
 
+# Registro de datasets: nome lógico -> arquivo CSV.
+# Cada página pede apenas os datasets que usa (ver load_dataset).
+DATASETS = {
+    'bubble_summary': "merge-bubble-summary_results.csv",
+    'insertion_summary': "merge-insertion-summary_results.csv",
+    'best_hybrids': "melhores_resultados_merge_hibridos.csv",
+    'bubble_raw': "merge-bubble-raw_times.csv",
+    'insertion_raw': "merge-insertion-raw_times.csv",
+    'final_merge': "melhores_resultados_merge.csv",
+    'final_mergebubble': "melhores_resultados_mergebubble.csv",
+    'final_mergeinsertion': "melhores_resultados_mergeinsertion.csv",
+    'variants_summary': "variantes-summary_results.csv",
+    'variants_raw': "variantes-raw_times.csv",
+}
+
+# Datasets que podem não existir (só aparecem depois de rodar o harness.py)
+OPTIONAL_DATASETS = {'variants_summary', 'variants_raw'}
+
+
+# Datasets brutos ficam particionados por Tamanho (ver data_store.list_partitions):
+# uma ingestão incremental (ingest.py) só invalida as partições afetadas.
+RAW_DATASETS = {'bubble_raw', 'insertion_raw', 'variants_raw'}
+
+
+def file_version(path):
+    """Versão de um arquivo (mtime), usada como parte da chave dos caches."""
+    return os.stat(path).st_mtime_ns
+
+
 @st.cache_data
-def load_data():
-    """Carrega todos os arquivos CSV necessários."""
-    try:
-        df_bubble = pd.read_csv("merge-bubble-summary_results.csv")
-        df_insertion = pd.read_csv("merge-insertion-summary_results.csv")
-        df_best = pd.read_csv("melhores_resultados_merge_hibridos.csv")
-        df_bubble_raw = pd.read_csv("merge-bubble-raw_times.csv")
-        df_insertion_raw = pd.read_csv("merge-insertion-raw_times.csv")
+def load_file(path, version):
+    """Carrega um CSV via cache colunar; 'version' invalida o cache quando o arquivo muda."""
+    return load_csv(path)
+
+
+@st.cache_data
+def load_partition(path, version):
+    """Carrega uma partição (um Tamanho) de um dataset bruto."""
+    return read_partition(path)
 
-        df_final_merge = pd.read_csv("melhores_resultados_merge.csv")
-        df_final_mergebubble = pd.read_csv("melhores_resultados_mergebubble.csv")
-        df_final_mergeinsertion = pd.read_csv("melhores_resultados_mergeinsertion.csv")
 
-        return df_bubble, df_insertion, df_best, df_bubble_raw, df_insertion_raw, df_final_merge, df_final_mergebubble, df_final_mergeinsertion
+def load_dataset(name):
+    """
+    Carrega um único dataset do registro (via cache colunar, ver data_store.py).
+    O carregamento só acontece na primeira vez que alguma página pede o dataset,
+    e de novo apenas para os arquivos/partições que mudaram.
+    """
+    path = DATASETS[name]
+    try:
+        if name in RAW_DATASETS:
+            partitions = list_partitions(path)
+            if partitions is not None:
+                return pd.concat(
+                    [load_partition(p, file_version(p)) for _, p in sorted(partitions.items())],
+                    ignore_index=True
+                )
+        return load_file(path, file_version(path))
     except FileNotFoundError as e:
         st.error(f"Erro ao carregar o arquivo: {e.filename}.")
-        return None, None, None
+        return None
+
+def load_optional_dataset(name):
+    """Como load_dataset, mas retorna None sem erro se o arquivo ainda não existir."""
+    if not os.path.exists(DATASETS[name]):
+        return None
+    return load_dataset(name)
+
+
+# Os summaries gravados pelos programas .c só têm média e desvio: as estatísticas
+# robustas (mediana, IC, ...) são calculadas a partir do raw_times correspondente.
+ROBUST_SOURCES = {'bubble_summary': 'bubble_raw', 'insertion_summary': 'insertion_raw'}
+
+
+@st.cache_data
+def load_robust_stats(name, version):
+    """Estatísticas robustas por (Tamanho, Threshold) de um dataset bruto (ver process_results.robust_stats)."""
+    df_raw = load_dataset(name)
+    return None if df_raw is None else robust_stats(df_raw)
+
+
+# Dataset bruto de cada híbrido, para os testes sobre as execuções individuais
+RAW_SOURCES = {MERGE_BUBBLE: 'bubble_raw', MERGE_INSERTION: 'insertion_raw'}
+
+
+@st.cache_data
+def load_tied_thresholds(name, version, metric):
+    """Thresholds estatisticamente empatados com o melhor (ver process_results.tied_thresholds)."""
+    df_raw = load_dataset(name)
+    return None if df_raw is None else tied_thresholds(df_raw, metric)
+
+
+def load_summary(name):
+    """Carrega um summary, completando as estatísticas robustas quando o arquivo não as tem."""
+    df = load_dataset(name)
+    if df is None or 'MedianaReal' in df.columns:
+        return df
+    raw_path = DATASETS[ROBUST_SOURCES[name]]
+    if not os.path.exists(raw_path):
+        return df
+    robust = load_robust_stats(ROBUST_SOURCES[name], file_version(raw_path))
+    return df if robust is None else df.join(robust, on=['Tamanho', 'Threshold'])
+
+
+# Summary de cada híbrido, para o ajuste do modelo de custo (página 4)
+SUMMARY_SOURCES = {MERGE_BUBBLE: 'bubble_summary', MERGE_INSERTION: 'insertion_summary'}
+
+
+@st.cache_data
+def load_cost_model(name, version):
+    """Modelo de custo ajustado a um summary (ver cost_model.fit_cost_model) e as células medidas com a previsão."""
+    df = load_dataset(name)
+    if df is None:
+        return None, None
+    model = fit_cost_model(df)
+    return model, model_surface(model, df)
+
+
+@st.cache_data
+def load_relative_grid(name, version, metric):
+    """Matriz Tamanho × Threshold relativa ao melhor de cada Tamanho (ver best_config.relative_grid)."""
+    df = load_summary(name)
+    if df is None:
+        return None
+    return relative_grid(df, metric if metric in df.columns else 'MediaReal')
 
 ####################################################################
 ####################################################################
@@ -57,15 +179,38 @@ def load_code(file_path):
 ####################################################################
 ####################################################################
 
+def load_best_index(distribution=RANDOM_INPUT, metric='MediaReal'):
+    """
+    Retorna o índice da melhor configuração por (Algoritmo, Tamanho),
+    compartilhado por todas as páginas. Ver best_config.py.
+    Para outras distribuições de entrada, só há dados do harness.py.
+    'metric' é a coluna que decide o vencedor (ex: 'MedianaReal').
+    """
+    try:
+        versions = tuple(file_version(DATASETS[name]) for name in ['bubble_summary', 'insertion_summary'])
+    except FileNotFoundError as e:
+        st.error(f"Erro ao carregar o arquivo: {e.filename}.")
+        return None
+    # Os raw_times também entram na chave: deles saem as estatísticas robustas
+    raw_versions = tuple(file_version(DATASETS[name]) for name in ROBUST_SOURCES.values()
+                         if os.path.exists(DATASETS[name]))
+    variants_path = DATASETS['variants_summary']
+    variants_version = file_version(variants_path) if os.path.exists(variants_path) else None
+    return _load_best_index(versions + raw_versions, variants_version, distribution, metric)
+
+
 @st.cache_data
-def analyze_thresholds(df_raw, name):
-    """Analisa o dataframe para encontrar o melhor threshold para cada tamanho."""
-    # Encontra o índice (linha) do menor 'MediaReal' para cada 'Tamanho'
-    idx_best_times = df_raw.groupby('Tamanho')['MediaReal'].idxmin()
-    # Usa esses índices para selecionar as linhas correspondentes
-    best_thresholds_df = df_raw.loc[idx_best_times][['Tamanho', 'Threshold', 'MediaReal']]
-    best_thresholds_df = best_thresholds_df.rename(columns={'Threshold': f'Melhor_Threshold_{name}'})
-    return best_thresholds_df
+def _load_best_index(versions, variants_version, distribution, metric):
+    """Constrói o índice uma vez por versão dos arquivos summary."""
+    df_bubble = load_summary('bubble_summary')
+    df_insertion = load_summary('insertion_summary')
+    if df_bubble is None or df_insertion is None or metric not in df_bubble.columns:
+        return None
+    df_variants = load_optional_dataset('variants_summary') if variants_version is not None else None
+    # Summaries das variantes gravados antes das estatísticas robustas ficam de fora
+    if df_variants is not None and metric not in df_variants.columns:
+        df_variants = None
+    return build_best_index(tag_summaries(df_bubble, df_insertion, df_variants, distribution), metric)
 
 
 ####################################################################
@@ -74,10 +219,12 @@ def analyze_thresholds(df_raw, name):
 ####################################################################
 ####################################################################
 
-def generate_theory_chart():
+@cached_chart
+def generate_theory_chart(budget=POINT_BUDGET):
     """
     Gera um gráfico teórico comparando n^2, n log(n), e n
     em uma escala log-log para visualização clara.
+    As curvas são reduzidas a 'budget' pontos no total (LTTB, ver chart_data.py).
     """
     # 1. Gerar dados teóricos
     n = np.arange(3, 1000)
@@ -95,6 +242,7 @@ def generate_theory_chart():
         var_name='Complexidade',
         value_name='Custo Teórico'
     )
+    df_melt = downsample_lines(df_melt, 'n', 'Custo Teórico', by='Complexidade', budget=budget)
     
     # 3. Criar o gráfico
     chart = alt.Chart(df_melt).mark_line().encode(
@@ -118,13 +266,19 @@ def generate_theory_chart():
 ####################################################################
 ####################################################################
 
-def create_result_individual_chart(df, title):
+@cached_chart
+def create_result_individual_chart(df, title, robust=False, budget=POINT_BUDGET, view='Linear'):
     """
     Cria um gráfico de Média ± Desvio Padrão para 
     MediaReal e MediaCPU, usando o melhor threshold de MediaReal.
+    Com robust=True, a linha é a mediana e a sombra é o IC 95% (bootstrap),
+    que nunca fica negativo. Cada métrica é reduzida a 'budget' pontos (LTTB).
+    'view' é um modo de VIEW_MODES (escala dos eixos / normalização por Tamanho).
     """
     if df is None:
         return alt.Chart(pd.DataFrame()).mark_text(text="Dados não carregados.")
+    if robust:
+        return create_robust_chart(df, title, budget, view)
 
     # 1. Preparar DataFrames para Plotagem (Formato Longo)
     # Criar um DF limpo para 'Tempo Real'
@@ -144,13 +298,16 @@ def create_result_individual_chart(df, title):
     # Removido .clip() e .replace() - não são necessários para escala linear
     df_plot['Tempo_Min'] = (df_plot['Média'] - df_plot['Desvio'])
     df_plot['Tempo_Max'] = df_plot['Média'] + df_plot['Desvio']
+    df_plot = normalize_times(df_plot, ['Média', 'Desvio', 'Tempo_Min', 'Tempo_Max'], view)
+    df_plot = downsample_lines(df_plot, 'Tamanho', 'Média', by='Métrica', budget=budget)
+    x_scale, y_scale, time_format = view_encoding(view)
 
     # 4. Criação do Gráfico
     
     # Gráfico base
     base = alt.Chart(df_plot).encode(
-        # Eixo X Linear
-        x=alt.X('Tamanho', title='Tamanho da Entrada (n)', scale=alt.Scale(type="linear")),
+        # Eixo X Linear (ou log, conforme 'view')
+        x=alt.X('Tamanho', title='Tamanho da Entrada (n)', scale=x_scale),
         
         # Cor por Métrica (CPU vs Real)
         color=alt.Color('Métrica', title='Métrica'), 
@@ -158,25 +315,25 @@ def create_result_individual_chart(df, title):
         # Tooltip para interatividade
         tooltip=[
             'Tamanho', 'Métrica',
-            alt.Tooltip('Média', format='.8f'),
-            alt.Tooltip('Desvio', title='Desvio Padrão', format='.8f')
+            alt.Tooltip('Média', format=time_format),
+            alt.Tooltip('Desvio', title='Desvio Padrão', format=time_format)
         ]
     )
     
     # Criar as "sombras" (Bandas de Erro)
     error_band = base.mark_area(opacity=0.3).encode(
         # --- MODIFICAÇÃO AQUI ---
-        # Eixo Y Linear (escala padrão, sem log)
+        # Eixo Y conforme o modo de visualização (linear por padrão)
         y=alt.Y('Tempo_Min', 
-                title='Tempo de Execução (s) - Escala Linear'),
+                title=VIEW_MODES[view]['title'], scale=y_scale),
         y2=alt.Y2('Tempo_Max')
     )
     
     # Criar as linhas principais (Médias)
     mean_line = base.mark_line(point=True).encode(
         # --- MODIFICAÇÃO AQUI ---
-        # Eixo Y Linear (escala padrão, sem log)
-        y=alt.Y('Média') 
+        # Eixo Y conforme o modo de visualização (linear por padrão)
+        y=alt.Y('Média', scale=y_scale) 
     )
     
     # Combinar os gráficos (linha sobre a sombra) e aplicar o título
@@ -190,68 +347,112 @@ def create_result_individual_chart(df, title):
 ####################################################################
 ####################################################################
 
-def create_comparison_chart(df_raw):
+# Estatística que decide o melhor threshold e a faixa dos gráficos (ver página 3)
+STATISTICS = {
+    'Média ± Desvio Padrão': 'MediaReal',
+    'Mediana + IC 95% (bootstrap)': 'MedianaReal',
+}
+
+
+def view_encoding(view):
+    """(escala X, escala Y, formato dos tempos no tooltip) de um modo de VIEW_MODES."""
+    mode = VIEW_MODES[view]
+    if mode['y_scale'] == 'symlog':
+        y_scale = alt.Scale(type='symlog', constant=LOG_CONSTANT)
+    else:
+        y_scale = alt.Scale(type=mode['y_scale'])
+    return alt.Scale(type=mode['x_scale']), y_scale, '.8f' if mode['unit'] == 's' else '.3f'
+
+
+def create_robust_chart(df, title, budget=POINT_BUDGET, view='Linear'):
+    """
+    Cria um gráfico de Mediana + IC 95% para Tempo Real e Tempo de CPU
+    (colunas de process_results.robust_stats).
+    """
+    parts = []
+    for suffix, label in [('Real', 'Tempo Real'), ('CPU', 'Tempo CPU')]:
+        part = df[['Tamanho', f'Mediana{suffix}', f'ICInf{suffix}', f'ICSup{suffix}']].copy()
+        part.columns = ['Tamanho', 'Mediana', 'IC_Min', 'IC_Max']
+        part['Métrica'] = label
+        parts.append(part)
+    df_plot = normalize_times(pd.concat(parts, ignore_index=True), ['Mediana', 'IC_Min', 'IC_Max'], view)
+    df_plot = downsample_lines(df_plot, 'Tamanho', 'Mediana', by='Métrica', budget=budget)
+    x_scale, y_scale, time_format = view_encoding(view)
+
+    base = alt.Chart(df_plot).encode(
+        x=alt.X('Tamanho', title='Tamanho da Entrada (n)', scale=x_scale),
+        color=alt.Color('Métrica', title='Métrica'),
+        tooltip=[
+            'Tamanho', 'Métrica',
+            alt.Tooltip('Mediana', format=time_format),
+            alt.Tooltip('IC_Min', title='IC 95% (inf.)', format=time_format),
+            alt.Tooltip('IC_Max', title='IC 95% (sup.)', format=time_format)
+        ]
+    )
+    ci_band = base.mark_area(opacity=0.3).encode(
+        y=alt.Y('IC_Min', title=VIEW_MODES[view]['title'], scale=y_scale),
+        y2=alt.Y2('IC_Max')
+    )
+    median_line = base.mark_line(point=True).encode(y=alt.Y('Mediana', scale=y_scale))
+
+    return (ci_band + median_line).properties(title=title).interactive()
+
+
+####################################################################
+####################################################################
+
+# Cores para os algoritmos além dos três originais (ex: variantes do harness.py)
+EXTRA_COLORS = ['green', 'purple', 'brown', 'teal', 'magenta', 'olive', 'gray', 'black']
+
+
+@cached_chart
+def create_comparison_chart(best_index, algorithms=None, metric='MediaReal', budget=POINT_BUDGET,
+                            view='Linear'):
     """
     Cria o gráfico comparativo simplificado, focando APENAS nos dados reais
-    dos três algoritmos (Puro vs Híbridos), COM ESCALA LINEAR.
+    dos algoritmos (Puro vs Híbridos), COM ESCALA LINEAR (ou o modo 'view' de VIEW_MODES).
+    Usa o índice de melhor configuração (ver load_best_index); 'algorithms'
+    limita as linhas exibidas (None = todos) e 'metric' é a coluna plotada.
+    Cada algoritmo é reduzido a uma parte de 'budget' pontos (LTTB).
     """
 
-    # 1. Separar dados
-    # Assume que df_raw['Threshold'] == -1 são os dados do Merge Puro
-    df_merge = df_raw[df_raw['Threshold'] == -1].copy()
-    df_hybrid = df_raw[df_raw['Threshold'] > -1].copy()
-
-    # 2. Padronizar nomes
-    df_hybrid['Algoritmo'] = df_hybrid['Algoritmo'].replace({
-        'merge+insertion': 'Merge+Insertion',
-        'merge+bubble': 'Merge+Bubble'
-    })
-    df_merge['Algoritmo'] = 'Merge Puro'
-
-    # 3. Selecionar o melhor threshold para cada híbrido
-    best_hybrid_list = []
-    for algo in ['Merge+Insertion', 'Merge+Bubble']:
-        df_algo = df_hybrid[df_hybrid['Algoritmo'] == algo]
-        if not df_algo.empty:
-            # Encontra o índice da linha com o menor 'MediaReal' para cada 'Tamanho'
-            idx_best = df_algo.groupby('Tamanho')['MediaReal'].idxmin()
-            best_hybrid_list.append(df_algo.loc[idx_best])
-    
-    # Concatena os melhores resultados dos híbridos
-    df_best_hybrid = pd.concat(best_hybrid_list, ignore_index=True)
-
-    # 4. Concatenar Merge Puro para ter todos os dados reais
-    df_plot = pd.concat([df_best_hybrid, df_merge], ignore_index=True)
-    
-    # 5. Preparar Altair (Melt)
+    # 1. O índice já tem o melhor threshold de cada algoritmo por tamanho
+    df_plot = best_index.reset_index()[['Tamanho', 'Algoritmo', metric]]
+    if algorithms is not None:
+        df_plot = df_plot[df_plot['Algoritmo'].isin(algorithms)]
+
+    # 2. Preparar Altair (Melt)
     df_melt = df_plot.melt(
         id_vars=['Tamanho', 'Algoritmo'],
-        value_vars=['MediaReal'],
+        value_vars=[metric],
         var_name='Métrica',
         value_name='Tempo (s)'
     )
-
-    # 6. Definir cores (escala simplificada)
-    color_scale = alt.Scale(domain=[
-        'Merge+Insertion', 'Merge Puro', 'Merge+Bubble'
-    ], range=[
-        'blue', 'orange', 'red'
-    ])
-
-    # 7. Criar o gráfico final
+    df_melt = normalize_times(df_melt, ['Tempo (s)'], view)
+    df_melt = downsample_lines(df_melt, 'Tamanho', 'Tempo (s)', by='Algoritmo', budget=budget)
+    x_scale, y_scale, time_format = view_encoding(view)
+    time_title = f"Tempo ({VIEW_MODES[view]['unit']})"
+
+    # 3. Definir cores (escala simplificada); variantes extras usam EXTRA_COLORS
+    domain = [MERGE_INSERTION, MERGE, MERGE_BUBBLE]
+    colors = ['blue', 'orange', 'red']
+    extra = sorted(set(df_plot['Algoritmo']) - set(domain))
+    color_scale = alt.Scale(domain=domain + extra, range=colors + [EXTRA_COLORS[i % len(EXTRA_COLORS)] for i in range(len(extra))])
+
+    # 4. Criar o gráfico final
     chart = alt.Chart(df_melt).mark_line(point=True).encode(
-        # Eixo X Linear
-        x=alt.X('Tamanho', title='Tamanho da Entrada (n)'),
+        # Eixo X Linear (ou log, conforme 'view')
+        x=alt.X('Tamanho', title='Tamanho da Entrada (n)', scale=x_scale),
         
         # --- MODIFICAÇÃO AQUI ---
-        # Eixo Y Linear (escala padrão, sem log)
+        # Eixo Y conforme o modo de visualização (linear por padrão)
         y=alt.Y('Tempo (s)', 
-                title='Tempo de Execução (s) - Escala Linear'),
+                title=VIEW_MODES[view]['title'], scale=y_scale),
         # ------------------------
         
         # Cores e Legendas
         color=alt.Color('Algoritmo', scale=color_scale, title='Algoritmo'),
-        tooltip=['Tamanho', 'Algoritmo', 'Tempo (s)']
+        tooltip=['Tamanho', 'Algoritmo', alt.Tooltip('Tempo (s)', title=time_title, format=time_format)]
     ).properties(
         title='Análise Comparativa Final: Híbridos vs. Merge Puro'
     ).interactive()
@@ -259,6 +460,318 @@ def create_comparison_chart(df_raw):
     return chart
 
 
+def describe_comparison(best_index, algorithms, metric='MediaReal'):
+    """
+    Texto da análise do gráfico comparativo calculado a partir de best_index: no
+    maior Tamanho medido para todos os algoritmos selecionados, o tempo e o melhor
+    Threshold de cada um, do mais rápido para o mais lento.
+    """
+    if not algorithms:
+        return "**Análise:** Selecione ao menos um algoritmo para comparar."
+    df = best_index.reset_index()
+    df = df[df['Algoritmo'].isin(algorithms)]
+    counts = df.groupby('Tamanho')['Algoritmo'].nunique()
+    common = counts.index[counts == len(set(algorithms))]
+    if common.empty:
+        return "**Análise:** Os algoritmos selecionados não têm nenhum tamanho medido em comum."
+    size = common.max()
+    rows = df[df['Tamanho'] == size].sort_values(metric, kind='stable')
+    fastest = rows[metric].iloc[0]
+
+    lines = []
+    for position, (_, row) in enumerate(rows.iterrows()):
+        threshold = ("sem threshold" if row['Threshold'] == MERGE_THRESHOLD
+                     else f"melhor Threshold = {int(row['Threshold'])}")
+        gap = f", {row[metric] / fastest - 1:+.1%} em relação ao mais rápido" if position and fastest > 0 else ""
+        lines.append(f"- {row['Algoritmo']}: {row[metric]:.6f} s ({threshold}{gap})")
+    return (f"**Análise:** Cada linha é o melhor threshold de cada algoritmo em cada tamanho. Em n = {size:,}, "
+            f"o maior tamanho medido para todos os selecionados, do mais rápido para o mais lento ({metric}):\n"
+            + "\n".join(lines))
+
+
+####################################################################
+####################################################################
+
+@cached_chart
+def create_tie_band_chart(df_bands, algorithm, stable=None):
+    """
+    Cria o gráfico do melhor Threshold por Tamanho com uma faixa que cobre os
+    thresholds estatisticamente empatados com ele (ver process_results.tie_bands).
+    'stable' desenha uma linha no threshold empatado no maior número de tamanhos.
+    """
+    base = alt.Chart(df_bands).encode(
+        x=alt.X('Tamanho:Q', title='Tamanho da Entrada (n)', scale=alt.Scale(type='log')),
+        tooltip=['Tamanho', 'Threshold', 'Empatados', alt.Tooltip('Lista', title='Empatados com o melhor')]
+    )
+    band = base.mark_area(opacity=0.3, color='steelblue').encode(
+        y=alt.Y('ThresholdMin:Q', title='Threshold'),
+        y2='ThresholdMax:Q'
+    )
+    best_line = base.mark_line(point=True, color='steelblue').encode(y='Threshold:Q')
+    chart = band + best_line
+    if stable is not None:
+        chart += alt.Chart(pd.DataFrame({'Threshold': [stable]})).mark_rule(
+            strokeDash=[5, 5], color='gray'
+        ).encode(y='Threshold:Q')
+
+    return chart.properties(title=f'Melhor Threshold e Empates Estatísticos: {algorithm}').interactive()
+
+
+####################################################################
+####################################################################
+
+# Faixa "plana" em torno do melhor threshold, destacada no mapa Threshold × Tamanho
+FLAT_TOLERANCE = 0.05
+
+
+@cached_chart
+def create_grid_heatmap(sizes, thresholds, grid, algorithm):
+    """
+    Cria o mapa de calor Threshold × Tamanho do tempo relativo ao melhor threshold
+    de cada Tamanho (ver best_config.relative_grid). Clicar em uma linha do mapa
+    seleciona o Tamanho exibido na curva abaixo dele (seleção no navegador, sem rerun).
+    """
+    # 1. Matriz -> formato longo (uma linha por célula medida)
+    df_grid = pd.DataFrame({
+        'Tamanho': np.repeat(sizes, len(thresholds)),
+        'Threshold': np.tile(thresholds, len(sizes)),
+        'Relativo': grid.ravel(),
+    }).dropna()
+    df_grid['AcimaDoMelhor'] = df_grid['Relativo'] - 1.0
+
+    # 2. Seleção ligada: começa no maior Tamanho com medição
+    selection = alt.selection_point(fields=['Tamanho'], value=[{'Tamanho': int(df_grid['Tamanho'].max())}])
+    x = alt.X('Threshold:O', title='Threshold (-1 = Merge Puro)', sort=[int(t) for t in thresholds])
+    tooltip = ['Tamanho', 'Threshold', alt.Tooltip('AcimaDoMelhor', title='Acima do melhor', format='.1%')]
+
+    heatmap = alt.Chart(df_grid).mark_rect().encode(
+        x=x,
+        y=alt.Y('Tamanho:O', title='Tamanho da Entrada (n)', sort='descending'),
+        color=alt.Color('AcimaDoMelhor:Q', title='Acima do melhor',
+                        scale=alt.Scale(scheme='viridis', domain=[0, 0.5], clamp=True, reverse=True),
+                        legend=alt.Legend(format='%')),
+        opacity=alt.condition(selection, alt.value(1.0), alt.value(0.5)),
+        tooltip=tooltip
+    ).add_params(selection).properties(height=420)
+
+    # 3. Curva do Tamanho selecionado, com a faixa de FLAT_TOLERANCE
+    curve = alt.Chart(df_grid).mark_line(point=True).encode(
+        x=x,
+        y=alt.Y('AcimaDoMelhor:Q', title='Acima do melhor threshold', axis=alt.Axis(format='%')),
+        tooltip=tooltip
+    ).transform_filter(selection)
+    flat = alt.Chart(pd.DataFrame({'AcimaDoMelhor': [FLAT_TOLERANCE]})).mark_rule(
+        strokeDash=[5, 5], color='gray'
+    ).encode(y='AcimaDoMelhor:Q')
+
+    return alt.vconcat(heatmap, (curve + flat).properties(height=220)).properties(
+        title=f'{algorithm}: Tempo Relativo ao Melhor Threshold de cada Tamanho'
+    )
+
+
+####################################################################
+####################################################################
+
+@cached_chart
+def create_cost_model_charts(df_surface, model, size, algorithm):
+    """
+    Cria dois gráficos do modelo de custo ajustado (ver cost_model.py):
+    - tempo medido (pontos) e previsto (linha) por Threshold no Tamanho 'size';
+    - melhor Threshold medido e previsto pelo modelo para cada Tamanho.
+    """
+    # 1. Medições do tamanho escolhido e curva do modelo em uma grade densa de thresholds
+    measured = df_surface[df_surface['Tamanho'] == size]
+    thresholds = np.unique(np.geomspace(1, 1000, 200).round())
+    curve = pd.DataFrame({'Threshold': thresholds, 'Previsto': predict_time(model, np.full(len(thresholds), size), thresholds)})
+
+    x = alt.X('Threshold:Q', title='Threshold (k)', scale=alt.Scale(type='log'))
+    points = alt.Chart(measured).mark_point(filled=True, color='steelblue').encode(
+        x=x, y=alt.Y('MediaReal:Q', title='Tempo Real (s)', scale=alt.Scale(zero=False)),
+        tooltip=['Threshold', alt.Tooltip('MediaReal', format='.6f'), alt.Tooltip('Previsto', format='.6f'),
+                 alt.Tooltip('ErroRelativo', title='Erro relativo', format='+.1%')]
+    )
+    line = alt.Chart(curve).mark_line(color='darkorange').encode(x=x, y='Previsto:Q')
+    chart_fit = (points + line).properties(
+        title=f'{algorithm}: Medido (pontos) vs. Modelo (linha), n = {size:,}'
+    ).interactive()
+
+    # 2. Melhor threshold medido vs. previsto, na mesma grade de thresholds dos CSVs
+    best = df_surface.loc[df_surface.groupby('Tamanho')['MediaReal'].idxmin(), ['Tamanho', 'Threshold']]
+    predicted = predicted_thresholds(model, best['Tamanho'], sorted(df_surface['Threshold'].unique()))
+    df_best = pd.concat([
+        best.assign(Origem='Medido'),
+        predicted.rename(columns={'ThresholdPrevisto': 'Threshold'})[['Tamanho', 'Threshold']].assign(Origem='Modelo'),
+    ], ignore_index=True)
+    chart_best = alt.Chart(df_best).mark_line(point=True).encode(
+        x=alt.X('Tamanho:Q', title='Tamanho da Entrada (n)', scale=alt.Scale(type='log')),
+        y=alt.Y('Threshold:Q', title='Melhor Threshold'),
+        color=alt.Color('Origem:N', title='Origem'),
+        tooltip=['Tamanho', 'Origem', 'Threshold']
+    ).properties(title=f'{algorithm}: Melhor Threshold Medido vs. Previsto').interactive()
+
+    return chart_fit, chart_best
+
+
+####################################################################
+####################################################################
+
+@cached_chart
+def create_raw_distribution_chart(df_quantiles, title):
+    """
+    Cria o gráfico das execuções brutas por Tamanho, já resumidas no servidor
+    (ver chart_data.size_quantiles): a linha é a mediana e a sombra vai do P5 ao P95.
+    """
+    base = alt.Chart(df_quantiles).encode(
+        x=alt.X('Tamanho:Q', title='Tamanho da Entrada (n)', scale=alt.Scale(type='log')),
+        tooltip=['Tamanho', 'Execucoes',
+                 alt.Tooltip('P5', format='.8f'),
+                 alt.Tooltip('Mediana', format='.8f'),
+                 alt.Tooltip('P95', format='.8f')]
+    )
+    band = base.mark_area(opacity=0.3).encode(
+        y=alt.Y('P5:Q', title='Tempo Real (s) - Escala Log', scale=alt.Scale(type='symlog', constant=1e-6)),
+        y2='P95:Q'
+    )
+    median_line = base.mark_line(point=True).encode(y='Mediana:Q')
+
+    return (band + median_line).properties(title=title).interactive()
+
+
+####################################################################
+####################################################################
+
+@cached_chart
+def create_scaling_charts(df_scaling, algorithm):
+    """
+    Cria os gráficos de speedup e de eficiência por número de threads para um
+    algoritmo, com uma linha por Tamanho (ver best_config.scaling_table).
+    """
+    df_plot = df_scaling[df_scaling['Algoritmo'] == algorithm]
+
+    base = alt.Chart(df_plot).encode(
+        x=alt.X('Threads:Q', title='Número de Threads', scale=alt.Scale(type='log', base=2)),
+        color=alt.Color('Tamanho:O', title='Tamanho (n)'),
+        tooltip=['Tamanho', 'Threads', 'Threshold', 'MediaReal', 'Speedup', 'Eficiencia']
+    )
+
+    # Linha de referência: speedup ideal (= número de threads)
+    ideal = alt.Chart(pd.DataFrame({'Threads': sorted(df_plot['Threads'].unique())})).mark_line(
+        strokeDash=[5, 5], color='gray'
+    ).encode(x='Threads:Q', y='Threads:Q')
+
+    speedup = (ideal + base.mark_line(point=True).encode(
+        y=alt.Y('Speedup:Q', title='Speedup (T1 / Tp)')
+    )).properties(title=f'Speedup: {algorithm}')
+
+    efficiency = base.mark_line(point=True).encode(
+        y=alt.Y('Eficiencia:Q', title='Eficiência (Speedup / Threads)', scale=alt.Scale(domain=[0, 1.1]))
+    ).properties(title=f'Eficiência: {algorithm}')
+
+    return speedup, efficiency
+
+
+####################################################################
+####################################################################
+
+@cached_chart
+def create_element_threshold_chart(df_element, algorithm):
+    """
+    Cria o gráfico do melhor Threshold por Tamanho, com uma linha por tipo de
+    elemento (ver best_config.threshold_by_element).
+    """
+    df_plot = df_element[df_element['Algoritmo'] == algorithm]
+
+    chart = alt.Chart(df_plot).mark_line(point=True).encode(
+        x=alt.X('Tamanho:Q', title='Tamanho da Entrada (n)', scale=alt.Scale(type='log')),
+        y=alt.Y('Threshold:Q', title='Melhor Threshold'),
+        color=alt.Color('Elemento:N', title='Elemento',
+                        sort=alt.EncodingSortField('TamanhoElemento', order='ascending')),
+        tooltip=['Tamanho', 'Elemento', 'TamanhoElemento', 'Threshold', 'MediaReal']
+    ).properties(
+        title=f'Melhor Threshold por Tamanho do Elemento: {algorithm}'
+    ).interactive()
+
+    return chart
+
+
+####################################################################
+####################################################################
+
+@cached_chart
+def create_counter_charts(df_rates, size, algorithms):
+    """
+    Cria os gráficos de IPC e de MPKI (falhas por mil instruções) por Threshold
+    para um Tamanho, com uma linha por algoritmo (ver process_results.counter_rates).
+    """
+    df_plot = df_rates[(df_rates['Tamanho'] == size) & df_rates['Algoritmo'].isin(algorithms)]
+    x = alt.X('Threshold:Q', title='Threshold (T)')
+    color = alt.Color('Algoritmo:N', title='Algoritmo')
+
+    ipc = alt.Chart(df_plot).mark_line(point=True).encode(
+        x=x,
+        y=alt.Y('IPC:Q', title='Instruções por Ciclo (IPC)'),
+        color=color,
+        tooltip=['Algoritmo', 'Threshold', 'IPC', 'Ciclos', 'Instrucoes']
+    ).properties(title=f'IPC por Threshold (n = {size})').interactive()
+
+    # Formato longo: uma linha por (algoritmo, tipo de falha), separadas pelo traço
+    df_misses = df_plot.melt(id_vars=['Algoritmo', 'Threshold'], value_vars=list(MISS_COUNTERS.values()),
+                             var_name='Falha', value_name='MPKI').dropna(subset=['MPKI'])
+    misses = alt.Chart(df_misses).mark_line(point=True).encode(
+        x=x,
+        y=alt.Y('MPKI:Q', title='Falhas por Mil Instruções (MPKI)', scale=alt.Scale(type='symlog')),
+        color=color,
+        strokeDash=alt.StrokeDash('Falha:N', title='Falha'),
+        tooltip=['Algoritmo', 'Threshold', 'Falha', 'MPKI']
+    ).properties(title=f'Taxas de Falha por Threshold (n = {size})').interactive()
+
+    return ipc, misses
+
+
+# Hipótese da página 3.1, confrontada com os contadores medidos (ver describe_counters)
+COUNTER_HYPOTHESIS = ("o Bubble Sort executa mais instruções por elemento e erra mais previsões de desvio "
+                      "(a troca depende de cada comparação) do que o Insertion Sort")
+
+
+def describe_counters(df_rates, size):
+    """
+    Texto da análise da página 3.1 calculado a partir das médias de df_rates:
+    compara Merge+Bubble e Merge+Insertion no maior Threshold medido para os dois
+    e diz se os números apoiam COUNTER_HYPOTHESIS. None se faltar algum dos dois.
+    """
+    df = df_rates[df_rates['Tamanho'] == size].set_index(['Algoritmo', 'Threshold'])
+    algorithms = set(df.index.get_level_values('Algoritmo'))
+    if not {MERGE_BUBBLE, MERGE_INSERTION} <= algorithms:
+        return None
+    common = sorted(set(df.loc[MERGE_BUBBLE].index) & set(df.loc[MERGE_INSERTION].index))
+    if not common:
+        return None
+    threshold = common[-1]
+    bubble, insertion = df.loc[(MERGE_BUBBLE, threshold)], df.loc[(MERGE_INSERTION, threshold)]
+
+    facts = [f"o tempo real médio foi {bubble['TempoReal']:.6f} s (Bubble) contra {insertion['TempoReal']:.6f} s (Insertion)"]
+    if pd.isna(bubble['Instrucoes']) or pd.isna(insertion['Instrucoes']):
+        return (f"**Análise:** Com n = {size:,} e Threshold = {threshold}, {facts[0]}. Os contadores de "
+                f"instruções e desvios não estão disponíveis nesta máquina, então a hipótese de que "
+                f"{COUNTER_HYPOTHESIS} não pode ser verificada aqui.")
+
+    more_instructions = bubble['Instrucoes'] > insertion['Instrucoes']
+    facts.append(f"foram executadas {bubble['Instrucoes'] / size:.1f} contra {insertion['Instrucoes'] / size:.1f} "
+                 "instruções por elemento")
+    supported = more_instructions
+    if not (pd.isna(bubble['MPKIDesvio']) or pd.isna(insertion['MPKIDesvio'])):
+        facts.append(f"{bubble['MPKIDesvio']:.2f} contra {insertion['MPKIDesvio']:.2f} falhas de desvio "
+                     "por mil instruções")
+        supported = supported and bubble['MPKIDesvio'] > insertion['MPKIDesvio']
+    if not (pd.isna(bubble['IPC']) or pd.isna(insertion['IPC'])):
+        facts.append(f"IPC de {bubble['IPC']:.2f} contra {insertion['IPC']:.2f}")
+
+    verdict = ("Esses números são consistentes com a hipótese de que" if supported
+               else "Nesta medição, os números **não** confirmam a hipótese de que")
+    return (f"**Análise:** Com n = {size:,} e Threshold = {threshold} (Bubble contra Insertion), "
+            f"{'; '.join(facts)}. {verdict} {COUNTER_HYPOTHESIS}.")
+
+
 ###################################################################
 ###################################################################
 ###################################################################
@@ -266,23 +779,8 @@ def create_comparison_chart(df_raw):
 
 # --- Carregamento Principal ---
 
-# Carrego todos os csv
-df_bubble, df_insertion, df_best, df_bubble_raw, df_insertion_raw, df_final_merge, df_final_mergebubble, df_final_mergeinsertion = load_data()
-
-# Carrego os códigos .c
-code_merge4 = load_code('merge4_final.c')
-code_merge5 = load_code('merge5_final.c')
-code_best_merge = load_code('process_best_merge_results.c')
-code_best_insertion = load_code('process_best_mergeinsertion_results.c')
-code_best_bubble = load_code('process_best_mergebubble_results.c')
-
-# Análise de Threshold
-if df_insertion is not None and df_bubble is not None:
-    best_thresholds_insertion = analyze_thresholds(df_insertion, "Insertion")
-    best_thresholds_bubble = analyze_thresholds(df_bubble, "Bubble")
-else:
-    best_thresholds_insertion = pd.DataFrame()
-    best_thresholds_bubble = pd.DataFrame()
+# Os csv e os códigos .c são carregados sob demanda, dentro de cada página
+# (ver DATASETS/load_dataset), para não pagar pelos dados brutos em todas as páginas.
 
 
 ####################################################################
@@ -298,6 +796,7 @@ page = st.sidebar.radio("Ir para:", [
     "1. Fundamentos (Algoritmos Base)",
     "2. Metodologia Experimental",
     "3. Resultados Visuais",
+    "3.1 Contadores de Hardware",
     "4. Análise de Complexidade Teórica",
     "5. Conclusões",
     "6. Referências Bibliográficas",
@@ -305,6 +804,9 @@ page = st.sidebar.radio("Ir para:", [
     "Apêndice: Dados Brutos (.csv)"
 ])
 
+# Orçamento de pontos por gráfico: menos pontos = specs menores para clientes lentos
+budget = st.sidebar.select_slider("Pontos por gráfico:", options=[250, 500, 1000, 2000], value=POINT_BUDGET)
+
 ####################################################################
 ####################################################################
 # --- Conteúdo das Páginas ---
@@ -365,8 +867,8 @@ elif page == "1. Fundamentos (Algoritmos Base)":
     st.subheader("Gráfico de Complexidade Teórico")
     st.markdown("O gráfico a seguir mostra como a complexidade linear, log-linear e quadrática se relacionam conforme o tamanho da entrada aumenta.")
     st.markdown("O eixo X representa o tamanho da entrada (n), enquanto o eixo Y representa o custo computacional estimado.")
-    chart1 = generate_theory_chart()
-    st.altair_chart(chart1, use_container_width=True)
+    chart1 = generate_theory_chart(budget)
+    st.vega_lite_chart(chart1, use_container_width=True)
 
     # Divido em três abas
     tab1, tab2, tab3 = st.tabs(["Merge Sort", "Bubble Sort", "Insertion Sort"])
@@ -608,6 +1110,12 @@ elif page == "2. Metodologia Experimental":
     $$
 
     Os gráficos nas seções seguintes utilizam a **menor média** (`MediaReal.min()`) encontrada para cada `Tamanho`, representando o desempenho ótimo do algoritmo (ou seja, o melhor `Threshold` para aquele `Tamanho`).
+
+    * **Estatísticas robustas (MedianaReal, MediaAparadaReal, MADReal, P5/P95, ICInfReal/ICSupReal):**
+    uma única execução lenta (ex: interrupção do sistema operacional) puxa a média, mas quase não move a
+    mediana. A média aparada descarta 10% de cada ponta, o MAD é a mediana dos desvios absolutos em relação
+    à mediana e o intervalo de confiança de 95% da mediana vem de 1000 reamostragens (*bootstrap*).
+    Na página de resultados, o melhor `Threshold` também pode ser escolhido pela **menor mediana**.
     """)
 
     st.divider()
@@ -635,19 +1143,126 @@ elif page == "2. Metodologia Experimental":
 elif page == "3. Resultados Visuais":
     st.header("3. Resultados Visuais")
     st.markdown("Os dados empíricos validam a nossa análise teórica.")
+
+    # Estatística que decide o vencedor de cada Tamanho (e a faixa dos gráficos)
+    statistic = st.radio("Estatística do melhor threshold:", list(STATISTICS), horizontal=True)
+    metric = STATISTICS[statistic]
+    robust = metric != 'MediaReal'
+
+    # Escala dos eixos e normalização por Tamanho dos gráficos de tempo (ver chart_data.VIEW_MODES)
+    view = st.radio("Visualização dos tempos:", list(VIEW_MODES), horizontal=True)
+    if VIEW_MODES[view]['unit'] == 'ns':
+        st.caption("Normalizado por Tamanho: uma curva plana indica o crescimento esperado "
+                   "(linear para ns por elemento, n·log₂ n para o segundo modo).")
+
+    # Todas as tabelas/gráficos desta página saem do mesmo índice de melhores configurações
+    best_index = load_best_index(metric=metric)
+    if best_index is not None:
+        df_final_merge = best_for(best_index, MERGE)
+        df_final_mergebubble = best_for(best_index, MERGE_BUBBLE)
+        df_final_mergeinsertion = best_for(best_index, MERGE_INSERTION)
+    else:
+        df_final_merge = df_final_mergebubble = df_final_mergeinsertion = None
     
-    if df_best is not None:
+    # Resultados do harness.py (variantes, kernels, threads, distribuições), se existirem
+    df_variants = load_optional_dataset('variants_summary')
+
+    if best_index is not None:
         st.subheader("Análise Comparativa Final: Híbridos vs. Puro")
-        chart_comparison = create_comparison_chart(df_best)
-        st.altair_chart(chart_comparison, use_container_width=True)
+        # Outras distribuições de entrada (ordenada, reversa, ...) só existem no arquivo das variantes
+        comparison_index = best_index
+        if df_variants is not None and 'Distribuicao' in df_variants.columns:
+            distributions = sorted(set(df_variants['Distribuicao'].dropna()) | {RANDOM_INPUT})
+            if len(distributions) > 1:
+                distribution = st.selectbox("Distribuição da entrada:", distributions,
+                                            index=distributions.index(RANDOM_INPUT))
+                if distribution != RANDOM_INPUT:
+                    comparison_index = load_best_index(distribution, metric)
+
+        # Casos base (kernels) e variantes extras vêm do harness.py (variantes-summary_results.csv)
+        all_algorithms = list(comparison_index.index.unique(level='Algoritmo'))
+        selected = st.multiselect("Algoritmos/kernels sobrepostos no gráfico:", all_algorithms,
+                                  default=all_algorithms)
+        chart_comparison = create_comparison_chart(comparison_index, selected, metric, budget, view)
+        st.vega_lite_chart(chart_comparison, use_container_width=True)
+        st.markdown(describe_comparison(comparison_index, selected, metric))
+    else:
+        st.warning("Arquivos 'merge-*-summary_results.csv' não encontrados.")
+
+    # Empates: thresholds que não são significativamente mais lentos que o melhor
+    tie_algorithms = [a for a, name in RAW_SOURCES.items() if os.path.exists(DATASETS[name])]
+    if tie_algorithms:
+        st.subheader("Threshold Ótimo e Empates Estatísticos")
+        tie_algorithm = st.selectbox("Algoritmo (empates):", tie_algorithms)
+        raw_name = RAW_SOURCES[tie_algorithm]
+        df_ties = load_tied_thresholds(raw_name, file_version(DATASETS[raw_name]), metric)
+        if df_ties is not None:
+            stable, stable_sizes = stable_threshold(df_ties)
+            st.vega_lite_chart(create_tie_band_chart(tie_bands(df_ties), tie_algorithm, stable),
+                            use_container_width=True)
+            st.markdown(f"""
+            **Análise:** A linha é o threshold com a menor {'mediana' if robust else 'média'} em cada tamanho.
+            A faixa cobre os thresholds que o teste de **Mann-Whitney** (unilateral, α = 5%, sobre as
+            execuções individuais) não consegue separar do melhor: entre eles, o "vencedor" é questão de
+            ruído. A linha tracejada é o threshold **{stable}**, empatado com o melhor em
+            **{stable_sizes}** tamanhos. Ele é um candidato mais estável para produção do que o
+            vencedor de cada tamanho.
+            """)
+
+    # Grade completa Threshold × Tamanho: mostra quão plano é o ótimo em volta do vencedor
+    grid_algorithms = [a for a, name in SUMMARY_SOURCES.items() if os.path.exists(DATASETS[name])]
+    if grid_algorithms:
+        st.subheader("Mapa Threshold × Tamanho (Tempo Relativo ao Melhor)")
+        grid_algorithm = st.selectbox("Algoritmo (mapa):", grid_algorithms)
+        grid_name = SUMMARY_SOURCES[grid_algorithm]
+        sizes, thresholds, grid = load_relative_grid(grid_name, file_version(DATASETS[grid_name]), metric)
+        hybrids = thresholds != MERGE_THRESHOLD
+        measured = ~np.isnan(grid[:, hybrids]).all(axis=1)
+        if not measured.any():
+            # Sem nenhum tempo de híbrido acima da resolução do clock() o mapa fica vazio
+            st.info("Nenhum tamanho tem um tempo de híbrido mensurável (todos os melhores tempos são 0 na "
+                    "resolução do `clock()`): não há mapa para mostrar.")
+        else:
+            st.vega_lite_chart(create_grid_heatmap(sizes, thresholds, grid, grid_algorithm),
+                               use_container_width=True)
+            flat_counts = (grid[measured][:, hybrids] <= 1.0 + FLAT_TOLERANCE).sum(axis=1)
+            st.markdown(f"""
+            **Análise:** Cada célula é o tempo ({'mediana' if robust else 'média'}) dividido pelo do melhor threshold
+            do mesmo tamanho. Clique em uma linha do mapa para ver a curva daquele tamanho. No tamanho típico
+            (mediana), **{int(np.median(flat_counts))}** de {int(hybrids.sum())} thresholds ficam a até
+            {FLAT_TOLERANCE:.0%} do melhor (linha tracejada). O ótimo é uma região plana, e não um ponto. O Merge Puro
+            (-1) aparece para comparação, mas não conta como melhor nem entra nessa contagem. Tamanhos abaixo da
+            resolução do `clock()` (melhor tempo 0) ficam de fora.
+            """)
+
+    # Tipos de elemento: só aparece se o harness.py já rodou com outros tipos além de int32
+    if df_variants is not None and 'Elemento' in df_variants.columns and df_variants['Elemento'].nunique() > 1:
+        st.subheader("Threshold Ótimo por Tamanho do Elemento")
+        df_element = threshold_by_element(df_variants)
+        element_algorithm = st.selectbox("Algoritmo (tipos de elemento):",
+                                         sorted(df_element['Algoritmo'].unique()))
+        st.vega_lite_chart(create_element_threshold_chart(df_element, element_algorithm), use_container_width=True)
         st.markdown("""
-        **Análise:** Este gráfico compara o melhor desempenho de cada algoritmo:
-        - Linha Azul (Merge+Insertion).
-        - Linha Laranja (Merge Puro).
-        - Linha Vermelha (Merge+Bubble).
+        **Análise:** Elementos maiores deixam cada movimentação do caso base mais cara,
+        então o threshold ótimo encontrado para `int` não vale para registros.
+        """)
+
+    # Escalabilidade: só aparece se o harness.py já rodou com mais de 1 thread
+    if df_variants is not None and 'Threads' in df_variants.columns and (df_variants['Threads'] > 1).any():
+        st.subheader("Escalabilidade com Threads (Speedup e Eficiência)")
+        df_scaling = scaling_table(df_variants)
+        algorithm = st.selectbox("Algoritmo:", sorted(df_scaling['Algoritmo'].unique()))
+        chart_speedup, chart_efficiency = create_scaling_charts(df_scaling, algorithm)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.vega_lite_chart(chart_speedup, use_container_width=True)
+        with col2:
+            st.vega_lite_chart(chart_efficiency, use_container_width=True)
+        st.markdown("""
+        **Análise:** Para cada número de threads é usado o melhor threshold. A linha tracejada
+        é o speedup ideal (igual ao número de threads); onde as curvas se afastam dela
+        (e a eficiência cai), a escala deixou de compensar.
         """)
-    else:
-        st.warning("Arquivo 'melhores_resultados_merge_hibridos.csv' não encontrado.")
 
     st.subheader("Gráfico de Melhores Resultados e Desvio Padrão")
     st.markdown("""
@@ -660,21 +1275,28 @@ elif page == "3. Resultados Visuais":
     Eles plotam tanto o **Tempo Real** (tempo de relógio) quanto o **Tempo de CPU** (tempo de processamento).
     A **sombra** representa o **desvio padrão** (±) para essas execuções.
     """)
+    if robust:
+        st.caption("Com a mediana, a linha é a **mediana** das execuções e a sombra é o **intervalo de confiança "
+                   "de 95%** da mediana (bootstrap), que não fica negativo como a faixa média ± desvio.")
 
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if df_bubble is not None:
-            chart_merge = create_result_individual_chart(df_final_merge, "Merge (Melhor Média ± Desvio)")
-            st.altair_chart(chart_merge, use_container_width=True)
+        if df_final_merge is not None:
+            chart_merge = create_result_individual_chart(df_final_merge, f"Merge ({statistic})", robust, budget,
+                                                         view)
+            st.vega_lite_chart(chart_merge, use_container_width=True)
     with col2:
-        if df_insertion is not None:
-            chart_mergebubble = create_result_individual_chart(df_final_mergebubble, "Merge+Bubble (Melhor Média ± Desvio)")
-            st.altair_chart(chart_mergebubble, use_container_width=True)
+        if df_final_mergebubble is not None:
+            chart_mergebubble = create_result_individual_chart(df_final_mergebubble, f"Merge+Bubble ({statistic})",
+                                                               robust, budget, view)
+            st.vega_lite_chart(chart_mergebubble, use_container_width=True)
     with col3:
-        if df_bubble is not None:
-            chart_mergeinsertion = create_result_individual_chart(df_final_mergeinsertion, "Merge+Insertion (Melhor Média ± Desvio)")
-            st.altair_chart(chart_mergeinsertion, use_container_width=True)
+        if df_final_mergeinsertion is not None:
+            chart_mergeinsertion = create_result_individual_chart(df_final_mergeinsertion,
+                                                                  f"Merge+Insertion ({statistic})", robust, budget,
+                                                                  view)
+            st.vega_lite_chart(chart_mergeinsertion, use_container_width=True)
 
     
 
@@ -682,7 +1304,7 @@ elif page == "3. Resultados Visuais":
     
     with col1:
         st.markdown("##### Merge")
-        if not df_final_merge.empty:
+        if df_final_merge is not None and not df_final_merge.empty:
             st.dataframe(df_final_merge, use_container_width=True)
             st.caption("Menores tempos médios para cada tamanho de entrada.")
         else:
@@ -690,17 +1312,17 @@ elif page == "3. Resultados Visuais":
     
     with col2:
         st.markdown("##### Híbrido: Merge + Bubble")
-        if not df_final_mergebubble.empty:
+        if df_final_mergebubble is not None and not df_final_mergebubble.empty:
             st.dataframe(df_final_mergebubble, use_container_width=True)
-            st.caption("Menores tempos médios para cada tamanho de entrada.")
+            st.caption("Menores tempos médios para cada tamanho de entrada (com o 2º melhor threshold e a margem entre eles).")
         else:
             st.warning("Dados de threshold do Merge com Bubble Sort não puderam ser analisados.")
     
     with col3:
         st.markdown("##### Híbrido: Merge + Insertion")
-        if not df_final_mergeinsertion.empty:
+        if df_final_mergeinsertion is not None and not df_final_mergeinsertion.empty:
             st.dataframe(df_final_mergeinsertion, use_container_width=True)
-            st.caption("Menores tempos médios para cada tamanho de entrada.")
+            st.caption("Menores tempos médios para cada tamanho de entrada (com o 2º melhor threshold e a margem entre eles).")
         else:
             st.warning("Dados de threshold do Merge com Insertion Sort não puderam ser analisados.")
 
@@ -734,6 +1356,60 @@ elif page == "3. Resultados Visuais":
 ####################################################################
 ####################################################################
 
+elif page == "3.1 Contadores de Hardware":
+    st.header("3.1 Contadores de Hardware")
+    st.markdown("""
+    O tempo mostra **quanto** o Merge+Bubble perde para o Merge+Insertion; os contadores de hardware
+    ajudam a investigar **por quê**. Cada execução registra ciclos, instruções, falhas de previsão de
+    desvio, falhas de cache (L1 e último nível) e falhas de página.
+    """)
+
+    df_raw = load_optional_dataset('variants_raw')
+    has_counters = df_raw is not None and all(c in df_raw.columns for c in COUNTER_COLUMNS)
+    df_rates = None
+    if has_counters:
+        df_raw = baseline_rows(df_raw)
+        df_raw = df_raw[df_raw['Threshold'] >= 0]
+        if df_raw[COUNTER_COLUMNS].notna().any().any():
+            df_rates = counter_rates(df_raw)
+
+    if df_rates is None or df_rates.empty:
+        st.info("""
+        Ainda não há contadores de hardware. Gere-os com:
+
+        `python harness.py --base bubble --sizes 1000 10000 --thresholds 0 8 16 32 64 --counters`
+
+        (requer `perf_event_open`; em máquinas com `kernel.perf_event_paranoid` alto, os
+        contadores de ciclos/cache ficam vazios e apenas as falhas de página são medidas).
+        """)
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            size = st.selectbox("Tamanho da entrada (n):", sorted(df_rates['Tamanho'].unique()))
+        with col2:
+            all_algorithms = sorted(df_rates['Algoritmo'].unique())
+            algorithms = st.multiselect("Algoritmos:", all_algorithms, default=all_algorithms)
+
+        chart_ipc, chart_misses = create_counter_charts(df_rates, size, algorithms)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.vega_lite_chart(chart_ipc, use_container_width=True)
+        with col2:
+            st.vega_lite_chart(chart_misses, use_container_width=True)
+        analysis = describe_counters(df_rates, size)
+        st.markdown(analysis or f"**Hipótese:** {COUNTER_HYPOTHESIS[0].upper() + COUNTER_HYPOTHESIS[1:]}. "
+                                "Meça os dois casos base (`--base bubble` e `--base insertion`) para verificá-la.")
+        if COUNTER_COVERAGE in df_rates.columns and (df_rates[COUNTER_COVERAGE] < 1).any():
+            st.caption("Em algumas execuções o grupo de contadores foi multiplexado pelo kernel "
+                       f"(menor cobertura: {df_rates[COUNTER_COVERAGE].min():.0%}). As contagens foram "
+                       "escaladas, e as razões (IPC, MPKI) continuam vindo da mesma janela.")
+
+        st.markdown("##### Médias por Threshold")
+        st.dataframe(df_rates[df_rates['Tamanho'] == size], use_container_width=True)
+
+####################################################################
+####################################################################
+
 #ANÁLISE TEÓRICA VERSÃO 3
 
 elif page == "4. Análise de Complexidade Teórica":
@@ -852,6 +1528,60 @@ elif page == "4. Análise de Complexidade Teórica":
     Dessa forma, o ajuste correto de `THRESHOLD` é **fundamental** para obter o desempenho máximo do algoritmo híbrido.
     """)
 
+    st.divider()
+
+    st.subheader("Parte 3: Ajuste Empírico do Modelo de Custo")
+    st.markdown(r"""
+    As constantes $c_1$ e $c_2$ podem ser estimadas a partir dos próprios dados. O modelo
+    $T(n) = c_0 + c_1 n \log_2(n/k) + c_2 n k$ é ajustado por **mínimos quadrados** a todas as células
+    (`Tamanho` × `Threshold`) dos arquivos summary. Cada equação é dividida por $n$, para que os maiores
+    tamanhos não decidam sozinhos o ajuste. Como o vetor é dividido ao meio até caber no `THRESHOLD`,
+    $k$ é o tamanho real das folhas, $n / 2^{\lceil \log_2(n/\text{THRESHOLD}) \rceil}$.
+
+    Derivando o modelo em $k$, o ponto ótimo é:
+    """)
+    st.latex(r"k^* = \frac{c_1}{c_2 \ln 2}")
+
+    fitted = {}
+    for algorithm, name in SUMMARY_SOURCES.items():
+        if os.path.exists(DATASETS[name]):
+            fitted[algorithm] = load_cost_model(name, file_version(DATASETS[name]))
+    if fitted:
+        df_models = pd.DataFrame({algorithm: model for algorithm, (model, _) in fitted.items()}).T
+        st.dataframe(df_models.style.format({'c0': '{:.3e}', 'c1': '{:.3e}', 'c2': '{:.3e}', 'KOtimo': '{:.1f}',
+                                             'R2': '{:.4f}', 'ErroRelativo': '{:.1%}', 'Celulas': '{:.0f}',
+                                             'TamanhoMinimo': '{:.0f}'}),
+                     use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        model_algorithm = col1.selectbox("Algoritmo (modelo):", list(fitted))
+        model, df_surface = fitted[model_algorithm]
+        model_sizes = sorted(df_surface['Tamanho'].unique())
+        model_size = col2.select_slider("Tamanho (n):", options=model_sizes,
+                                        value=model_sizes[max(0, len(model_sizes) - 8)])
+        chart_fit, chart_best = create_cost_model_charts(df_surface, model, model_size, model_algorithm)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.vega_lite_chart(chart_fit, use_container_width=True)
+        with col2:
+            st.vega_lite_chart(chart_best, use_container_width=True)
+
+        # Previsão para tamanhos que não foram medidos (abaixo do menor Tamanho ajustado o modelo não vale)
+        min_size = int(max(model['TamanhoMinimo'] for model, _ in fitted.values()))
+        new_size = st.number_input("Prever o THRESHOLD para n =", min_value=min_size,
+                                   value=max(min_size, 100_000_000), step=1_000_000)
+        df_prediction = pd.concat([
+            predicted_thresholds(model, [new_size]).assign(Algoritmo=algorithm)
+            for algorithm, (model, _) in fitted.items()
+        ], ignore_index=True)
+        st.dataframe(df_prediction[['Algoritmo', 'Tamanho', 'ThresholdPrevisto', 'TempoPrevisto', 'KOtimo']],
+                     use_container_width=True, hide_index=True)
+        st.markdown(r"""
+        **Análise:** O $c_2$ do Bubble Sort é muito maior que o do Insertion Sort, e por isso o seu $k^*$ é
+        minúsculo. Com o modelo ajustado, o `THRESHOLD` de um tamanho (ou de uma máquina) ainda não medido sai de
+        algumas poucas execuções, sem a varredura completa.
+        """)
+
 
 ####################################################################
 ####################################################################
@@ -1086,6 +1816,12 @@ elif page == "6. Referências Bibliográficas":
 
 elif page == "Apêndice: Códigos-Fonte (.c)":
     st.header("Apêndice: Códigos-Fonte (.c)")
+
+    code_merge4 = load_code('merge4_final.c')
+    code_merge5 = load_code('merge5_final.c')
+    code_best_merge = load_code('process_best_merge_results.c')
+    code_best_insertion = load_code('process_best_mergeinsertion_results.c')
+    code_best_bubble = load_code('process_best_mergebubble_results.c')
     
     with st.expander("merge4_final.c (Híbrido Merge + Bubble)"):
         st.code(code_merge4, language='c')
@@ -1137,6 +1873,14 @@ elif page == "Apêndice: Códigos-Fonte (.c)":
 
 elif page == "Apêndice: Dados Brutos (.csv)":
     st.header("Apêndice: Dados Brutos (.csv)")
+
+    df_final_merge = load_dataset('final_merge')
+    df_final_mergebubble = load_dataset('final_mergebubble')
+    df_final_mergeinsertion = load_dataset('final_mergeinsertion')
+    df_insertion = load_dataset('insertion_summary')
+    df_bubble = load_dataset('bubble_summary')
+    df_insertion_raw = load_dataset('insertion_raw')
+    df_bubble_raw = load_dataset('bubble_raw')
     
     st.subheader("Melhores Resultados")
     with st.expander("Mostrar dados de 'melhores_resultados_merge.csv'"):
@@ -1201,6 +1945,20 @@ elif page == "Apêndice: Dados Brutos (.csv)":
             st.warning("Arquivo não carregado.")
             
     st.subheader("Dados Brutos (Execuções Individuais)")
+    # As execuções são resumidas por Tamanho no servidor: o gráfico recebe ~30 linhas, não 34 mil
+    raw_sources = {MERGE_INSERTION: df_insertion_raw, MERGE_BUBBLE: df_bubble_raw}
+    raw_sources = {name: df for name, df in raw_sources.items() if df is not None}
+    if raw_sources:
+        col1, col2 = st.columns(2)
+        with col1:
+            raw_algorithm = st.selectbox("Algoritmo (execuções):", list(raw_sources))
+        df_raw = raw_sources[raw_algorithm]
+        with col2:
+            raw_threshold = st.selectbox("Threshold (-1 = Merge Puro):", sorted(df_raw['Threshold'].unique()))
+        df_quantiles = size_quantiles(df_raw[df_raw['Threshold'] == raw_threshold], 'TempoReal')
+        st.vega_lite_chart(create_raw_distribution_chart(
+            df_quantiles, f"Distribuição das Execuções: {raw_algorithm} (Threshold = {raw_threshold})"
+        ), use_container_width=True)
     with st.expander("Mostrar dados de 'merge-insertion-raw_times.csv'"):
         if df_insertion_raw is not None:
             st.dataframe(df_insertion_raw)
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+from datasets import RANDOM_INPUT
+
+####################################################################
+####################################################################
+# --- Índice de Melhor Configuração (Algoritmo, Tamanho) ---
+####################################################################
+####################################################################
+
+# Threshold especial que representa o Merge Sort Puro nos CSVs
+MERGE_THRESHOLD = -1
+
+# Nomes dos algoritmos usados em todos os gráficos/tabelas
+MERGE = 'Merge Puro'
+MERGE_BUBBLE = 'Merge+Bubble'
+MERGE_INSERTION = 'Merge+Insertion'
+
+# Valor de cada coluna extra do arquivo das variantes que corresponde às condições
+# dos CSVs originais (1 thread, entrada aleatória, int32, uma ordenação por medição,
+# malloc/free a cada execução). Também é o valor usado para as linhas gravadas antes
+# de a coluna existir.
+BASELINE = {'Threads': 1, 'Distribuicao': RANDOM_INPUT, 'Elemento': 'int32', 'TamanhoElemento': 4,
+            'Medicao': 'unica', 'Buffers': 'malloc'}
+
+# Sufixo dos rótulos do harness.py que coincidem com os dos CSVs originais (ver tag_summaries)
+HARNESS_SUFFIX = ' (harness)'
+
+
+def baseline_rows(df, keep=(), **conditions):
+    """
+    Filtra as linhas nas condições de BASELINE (ou nas indicadas em 'conditions'),
+    ignorando as colunas em 'keep' e as que o DataFrame não tem.
+    """
+    for column, value in {**BASELINE, **conditions}.items():
+        if column in df.columns and column not in keep:
+            df = df[df[column].fillna(BASELINE[column]) == value]
+    return df
+
+
+def tag_summaries(df_bubble, df_insertion, df_variants=None, distribution=RANDOM_INPUT):
+    """
+    Junta os dois arquivos summary em um único DataFrame longo com a coluna 'Algoritmo'.
+
+    O Merge Puro (Threshold == -1) é tirado do summary do Insertion, que é a mesma
+    origem usada para gerar 'melhores_resultados_merge.csv'. O summary das variantes
+    (harness.py) já tem a coluna 'Algoritmo' e entra como está, só com as execuções
+    com 1 thread e da distribuição pedida. Os CSVs originais só entram para a
+    distribuição aleatória; nesse caso as linhas do harness.py com os mesmos rótulos
+    (variante top-down) ganham HARNESS_SUFFIX, para que as duas medições não
+    disputem o mesmo grupo (Algoritmo, Tamanho) em build_best_index.
+    """
+    parts = []
+    if distribution == RANDOM_INPUT:
+        is_merge = df_insertion['Threshold'] == MERGE_THRESHOLD
+        parts += [
+            df_insertion[is_merge].assign(Algoritmo=MERGE),
+            df_bubble[df_bubble['Threshold'] != MERGE_THRESHOLD].assign(Algoritmo=MERGE_BUBBLE),
+            df_insertion[~is_merge].assign(Algoritmo=MERGE_INSERTION),
+        ]
+    if df_variants is not None:
+        # O índice compara algoritmos com 1 thread; a escala com threads tem tabela própria
+        df_harness = baseline_rows(df_variants, Distribuicao=distribution)
+        if distribution == RANDOM_INPUT:
+            original = df_harness['Algoritmo'].isin([MERGE, MERGE_BUBBLE, MERGE_INSERTION])
+            df_harness = df_harness.assign(Algoritmo=df_harness['Algoritmo'].where(
+                ~original, df_harness['Algoritmo'] + HARNESS_SUFFIX))
+        parts.append(df_harness)
+    return pd.concat(parts, ignore_index=True)
+
+
+def build_best_index(df_all, metric='MediaReal'):
+    """
+    Constrói, em uma única passada, a melhor configuração para cada (Algoritmo, Tamanho).
+
+    Ordena tudo uma única vez por (Algoritmo, Tamanho, métrica) e pega a 1ª e a 2ª
+    linha de cada grupo. Retorna o melhor Threshold, o segundo colocado e a margem
+    entre eles. Em caso de empate, vence a linha que aparece primeiro no CSV
+    (mesmo critério do idxmin).
+    """
+    # np.lexsort é estável: nos empates preserva a ordem original das linhas
+    order = np.lexsort((
+        df_all[metric].to_numpy(),
+        df_all['Tamanho'].to_numpy(),
+        df_all['Algoritmo'].to_numpy(),
+    ))
+    df_sorted = df_all.iloc[order].reset_index(drop=True)
+    rank = df_sorted.groupby(['Algoritmo', 'Tamanho'], sort=False).cumcount().to_numpy()
+
+    keys = ['Algoritmo', 'Tamanho']
+    best = df_sorted[rank == 0].set_index(keys)
+    runner_up = df_sorted[rank == 1].set_index(keys)[['Threshold', metric]]
+    runner_up = runner_up.rename(columns={
+        'Threshold': 'Threshold_2',
+        metric: f'{metric}_2',
+    })
+
+    # O Merge Puro só tem uma linha por tamanho: os campos do 2º colocado ficam NaN
+    best_index = best.join(runner_up, how='left')
+    best_index['Margem'] = best_index[f'{metric}_2'] - best_index[metric]
+    best_index['Margem_%'] = 100 * best_index['Margem'] / best_index[metric]
+    return best_index.sort_index()
+
+
+def best_for(best_index, algorithm):
+    """Retorna a tabela do melhor Threshold por Tamanho para um único algoritmo."""
+    return best_index.xs(algorithm, level='Algoritmo').reset_index()
+
+
+def scaling_table(df_variants, metric='MediaReal'):
+    """
+    Speedup e eficiência por (Algoritmo, Tamanho, Threads), usando o melhor Threshold
+    de cada número de threads. Speedup = T(1 thread) / T(p threads); eficiência = speedup / p.
+    Só entram os pares (Algoritmo, Tamanho) que têm a execução com 1 thread, e só a
+    entrada aleatória.
+    """
+    df_variants = baseline_rows(df_variants, keep=('Threads',))
+    best_rows = df_variants.groupby(['Algoritmo', 'Tamanho', 'Threads'])[metric].idxmin()
+    best = df_variants.loc[best_rows, ['Algoritmo', 'Tamanho', 'Threads', 'Threshold', metric]]
+    serial = best[best['Threads'] == 1].set_index(['Algoritmo', 'Tamanho'])[metric].rename('Tempo1')
+    table = best.join(serial, on=['Algoritmo', 'Tamanho'], how='inner')
+    table['Speedup'] = table['Tempo1'] / table[metric]
+    table['Eficiencia'] = table['Speedup'] / table['Threads']
+    return table.drop(columns='Tempo1')
+
+
+def threshold_by_element(df_variants, metric='MediaReal'):
+    """
+    Melhor Threshold por (Algoritmo, Elemento, Tamanho), sem o Merge Puro, para ver
+    como o threshold ótimo muda com o tamanho do elemento (ver harness.ELEMENT_TYPES).
+    """
+    df = baseline_rows(df_variants, keep=('Elemento', 'TamanhoElemento'))
+    df = df[df['Threshold'] != MERGE_THRESHOLD]
+    best_rows = df.groupby(['Algoritmo', 'Elemento', 'Tamanho'])[metric].idxmin()
+    return df.loc[best_rows, ['Algoritmo', 'Elemento', 'TamanhoElemento', 'Tamanho', 'Threshold', metric]]
+
+
+def relative_grid(df_summary, metric='MediaReal'):
+    """
+    Pivota um summary na matriz Tamanho × Threshold (NumPy, NaN nas células sem
+    medição) e divide cada linha pelo menor tempo dos híbridos do seu Tamanho: 1.0 é
+    o melhor threshold e 1.05 fica 5% acima dele. A coluna do Merge Puro
+    (MERGE_THRESHOLD) fica na matriz para comparação, mas não entra no melhor.
+    Retorna (tamanhos, thresholds, matriz). Tamanhos cujo melhor tempo é 0 (abaixo
+    da resolução do clock()) ficam em NaN.
+    """
+    sizes, size_codes = np.unique(df_summary['Tamanho'].to_numpy(), return_inverse=True)
+    thresholds, threshold_codes = np.unique(df_summary['Threshold'].to_numpy(), return_inverse=True)
+    grid = np.full((len(sizes), len(thresholds)), np.nan)
+    grid[size_codes, threshold_codes] = df_summary[metric].to_numpy(dtype=np.float64)
+    best = np.fmin.reduce(grid[:, thresholds != MERGE_THRESHOLD], axis=1, keepdims=True)
+    return sizes, thresholds, grid / np.where(best > 0, best, np.nan)
@@ -0,0 +1,292 @@
+"""
+Preparação dos dados dos gráficos no servidor: antes de chegar ao Altair, cada
+série é reduzida a um orçamento de pontos (LTTB para linhas, quantis por Tamanho
+para as execuções brutas), para que a spec Vega-Lite enviada ao navegador fique
+pequena mesmo com os 34 mil registros dos raw_times.
+
+As specs prontas ficam em um cache LRU (ver cached_chart): um rerun do Streamlit
+que pede o mesmo gráfico com os mesmos dados só consulta o cache.
+"""
+import functools
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+####################################################################
+####################################################################
+# --- Configuração ---
+####################################################################
+####################################################################
+
+# Pontos por gráfico (somando todas as séries) e limite duro de linhas de uma spec
+POINT_BUDGET = 500
+CHART_MAX_ROWS = 5000
+
+# Quantis usados para resumir as execuções brutas de cada Tamanho
+QUANTILES = {'P5': 0.05, 'Mediana': 0.5, 'P95': 0.95}
+
+# Limites do cache de specs: número de specs e soma dos tamanhos (JSON)
+SPEC_CACHE_ENTRIES = 128
+SPEC_CACHE_BYTES = 64 * 1024 * 1024
+
+####################################################################
+####################################################################
+# --- Redução de séries (LTTB) ---
+####################################################################
+####################################################################
+
+def lttb(x, y, budget):
+    """
+    Largest-Triangle-Three-Buckets: escolhe 'budget' índices de uma série (x em
+    ordem crescente) preservando a forma visual. O primeiro e o último ponto são
+    sempre mantidos; de cada balde intermediário fica o ponto que forma o maior
+    triângulo com o ponto escolhido antes e com a média do balde seguinte.
+    """
+    n = len(x)
+    if budget >= n or budget < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, budget - 1).astype(np.int64)
+    selected = np.empty(budget, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(budget - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_lines(df, x, y, by=None, budget=POINT_BUDGET):
+    """
+    Reduz cada série de linha (uma por valor de 'by') com LTTB. O orçamento é
+    dividido igualmente entre as séries; séries menores que a sua parte ficam inteiras.
+    """
+    df = df.dropna(subset=[x, y])
+    if by is None:
+        groups = [df]
+    else:
+        groups = [group for _, group in df.groupby(by, sort=False)]
+    if not groups:
+        return df
+
+    share = max(3, budget // len(groups))
+    parts = []
+    for group in groups:
+        group = group.sort_values(x, kind='stable')
+        parts.append(group.iloc[lttb(group[x].to_numpy(), group[y].to_numpy(), share)])
+    return pd.concat(parts, ignore_index=True)
+
+
+def size_quantiles(df_raw, value, by=('Tamanho',)):
+    """
+    Resume as execuções brutas em quantis (QUANTILES) por grupo: uma linha por
+    Tamanho (e pelas demais colunas de 'by') em vez de uma linha por execução.
+    """
+    grouped = df_raw.groupby(list(by), sort=True)[value]
+    table = grouped.quantile(list(QUANTILES.values())).unstack()
+    table.columns = list(QUANTILES)
+    table['Execucoes'] = grouped.size()
+    return table.reset_index()
+
+####################################################################
+####################################################################
+# --- Modos de visualização dos tempos ---
+####################################################################
+####################################################################
+
+# Escala dos eixos, título do eixo Y e unidade de cada modo (ver normalize_times).
+# 'symlog' em vez de 'log' no Y: muitos tempos medidos com clock() valem 0.
+VIEW_MODES = {
+    'Linear': {'x_scale': 'linear', 'y_scale': 'linear', 'unit': 's',
+               'title': 'Tempo de Execução (s) - Escala Linear'},
+    'Log-Log': {'x_scale': 'log', 'y_scale': 'symlog', 'unit': 's',
+                'title': 'Tempo de Execução (s) - Escala Log'},
+    'ns por elemento': {'x_scale': 'log', 'y_scale': 'linear', 'unit': 'ns',
+                        'title': 'Tempo por Elemento (ns) - t / n'},
+    'Tempo / (n·log₂ n)': {'x_scale': 'log', 'y_scale': 'linear', 'unit': 'ns',
+                           'title': 'Tempo Normalizado (ns) - t / (n·log₂ n)'},
+}
+
+# Abaixo deste tempo (1 ns) a escala symlog é linear, o que acomoda os zeros
+LOG_CONSTANT = 1e-9
+
+
+def size_factor(sizes, view):
+    """
+    Fator que converte tempos em segundos na métrica do modo 'view', calculado
+    de uma vez para a coluna Tamanho inteira. n·log₂ n só é definido para n > 1.
+    """
+    n = np.asarray(sizes, dtype=np.float64)
+    if view == 'ns por elemento':
+        return 1e9 / n
+    if view == 'Tempo / (n·log₂ n)':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(n > 1, 1e9 / (n * np.log2(n)), np.nan)
+    return np.ones_like(n)
+
+
+def normalize_times(df, columns, view, size='Tamanho'):
+    """Aplica o fator de size_factor às colunas de tempo (cópia do DataFrame)."""
+    if VIEW_MODES[view]['unit'] == 's':
+        return df
+    factor = size_factor(df[size].to_numpy(), view)
+    return df.assign(**{column: df[column].to_numpy(dtype=np.float64) * factor for column in columns})
+
+####################################################################
+####################################################################
+# --- Transformador de dados do Altair ---
+####################################################################
+####################################################################
+
+def budget_transformer(data, max_rows=CHART_MAX_ROWS):
+    """
+    Transformador registrado como 'orcamento': embute os dados na spec (como o
+    'default'), mas recusa qualquer gráfico com mais de max_rows linhas, para que
+    um gráfico que pulou a preparação acima falhe em vez de ficar lento.
+    """
+    return alt.to_values(alt.limit_rows(data, max_rows=max_rows))
+
+
+def enable_budget_transformer(max_rows=CHART_MAX_ROWS):
+    """Registra e ativa o transformador 'orcamento' para as specs geradas por chart.to_dict()."""
+    alt.data_transformers.register('orcamento', budget_transformer)
+    alt.data_transformers.enable('orcamento', max_rows=max_rows)
+
+####################################################################
+####################################################################
+# --- Cache das specs (LRU) ---
+####################################################################
+####################################################################
+
+def _update_fingerprint(digest, value):
+    """Acrescenta um valor ao hash: DataFrames/Series/arrays pelo conteúdo, o resto pelo repr."""
+    if isinstance(value, np.ndarray):
+        # O repr de arrays grandes é abreviado ('...'): o hash usa os bytes
+        digest.update(repr(('ndarray', value.dtype.str, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        columns = list(value.columns) if isinstance(value, pd.DataFrame) else [value.name]
+        digest.update(repr((type(value).__name__, columns, list(value.index.names))).encode())
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'[')
+        for item in value:
+            _update_fingerprint(digest, item)
+        digest.update(b']')
+    elif isinstance(value, dict):
+        _update_fingerprint(digest, sorted(value.items()))
+    else:
+        digest.update(repr((type(value).__name__, value)).encode())
+
+
+def fingerprint(*values):
+    """Hash (SHA-1) do conteúdo dos argumentos de uma função de gráfico."""
+    digest = hashlib.sha1()
+    _update_fingerprint(digest, values)
+    return digest.hexdigest()
+
+
+class SpecCache:
+    """
+    Cache LRU de specs Vega-Lite serializadas (JSON), limitado em número de
+    entradas e em bytes. Compartilhado por todas as sessões do servidor.
+    """
+
+    def __init__(self, max_entries=SPEC_CACHE_ENTRIES, max_bytes=SPEC_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retorna a spec (desserializada) ou None; um acerto vira o item mais recente."""
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(text)
+
+    def put(self, key, spec):
+        """Guarda a spec e descarta as menos usadas até caber nos limites."""
+        text = json.dumps(spec)
+        if len(text) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = text
+            self._bytes += len(text)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """(entradas, bytes, acertos, faltas)."""
+        with self._lock:
+            return len(self._entries), self._bytes, self.hits, self.misses
+
+
+SPEC_CACHE = SpecCache()
+
+# O tema e o transformador do Altair são globais: a serialização é feita um gráfico por vez
+_altair_lock = threading.Lock()
+
+
+def to_spec(chart, max_rows=CHART_MAX_ROWS):
+    """
+    Serializa um gráfico Altair com o transformador 'orcamento' e sem o tema
+    padrão do Altair (como o st.altair_chart faz), pronto para st.vega_lite_chart.
+    """
+    alt.data_transformers.register('orcamento', budget_transformer)
+    with _altair_lock:
+        with alt.theme.enable('none'), alt.data_transformers.enable('orcamento', max_rows=max_rows):
+            return chart.to_dict()
+
+
+def cached_chart(func):
+    """
+    Memoiza uma função que cria gráficos Altair: a chave é o nome da função mais o
+    hash dos argumentos (ver fingerprint), e o valor é a spec pronta (ou uma tupla
+    de specs, se a função retornar vários gráficos). Exibir com st.vega_lite_chart.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (func.__module__, func.__qualname__, fingerprint(args, kwargs))
+        cached = SPEC_CACHE.get(key)
+        if cached is not None:
+            return tuple(cached) if isinstance(cached, list) else cached
+
+        result = func(*args, **kwargs)
+        if isinstance(result, tuple):
+            specs = tuple(to_spec(chart) for chart in result)
+            SPEC_CACHE.put(key, list(specs))
+        else:
+            specs = to_spec(result)
+            SPEC_CACHE.put(key, specs)
+        return specs
+
+    return wrapper
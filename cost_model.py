@@ -0,0 +1,147 @@
+"""
+Ajuste empírico do modelo de custo da página 4,
+
+    T(n, k) = c0 + c1·n·log2(n/k) + c2·n·k,
+
+aos tempos dos arquivos summary (uma equação por célula Tamanho × Threshold),
+por mínimos quadrados. Com c1 e c2 estimados, o threshold ótimo sai da derivada
+do modelo, sem rodar a varredura completa.
+
+No hybridSortFn o vetor é dividido ao meio até ter no máximo THRESHOLD elementos,
+então as folhas têm s = n / 2^L elementos, com L = ceil(log2(n/THRESHOLD)) níveis
+de merge (k/2 < s <= k). O modelo usa esse s no lugar de k: log2(n/s) = L é
+exato, e os "degraus" dos tempos medidos entre thresholds vizinhos aparecem no ajuste.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+####################################################################
+####################################################################
+# --- Configuração ---
+####################################################################
+####################################################################
+
+# Células mais rápidas que isto (100x a resolução de 1 µs do clock()) ficam fora do ajuste
+FIT_MIN_TIME = 1e-4
+
+# Coeficientes do modelo, na ordem das colunas de design_matrix
+COEFFICIENTS = ['c0', 'c1', 'c2']
+
+####################################################################
+####################################################################
+# --- Modelo ---
+####################################################################
+####################################################################
+
+def merge_levels(sizes, thresholds):
+    """
+    Níveis de merge (L) e tamanho das folhas (s = n / 2^L) da recursão do
+    hybridSortFn para cada par (n, THRESHOLD). Com THRESHOLD >= n, L = 0 e s = n.
+    """
+    n = np.asarray(sizes, dtype=np.float64)
+    k = np.asarray(thresholds, dtype=np.float64)
+    # A tolerância evita que n/k potência de 2 ganhe um nível a mais por arredondamento
+    levels = np.ceil(np.log2(np.maximum(n / k, 1.0)) - 1e-9)
+    return levels, n / np.exp2(levels)
+
+
+def design_matrix(sizes, thresholds):
+    """Colunas [1, n·log2(n/s), n·s] do modelo para cada par (n, THRESHOLD) (ver merge_levels)."""
+    n = np.asarray(sizes, dtype=np.float64)
+    levels, leaf = merge_levels(n, thresholds)
+    return np.column_stack([np.ones_like(n), n * levels, n * leaf])
+
+
+def predict_time(model, sizes, thresholds):
+    """Tempo previsto pelo modelo (Series/dict com c0, c1 e c2) para cada par (n, k)."""
+    coefficients = np.array([model[name] for name in COEFFICIENTS], dtype=np.float64)
+    return design_matrix(sizes, thresholds) @ coefficients
+
+
+def optimal_threshold(model):
+    """
+    Tamanho de folha que anula a derivada do modelo: -c1·n/(s·ln 2) + c2·n = 0,
+    ou seja, s* = c1 / (c2·ln 2), o mesmo para qualquer n > s*. NaN se c1 ou c2 <= 0.
+    Como as folhas ficam entre THRESHOLD/2 e THRESHOLD, o melhor THRESHOLD para um
+    n específico sai de predicted_thresholds.
+    """
+    if model['c1'] <= 0 or model['c2'] <= 0:
+        return math.nan
+    return model['c1'] / (model['c2'] * math.log(2))
+
+
+def fit_cost_model(df_summary, metric='MediaReal', min_time=FIT_MIN_TIME):
+    """
+    Estima c0, c1 e c2 de um híbrido com todas as células (Tamanho, Threshold) do
+    summary, exceto o Merge Puro (Threshold -1) e as células abaixo de min_time.
+    Cada equação é dividida por n (mínimos quadrados sobre o tempo por elemento),
+    para que os maiores tamanhos não decidam sozinhos o ajuste.
+
+    O termo fixo c0 não pode ser negativo: se o ajuste livre der c0 < 0, o modelo é
+    reajustado com c0 = 0 (senão o tempo previsto fica negativo para n pequeno).
+
+    Retorna uma Series com os coeficientes, o threshold ótimo (KOtimo), o R² no
+    tempo por elemento, o erro relativo mediano, o número de células usadas e o
+    menor Tamanho ajustado (TamanhoMinimo, abaixo dele o modelo extrapola).
+    Só precisa de algumas células por híbrido: um ajuste com poucos tamanhos de
+    uma máquina nova já prevê os thresholds dos demais.
+    """
+    cells = df_summary[(df_summary['Threshold'] > 0) & (df_summary[metric] >= min_time)]
+    n = cells['Tamanho'].to_numpy(dtype=np.float64)
+    times = cells[metric].to_numpy(dtype=np.float64)
+    if len(cells) < len(COEFFICIENTS):
+        return pd.Series(math.nan, index=COEFFICIENTS + ['KOtimo', 'R2', 'ErroRelativo', 'Celulas',
+                                                         'TamanhoMinimo'])
+
+    X = design_matrix(n, cells['Threshold'].to_numpy()) / n[:, None]
+    y = times / n
+    coefficients, *_ = np.linalg.lstsq(X, y, rcond=None)
+    if coefficients[0] < 0:
+        coefficients[0] = 0.0
+        coefficients[1:], *_ = np.linalg.lstsq(X[:, 1:], y, rcond=None)
+
+    fitted = X @ coefficients
+    residual = np.sum((y - fitted) ** 2)
+    total = np.sum((y - y.mean()) ** 2)
+    model = pd.Series(coefficients, index=COEFFICIENTS)
+    model['KOtimo'] = optimal_threshold(model)
+    model['R2'] = 1.0 - residual / total if total > 0 else math.nan
+    model['ErroRelativo'] = float(np.median(np.abs(fitted * n - times) / times))
+    model['Celulas'] = len(cells)
+    model['TamanhoMinimo'] = n.min()
+    return model
+
+
+def model_surface(model, df_summary, metric='MediaReal'):
+    """
+    Medições dos híbridos (Threshold > 0) lado a lado com o modelo: colunas
+    Previsto e ErroRelativo ((previsto - medido) / medido) para cada célula.
+    """
+    cells = df_summary.loc[df_summary['Threshold'] > 0, ['Tamanho', 'Threshold', metric]].copy()
+    cells['Previsto'] = predict_time(model, cells['Tamanho'], cells['Threshold'])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cells['ErroRelativo'] = (cells['Previsto'] - cells[metric]) / cells[metric]
+    return cells
+
+
+def predicted_thresholds(model, sizes, thresholds=None):
+    """
+    Para cada Tamanho, o threshold de 'thresholds' (padrão: 1 a 1024) com o menor
+    tempo previsto (grade Tamanho × Threshold avaliada de uma vez) e o k* contínuo
+    limitado a n. Serve para tamanhos que não foram medidos.
+    """
+    sizes = np.asarray(sizes, dtype=np.float64)
+    if thresholds is None:
+        thresholds = np.arange(1, 1025)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    grid_n, grid_k = np.meshgrid(sizes, thresholds, indexing='ij')
+    predicted = predict_time(model, grid_n.ravel(), grid_k.ravel()).reshape(grid_n.shape)
+    best = thresholds[np.argmin(predicted, axis=1)]
+    return pd.DataFrame({
+        'Tamanho': sizes.astype(np.int64),
+        'ThresholdPrevisto': best.astype(np.int64),
+        'TempoPrevisto': predicted.min(axis=1),
+        'KOtimo': np.minimum(optimal_threshold(model), sizes),
+    })
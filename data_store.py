@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # pyarrow é opcional: sem ele, lemos direto do CSV
+    pa = None
+    pa_ipc = None
+
+####################################################################
+####################################################################
+# --- Cache Colunar (Arrow IPC) dos arquivos CSV ---
+####################################################################
+####################################################################
+
+# Pasta onde ficam as versões colunares dos CSVs
+CACHE_DIR = ".cache_dados"
+
+# Tipos de cada coluna conhecida. Tamanho cabe em int32 (máx. 1.342.177.280).
+COLUMN_TYPES = {
+    'Tamanho': np.int32,
+    'Threshold': np.int32,
+    'Execucao': np.int32,
+    'Threads': np.int32,
+    'TamanhoElemento': np.int32,
+    'TempoCPU': np.float64,
+    'TempoReal': np.float64,
+    'TempoPrimeiroAcesso': np.float64,
+    # Contadores de hardware (harness.py --counters); float porque podem estar vazios
+    'Ciclos': np.float64,
+    'Instrucoes': np.float64,
+    'FalhasDesvio': np.float64,
+    'FalhasL1': np.float64,
+    'FalhasLLC': np.float64,
+    'FalhasPagina': np.float64,
+    'CoberturaContadores': np.float64,
+    # Modo de alta resolução (harness.py --precise)
+    'CiclosTSC': np.float64,
+    'Lote': np.float64,
+    'MediaCPU': np.float64,
+    'DesvioCPU': np.float64,
+    'MediaReal': np.float64,
+    'DesvioReal': np.float64,
+}
+
+
+def _cache_paths(csv_path):
+    """Retorna o caminho do arquivo .arrow e do arquivo de metadados para um CSV."""
+    base = os.path.splitext(os.path.basename(csv_path))[0]
+    directory = os.path.join(os.path.dirname(os.path.abspath(csv_path)), CACHE_DIR)
+    return os.path.join(directory, base + ".arrow"), os.path.join(directory, base + ".json")
+
+
+def _file_hash(path):
+    """Calcula o SHA-1 do arquivo lendo em blocos (não carrega tudo na memória)."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_csv_typed(csv_path):
+    """Lê um CSV de resultados aplicando os tipos de COLUMN_TYPES."""
+    header = pd.read_csv(csv_path, nrows=0, encoding='utf-8-sig').columns
+    dtypes = {col: COLUMN_TYPES[col] for col in header if col in COLUMN_TYPES}
+    return pd.read_csv(csv_path, dtype=dtypes, encoding='utf-8-sig')
+
+
+def _write_arrow(df, arrow_path):
+    """Grava o DataFrame em Arrow IPC (sem compressão, para permitir memory-map)."""
+    os.makedirs(os.path.dirname(arrow_path), exist_ok=True)
+    table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+    tmp_path = arrow_path + ".tmp"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, arrow_path)
+
+
+def _write_cache(df, arrow_path, meta_path, meta):
+    """Grava o cache colunar de um CSV e seus metadados (mtime, tamanho, hash)."""
+    _write_arrow(df, arrow_path)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def _read_cache(arrow_path):
+    """Abre o arquivo Arrow via memory-map e converte para DataFrame."""
+    with pa.memory_map(arrow_path, 'r') as source:
+        table = pa_ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+
+def load_csv(csv_path):
+    """
+    Carrega um CSV de resultados usando o cache colunar.
+
+    O CSV só é convertido novamente quando seu mtime/tamanho mudam E o
+    conteúdo (hash) também mudou. Sem pyarrow, faz a leitura direta do CSV.
+    """
+    if pa is None:
+        return read_csv_typed(csv_path)
+
+    stat = os.stat(csv_path)
+    arrow_path, meta_path = _cache_paths(csv_path)
+
+    meta = None
+    if os.path.exists(arrow_path) and os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+    if meta is not None:
+        # Caminho rápido: arquivo não foi tocado desde a última conversão
+        if meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('size') == stat.st_size:
+            return _read_cache(arrow_path)
+
+        # O mtime mudou, mas o conteúdo pode ser o mesmo (ex: novo deploy/checkout)
+        current_hash = _file_hash(csv_path)
+        if meta.get('sha1') == current_hash:
+            meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            return _read_cache(arrow_path)
+    else:
+        current_hash = _file_hash(csv_path)
+
+    df = read_csv_typed(csv_path)
+    _write_cache(df, arrow_path, meta_path, {
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha1': current_hash,
+    })
+    return df
+
+####################################################################
+####################################################################
+# --- Armazenamento particionado por Tamanho (dados brutos) ---
+####################################################################
+####################################################################
+
+# Os raw_times são particionados por Tamanho: uma ingestão incremental só
+# reescreve (e invalida no cache do app) as partições dos tamanhos afetados.
+PARTITION_COLUMN = 'Tamanho'
+
+
+def _partition_dir(csv_path):
+    """Pasta com as partições de um CSV bruto."""
+    arrow_path, _ = _cache_paths(csv_path)
+    return os.path.splitext(arrow_path)[0] + ".parts"
+
+
+def _partition_path(csv_path, value):
+    return os.path.join(_partition_dir(csv_path), f"{PARTITION_COLUMN}={int(value)}.arrow")
+
+
+def _write_partition_meta(csv_path):
+    """Registra a versão do CSV (mtime, tamanho, hash) que as partições representam."""
+    stat = os.stat(csv_path)
+    meta = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha1': _file_hash(csv_path)}
+    with open(os.path.join(_partition_dir(csv_path), "_meta.json"), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def _partitions_are_current(csv_path):
+    """Verifica se as partições ainda correspondem ao conteúdo do CSV."""
+    meta_path = os.path.join(_partition_dir(csv_path), "_meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    stat = os.stat(csv_path)
+    if meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('size') == stat.st_size:
+        return True
+    return meta.get('sha1') == _file_hash(csv_path)
+
+
+def write_partition(csv_path, value, df):
+    """Grava (substitui) a partição de um Tamanho."""
+    _write_arrow(df, _partition_path(csv_path, value))
+
+
+def read_partition(path):
+    """Lê uma partição via memory-map."""
+    return _read_cache(path)
+
+
+def list_partitions(csv_path):
+    """
+    Retorna {Tamanho: caminho} das partições de um CSV bruto, (re)criando-as
+    quando o CSV foi alterado por fora (ex: sobrescrito pelos programas .c).
+    Retorna None se pyarrow não estiver disponível.
+    """
+    if pa is None:
+        return None
+
+    if not _partitions_are_current(csv_path):
+        directory = _partition_dir(csv_path)
+        if os.path.isdir(directory):
+            for old in os.listdir(directory):
+                os.remove(os.path.join(directory, old))
+        for value, group in load_csv(csv_path).groupby(PARTITION_COLUMN, sort=False):
+            write_partition(csv_path, value, group)
+        _write_partition_meta(csv_path)
+
+    directory = _partition_dir(csv_path)
+    prefix = f"{PARTITION_COLUMN}="
+    return {
+        int(name[len(prefix):-len(".arrow")]): os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.startswith(prefix) and name.endswith(".arrow")
+    }
+
+
+def align_rows(csv_path, df_new):
+    """
+    Reordena as colunas de df_new como no cabeçalho do CSV. Um conjunto de
+    colunas diferente do cabeçalho gera ValueError.
+    """
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        header = f.readline().strip().split(',')
+    if sorted(df_new.columns) != sorted(header):
+        raise ValueError(f"Colunas {list(df_new.columns)} não correspondem ao cabeçalho de '{csv_path}': {header}")
+    return df_new[header]
+
+
+def append_rows(csv_path, df_new):
+    """
+    Acrescenta novas linhas a um CSV bruto sem reprocessar o histórico:
+    o CSV recebe as linhas no final (na ordem de colunas do cabeçalho, ver
+    align_rows) e só as partições dos Tamanhos afetados são reescritas.
+    Retorna a lista de Tamanhos afetados.
+    """
+    df_new = align_rows(csv_path, df_new)
+    partitions = list_partitions(csv_path)
+
+    with open(csv_path, 'a', encoding='utf-8', newline='') as f:
+        df_new.to_csv(f, header=False, index=False, float_format='%.6f')
+
+    affected = sorted(int(v) for v in df_new[PARTITION_COLUMN].unique())
+    if partitions is not None:
+        for value, group in df_new.groupby(PARTITION_COLUMN, sort=False):
+            if int(value) in partitions:
+                group = pd.concat([read_partition(partitions[int(value)]), group], ignore_index=True)
+            write_partition(csv_path, value, group)
+        _write_partition_meta(csv_path)
+    return affected
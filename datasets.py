@@ -0,0 +1,159 @@
+"""
+Gerador de entradas de benchmark gravadas em disco.
+
+Cada entrada (distribuição, tamanho, semente) vira um arquivo binário com n
+inteiros int32 (little-endian, sem cabeçalho). Os harnesses (harness.py e os
+programas merge4_final.c / merge5_final.c via sweep.py) abrem esses arquivos por
+memory-map, então o Merge+Bubble e o Merge+Insertion ordenam exatamente os mesmos
+bytes, e um arquivo já gerado nunca é gerado de novo.
+
+Uso:
+    python datasets.py --distributions aleatorio zipf --sizes 1000 1048576
+"""
+import argparse
+import os
+
+import numpy as np
+
+####################################################################
+####################################################################
+# --- Configuração ---
+####################################################################
+####################################################################
+
+DATASET_DIR = "datasets"
+DEFAULT_SEED = 42
+
+# Distribuição da entrada dos CSVs originais (rand() com srand(42))
+RANDOM_INPUT = 'aleatorio'
+
+# Valor fixo de cada distribuição na semente dos arquivos (ver _rng): uma
+# distribuição nova recebe um valor novo, sem mudar o conteúdo das existentes
+DISTRIBUTION_SEEDS = {RANDOM_INPUT: 0, 'ordenado': 1, 'reverso': 2, 'quase-ordenado': 3,
+                      'poucos-unicos': 4, 'zipf': 5, 'dente-de-serra': 6}
+DISTRIBUTIONS = list(DISTRIBUTION_SEEDS)
+
+# Mesmo intervalo do rand() da glibc (0 .. RAND_MAX = 2^31 - 1)
+MAX_VALUE = 2 ** 31
+
+# Fração de pares trocados na entrada 'quase-ordenado' e valores distintos em 'poucos-unicos'
+NEARLY_SORTED_SWAPS = 0.01
+FEW_UNIQUE_VALUES = 16
+
+# Expoente da distribuição de Zipf (quanto maior, mais repetidos os valores pequenos)
+ZIPF_EXPONENT = 1.2
+
+# Comprimento de cada "dente" (sequência crescente) da entrada 'dente-de-serra'
+SAWTOOTH_PERIOD = 4096
+
+# Os arquivos são gerados em blocos, para não precisar de n inteiros em memória
+CHUNK = 1 << 24
+
+####################################################################
+####################################################################
+# --- Geração ---
+####################################################################
+####################################################################
+
+def dataset_path(distribution, n, seed=DEFAULT_SEED, directory=DATASET_DIR):
+    return os.path.join(directory, f"{distribution}-{n}-{seed}.int32")
+
+
+def _rng(distribution, n, seed):
+    """Gerador próprio de cada arquivo: o conteúdo não depende da ordem de geração."""
+    return np.random.default_rng([seed, n, DISTRIBUTION_SEEDS[distribution]])
+
+
+def _fill_chunks(out, fill):
+    """Preenche 'out' bloco a bloco com fill(start, stop)."""
+    for start in range(0, len(out), CHUNK):
+        stop = min(start + CHUNK, len(out))
+        out[start:stop] = fill(start, stop)
+
+
+def _reverse_in_place(out):
+    """Inverte o vetor trocando blocos das pontas (sem cópia do vetor inteiro)."""
+    n = len(out)
+    for start in range(0, n // 2, CHUNK):
+        size = min(CHUNK, n // 2 - start)
+        head = out[start:start + size].copy()
+        out[start:start + size] = out[n - start - size:n - start][::-1]
+        out[n - start - size:n - start] = head[::-1]
+
+
+def fill_dataset(out, distribution, seed=DEFAULT_SEED):
+    """Preenche o vetor int32 'out' (array ou memmap) com a distribuição pedida."""
+    n = len(out)
+    rng = _rng(distribution, n, seed)
+
+    if distribution == 'poucos-unicos':
+        _fill_chunks(out, lambda a, b: rng.integers(0, FEW_UNIQUE_VALUES, size=b - a, dtype=np.int32))
+    elif distribution == 'zipf':
+        _fill_chunks(out, lambda a, b: np.minimum(rng.zipf(ZIPF_EXPONENT, size=b - a), MAX_VALUE - 1))
+    elif distribution == 'dente-de-serra':
+        step = MAX_VALUE // SAWTOOTH_PERIOD
+        _fill_chunks(out, lambda a, b: (np.arange(a, b, dtype=np.int64) % SAWTOOTH_PERIOD) * step)
+    elif distribution in (RANDOM_INPUT, 'ordenado', 'reverso', 'quase-ordenado'):
+        _fill_chunks(out, lambda a, b: rng.integers(0, MAX_VALUE, size=b - a, dtype=np.int32))
+        if distribution != RANDOM_INPUT:
+            out.sort()
+        if distribution == 'reverso':
+            _reverse_in_place(out)
+        elif distribution == 'quase-ordenado' and n > 1:
+            swaps = max(1, int(n * NEARLY_SORTED_SWAPS) // 2)
+            i = rng.integers(0, n, size=swaps)
+            j = rng.integers(0, n, size=swaps)
+            out[i], out[j] = out[j], out[i]
+    else:
+        raise ValueError(f"Distribuição desconhecida: {distribution}")
+    return out
+
+
+def make_input(n, distribution, seed=DEFAULT_SEED):
+    """Gera a entrada em memória (sem passar pelo disco)."""
+    return fill_dataset(np.empty(n, dtype=np.int32), distribution, seed)
+
+
+def generate_dataset(distribution, n, seed=DEFAULT_SEED, directory=DATASET_DIR):
+    """
+    Grava o arquivo da entrada se ele ainda não existir (ou estiver incompleto) e
+    retorna o caminho. A escrita é feita em um arquivo temporário + rename, para
+    que um arquivo interrompido nunca pareça pronto.
+    """
+    path = dataset_path(distribution, n, seed, directory)
+    if os.path.exists(path) and os.path.getsize(path) == n * 4:
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    if n > 0:
+        out = np.memmap(tmp_path, dtype='<i4', mode='w+', shape=(n,))
+        fill_dataset(out, distribution, seed)
+        out.flush()
+        del out
+    else:
+        open(tmp_path, 'wb').close()
+    os.replace(tmp_path, path)
+    return path
+
+
+def open_dataset(distribution, n, seed=DEFAULT_SEED, directory=DATASET_DIR):
+    """Abre a entrada por memory-map (somente leitura), gerando o arquivo se preciso."""
+    path = generate_dataset(distribution, n, seed, directory)
+    if n == 0:
+        return np.empty(0, dtype=np.int32)
+    return np.memmap(path, dtype='<i4', mode='r', shape=(n,))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gera as entradas de benchmark em arquivos binários int32.")
+    parser.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS, default=[RANDOM_INPUT],
+                        help="Distribuições a gerar.")
+    parser.add_argument('--sizes', type=int, nargs='+', required=True, help="Tamanhos de entrada.")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Semente.")
+    parser.add_argument('--dir', default=DATASET_DIR, help="Pasta onde os arquivos são gravados.")
+    args = parser.parse_args()
+
+    for distribution in args.distributions:
+        for n in args.sizes:
+            print(generate_dataset(distribution, n, args.seed, args.dir))
@@ -0,0 +1,581 @@
+"""
+Wrapper Python (ctypes) para a biblioteca hybrid_sort.c.
+
+Os vetores NumPy int32 são passados direto para o C, sem cópia. Tamanhos,
+thresholds, casos base e variantes podem ser variados daqui, sem recompilar.
+
+Uso:
+    from harness import Harness
+    h = Harness()
+    df = h.sweep(sizes=[1000, 10000], thresholds=[-1, 8, 16, 32], runs=10, base='insertion')
+
+    # Pela linha de comando (grava em variantes-raw_times.csv / variantes-summary_results.csv):
+    python harness.py --variant pingpong --base insertion --sizes 10000 100000 --thresholds -1 16 64
+"""
+import argparse
+import ctypes
+import os
+import shutil
+import subprocess
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from best_config import BASELINE, MERGE, MERGE_BUBBLE, MERGE_INSERTION
+from data_store import read_csv_typed
+from datasets import DEFAULT_SEED, DISTRIBUTIONS, RANDOM_INPUT, generate_dataset, open_dataset
+from process_results import COUNTER_COLUMNS, COUNTER_COVERAGE, aggregate_raw
+
+####################################################################
+####################################################################
+# --- Configuração ---
+####################################################################
+####################################################################
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+SOURCE = os.path.join(_HERE, "hybrid_sort.c")
+LIBRARY = os.path.join(_HERE, "build", "libhybridsort.so")
+
+# Deve seguir a mesma ordem do enum BaseCase em hybrid_sort.c
+BASE_CASES = {
+    'bubble': 0,
+    'insertion': 1,
+    'binary-insertion': 2,
+    'branchless': 3,
+    'network': 4,
+}
+
+# Maior subvetor com rede de ordenação própria (NETWORK_MAX_SIZE em hybrid_sort.c)
+NETWORK_MAX_SIZE = 16
+
+# Deve seguir a mesma ordem do enum SortVariant em hybrid_sort.c
+VARIANTS = {
+    'topdown': 0,
+    'pingpong': 1,
+    'bottomup': 2,
+    'bottomup-l1': 3,
+    'bottomup-l2': 4,
+    'adaptive': 5,
+}
+
+# Rótulo da coluna 'Algoritmo' para cada caso base e para cada variante
+ALGORITHM_LABELS = {
+    'bubble': MERGE_BUBBLE,
+    'insertion': MERGE_INSERTION,
+    'binary-insertion': 'Merge+Binary Insertion',
+    'branchless': 'Merge+Branchless Insertion',
+    'network': 'Merge+Network',
+}
+VARIANT_LABELS = {
+    'topdown': None,  # variante original: mesmos rótulos dos CSVs antigos
+    'pingpong': 'Ping-Pong',
+    'bottomup': 'Bottom-Up',
+    'bottomup-l1': 'Bottom-Up L1',
+    'bottomup-l2': 'Bottom-Up L2',
+    'adaptive': 'Adaptativo',
+}
+
+# Tipos de elemento (mesma ordem do enum ElementType em hybrid_sort.c) e o dtype
+# NumPy equivalente. Os registros têm chave int64 + índice original (+ preenchimento).
+ELEMENT_TYPES = {
+    'int32': (0, np.dtype('<i4')),
+    'int64': (1, np.dtype('<i8')),
+    'double': (2, np.dtype('<f8')),
+    'registro16': (3, np.dtype([('key', '<i8'), ('index', '<i8')])),
+    'registro32': (4, np.dtype([('key', '<i8'), ('index', '<i8'), ('pad', 'V16')])),
+    'registro64': (5, np.dtype([('key', '<i8'), ('index', '<i8'), ('pad', 'V48')])),
+}
+
+# Casos base com versão para os outros tipos de elemento (sort_typed em hybrid_sort.c)
+TYPED_BASES = ('bubble', 'insertion')
+
+
+def make_elements(keys, element):
+    """Converte as chaves int32 de uma entrada (datasets.py) para o tipo de elemento."""
+    dtype = ELEMENT_TYPES[element][1]
+    if dtype.names is None:
+        return keys.astype(dtype)
+    records = np.zeros(len(keys), dtype=dtype)
+    records['key'] = keys
+    records['index'] = np.arange(len(keys))
+    return records
+
+
+# Colunas do raw_times das variantes
+RAW_COLUMNS = ['Tamanho', 'Threshold', 'Execucao', 'TempoCPU', 'TempoReal',
+               'Algoritmo', 'Threads', 'Distribuicao', 'Elemento', 'TamanhoElemento', 'Medicao', 'Buffers']
+
+# Coluna 'Medicao': uma ordenação por tempo (clock()) ou média de um lote (--precise).
+# As duas formas nunca caem na mesma célula do summary.
+SINGLE_MEASUREMENT = BASELINE['Medicao']
+BATCH_MEASUREMENT = 'lote'
+
+# Coluna 'Buffers': malloc/free a cada execução ou buffers reaproveitados (reuse_buffers)
+MALLOC_BUFFERS = BASELINE['Buffers']
+
+
+def buffer_mode(reuse_buffers, prefault=True, hugepages=False):
+    """Valor da coluna 'Buffers' (ex: 'reutilizado+prefault'), com as opções de alocação."""
+    if not reuse_buffers:
+        return MALLOC_BUFFERS
+    return '+'.join(['reutilizado'] + (['prefault'] if prefault else []) + (['hugepages'] if hugepages else []))
+
+# Memória de uma ordenação em memória: vetor de trabalho + temp (int de 4 bytes).
+# Com limite de memória, tamanhos acima dele usam a ordenação externa.
+BYTES_PER_ELEMENT = 2 * 4
+EXTERNAL_LABEL = 'Externo'
+
+# Arquivos com os resultados das variantes (todos com a coluna 'Algoritmo')
+VARIANTS_RAW = "variantes-raw_times.csv"
+VARIANTS_SUMMARY = "variantes-summary_results.csv"
+
+
+def algorithm_label(threshold, base='insertion', variant='topdown', external=False):
+    """Valor da coluna 'Algoritmo' para uma configuração (ex: 'Merge+Insertion (Ping-Pong, Externo)')."""
+    label = MERGE if threshold == -1 else ALGORITHM_LABELS[base]
+    tags = [VARIANT_LABELS[variant]] if VARIANT_LABELS[variant] else []
+    if external:
+        tags.append(EXTERNAL_LABEL)
+    if tags:
+        label = f"{label} ({', '.join(tags)})"
+    return label
+
+
+class TimeResult(ctypes.Structure):
+    _fields_ = [('cpu_time', ctypes.c_double), ('wall_time', ctypes.c_double)]
+
+
+class PreciseResult(ctypes.Structure):
+    _fields_ = [('cpu_time', ctypes.c_double), ('wall_time', ctypes.c_double),
+                ('cycles', ctypes.c_double), ('batch', ctypes.c_long)]
+
+
+# Colunas extras do modo de alta resolução (ver test_sort_precise)
+PRECISE_COLUMNS = ['CiclosTSC', 'Lote']
+
+# Aquecimento e duração mínima de um lote no modo de alta resolução
+PRECISE_WARMUP = 3
+PRECISE_MIN_TIME = 1e-3
+
+# Uma posição por coluna de COUNTER_COLUMNS (mesma ordem do enum Counter em hybrid_sort.c)
+class CounterResult(ctypes.Structure):
+    _fields_ = [('values', ctypes.c_longlong * len(COUNTER_COLUMNS)), ('coverage', ctypes.c_double)]
+
+
+_INT_PTR = ctypes.POINTER(ctypes.c_int)
+
+
+class SortBuffers(ctypes.Structure):
+    _fields_ = [('array', _INT_PTR), ('temp', _INT_PTR), ('n', ctypes.c_int),
+                ('first_touch_time', ctypes.c_double)]
+
+
+# Opções de buffers_init (mesmos valores dos #define em hybrid_sort.c)
+BUFFER_PREFAULT = 1
+BUFFER_HUGEPAGES = 2
+
+####################################################################
+####################################################################
+# --- Compilação e carregamento ---
+####################################################################
+####################################################################
+
+def build_library(source=SOURCE, library=LIBRARY):
+    """Compila a biblioteca se ela não existir ou se o .c for mais novo que ela."""
+    if not os.path.exists(library) or os.path.getmtime(library) < os.path.getmtime(source):
+        os.makedirs(os.path.dirname(library), exist_ok=True)
+        subprocess.run(["gcc", "-O2", "-fopenmp", "-shared", "-fPIC", "-o", library, source], check=True)
+    return os.path.abspath(library)
+
+
+def _as_int_ptr(array):
+    """Ponteiro para os dados de um vetor int32 contíguo (sem cópia)."""
+    if array.dtype != np.int32 or not array.flags['C_CONTIGUOUS']:
+        raise ValueError("O vetor precisa ser np.int32 e contíguo.")
+    return array.ctypes.data_as(_INT_PTR)
+
+
+class Harness:
+    """Acesso às funções exportadas por hybrid_sort.c."""
+
+    def __init__(self, library=None):
+        self.lib = ctypes.CDLL(library or build_library())
+
+        self.lib.mergeSort.argtypes = [_INT_PTR, _INT_PTR, ctypes.c_int, ctypes.c_int]
+        self.lib.mergeSort.restype = None
+
+        self.lib.hybridSort.argtypes = [_INT_PTR, _INT_PTR, ctypes.c_int, ctypes.c_int,
+                                        ctypes.c_int, ctypes.c_int]
+        self.lib.hybridSort.restype = ctypes.c_int
+
+        self.lib.hybridSortPingPong.argtypes = self.lib.hybridSort.argtypes
+        self.lib.hybridSortPingPong.restype = ctypes.c_int
+
+        self.lib.sort_array.argtypes = [_INT_PTR, _INT_PTR, ctypes.c_int, ctypes.c_int,
+                                        ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        self.lib.sort_array.restype = ctypes.c_int
+
+        self.lib.test_sort.argtypes = [_INT_PTR, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                       ctypes.c_int, ctypes.c_int, ctypes.POINTER(TimeResult)]
+        self.lib.test_sort.restype = ctypes.c_int
+
+        self.lib.buffers_init.argtypes = [ctypes.POINTER(SortBuffers), ctypes.c_int, ctypes.c_int]
+        self.lib.buffers_init.restype = ctypes.c_int
+        self.lib.buffers_free.argtypes = [ctypes.POINTER(SortBuffers)]
+        self.lib.buffers_free.restype = None
+        self.lib.test_sort_buffers.argtypes = [_INT_PTR, ctypes.POINTER(SortBuffers), ctypes.c_int,
+                                               ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                               ctypes.POINTER(TimeResult)]
+        self.lib.test_sort_buffers.restype = ctypes.c_int
+
+        self.lib.external_sort.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_long, ctypes.c_long,
+                                           ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                           ctypes.c_char_p, ctypes.POINTER(TimeResult)]
+        self.lib.external_sort.restype = ctypes.c_int
+
+        self.lib.test_sort_counters.argtypes = [_INT_PTR, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                                ctypes.c_int, ctypes.POINTER(TimeResult),
+                                                ctypes.POINTER(CounterResult)]
+        self.lib.test_sort_counters.restype = ctypes.c_int
+
+        self.lib.test_sort_precise.argtypes = [_INT_PTR, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                               ctypes.c_int, ctypes.c_int, ctypes.c_double,
+                                               ctypes.POINTER(PreciseResult)]
+        self.lib.test_sort_precise.restype = ctypes.c_int
+
+        self.lib.sort_typed.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_long, ctypes.c_int,
+                                        ctypes.c_int, ctypes.c_int]
+        self.lib.sort_typed.restype = ctypes.c_int
+        self.lib.test_sort_typed.argtypes = [ctypes.c_void_p, ctypes.c_long, ctypes.c_int, ctypes.c_int,
+                                             ctypes.c_int, ctypes.POINTER(TimeResult)]
+        self.lib.test_sort_typed.restype = ctypes.c_int
+
+    def _check(self, status, base, variant, threads):
+        if status == -2:
+            raise MemoryError("Erro ao alocar memória")
+        if status == -3:
+            raise OSError("Erro de leitura/escrita na ordenação externa")
+        if status != 0:
+            # -1: a biblioteca recusou a combinação; o OpenMP só é suspeito com mais de 1 thread
+            hint = " (mais de 1 thread exige a biblioteca compilada com -fopenmp)" if threads != 1 else ""
+            raise ValueError(f"Configuração não suportada pela biblioteca: base={base}, variante={variant}, "
+                             f"threads={threads}{hint}")
+
+    def sort(self, array, threshold=-1, base='insertion', variant='topdown', threads=1):
+        """Ordena 'array' (np.int32) no lugar. threshold == -1 usa o Merge Sort puro."""
+        temp = np.empty_like(array)
+        status = self.lib.sort_array(_as_int_ptr(array), _as_int_ptr(temp), len(array), threshold,
+                                     BASE_CASES[base], VARIANTS[variant], threads)
+        self._check(status, base, variant, threads)
+        return array
+
+    def test_sort(self, original, threshold=-1, base='insertion', variant='topdown', threads=1):
+        """
+        Uma execução cronometrada sobre uma cópia de 'original'. Retorna (cpu, real).
+        Com threads > 1, o tempo de CPU é a soma de todas as threads.
+        """
+        result = TimeResult()
+        status = self.lib.test_sort(_as_int_ptr(original), len(original), threshold,
+                                    BASE_CASES[base], VARIANTS[variant], threads, ctypes.byref(result))
+        self._check(status, base, variant, threads)
+        return result.cpu_time, result.wall_time
+
+    def allocate(self, n, prefault=True, hugepages=False):
+        """
+        Aloca os buffers de trabalho uma única vez para o tamanho n.
+        Com prefault, todas as páginas são tocadas aqui e o tempo desse primeiro
+        acesso fica em buffers.first_touch_time (fora do tempo das ordenações).
+        """
+        flags = (BUFFER_PREFAULT if prefault else 0) | (BUFFER_HUGEPAGES if hugepages else 0)
+        buffers = SortBuffers()
+        if self.lib.buffers_init(ctypes.byref(buffers), n, flags) != 0:
+            raise MemoryError("Erro ao alocar memória")
+        return buffers
+
+    def release(self, buffers):
+        """Libera os buffers criados por allocate()."""
+        self.lib.buffers_free(ctypes.byref(buffers))
+
+    def test_sort_buffers(self, original, buffers, threshold=-1, base='insertion', variant='topdown',
+                          threads=1):
+        """Como test_sort, mas reaproveitando buffers já alocados (só recopia a entrada)."""
+        result = TimeResult()
+        status = self.lib.test_sort_buffers(_as_int_ptr(original), ctypes.byref(buffers), threshold,
+                                            BASE_CASES[base], VARIANTS[variant], threads,
+                                            ctypes.byref(result))
+        self._check(status, base, variant, threads)
+        return result.cpu_time, result.wall_time
+
+    def test_sort_counters(self, original, threshold=-1, base='insertion', variant='topdown'):
+        """
+        Como test_sort (1 thread), medindo também os contadores de hardware via
+        perf_event_open. Retorna (cpu, real) e uma tupla na ordem de COUNTER_COLUMNS,
+        com None nos contadores indisponíveis (CPU sem suporte ou perf_event_paranoid),
+        seguida da cobertura do grupo de hardware (COUNTER_COVERAGE; None sem grupo).
+        Contagens de um grupo multiplexado já vêm escaladas pela cobertura.
+        """
+        result = TimeResult()
+        counters = CounterResult()
+        status = self.lib.test_sort_counters(_as_int_ptr(original), len(original), threshold, BASE_CASES[base],
+                                             VARIANTS[variant], ctypes.byref(result), ctypes.byref(counters))
+        self._check(status, base, variant, 1)
+        values = tuple(None if v < 0 else v for v in counters.values)
+        values += (None if counters.coverage < 0 else counters.coverage,)
+        return (result.cpu_time, result.wall_time), values
+
+    def test_sort_precise(self, original, threshold=-1, base='insertion', variant='topdown',
+                          warmup=PRECISE_WARMUP, min_time=PRECISE_MIN_TIME):
+        """
+        Execução de alta resolução (1 thread): a entrada é ordenada em lotes que duram
+        pelo menos min_time segundos, depois de 'warmup' lotes descartados. Retorna o
+        tempo médio por ordenação (cpu, real), os ciclos do TSC por ordenação (None
+        fora de x86) e o tamanho do lote.
+        """
+        result = PreciseResult()
+        status = self.lib.test_sort_precise(_as_int_ptr(original), len(original), threshold, BASE_CASES[base],
+                                            VARIANTS[variant], warmup, min_time, ctypes.byref(result))
+        self._check(status, base, variant, 1)
+        cycles = None if result.cycles < 0 else result.cycles
+        return (result.cpu_time, result.wall_time), cycles, result.batch
+
+    def _typed_ptr(self, array, element):
+        if array.dtype != ELEMENT_TYPES[element][1] or not array.flags['C_CONTIGUOUS']:
+            raise ValueError(f"O vetor precisa ser contíguo e do tipo {ELEMENT_TYPES[element][1]}.")
+        return array.ctypes.data_as(ctypes.c_void_p)
+
+    def sort_typed(self, array, element, threshold=-1, base='insertion'):
+        """Ordena no lugar um vetor de outro tipo de elemento (ver ELEMENT_TYPES e make_elements)."""
+        temp = np.empty_like(array)
+        status = self.lib.sort_typed(self._typed_ptr(array, element), self._typed_ptr(temp, element),
+                                     len(array), threshold, BASE_CASES[base], ELEMENT_TYPES[element][0])
+        self._check(status, base, 'topdown', 1)
+        return array
+
+    def test_sort_typed(self, original, element, threshold=-1, base='insertion'):
+        """
+        Uma execução cronometrada para outro tipo de elemento. Só o híbrido top-down
+        com 1 thread e casos base Bubble/Insertion. Retorna (cpu, real).
+        """
+        result = TimeResult()
+        status = self.lib.test_sort_typed(self._typed_ptr(original, element), len(original), threshold,
+                                          BASE_CASES[base], ELEMENT_TYPES[element][0], ctypes.byref(result))
+        self._check(status, base, 'topdown', 1)
+        return result.cpu_time, result.wall_time
+
+    def external_sort(self, input_path, output_path, n, chunk, threshold=-1, base='insertion',
+                      variant='topdown', threads=1, tmp_dir=None):
+        """
+        Ordena um arquivo int32 de n elementos (ver datasets.py) para 'output_path',
+        usando no máximo 'chunk' elementos em memória por vez: os blocos ordenados
+        são gravados como runs em 'tmp_dir' e mesclados (k-way) por memory-map.
+        Blocos que gerariam mais de 4096 runs são aumentados (limite de mapeamentos).
+        Retorna (cpu, real) das duas fases, incluindo a E/S.
+        """
+        tmp_dir = tmp_dir or os.path.dirname(os.path.abspath(output_path))
+        result = TimeResult()
+        status = self.lib.external_sort(os.fsencode(input_path), os.fsencode(output_path), n, chunk,
+                                        threshold, BASE_CASES[base], VARIANTS[variant], threads,
+                                        os.fsencode(tmp_dir), ctypes.byref(result))
+        self._check(status, base, variant, threads)
+        return result.cpu_time, result.wall_time
+
+    def _external_rows(self, n, distribution, seed, thresholds, runs, base, variant, threads, mem_limit):
+        """Linhas do raw_times de um tamanho que não cabe em 'mem_limit' (ordenação externa)."""
+        input_path = generate_dataset(distribution, n, seed)
+        chunk = max(1, mem_limit // BYTES_PER_ELEMENT)
+        rows = []
+        tmp_dir = tempfile.mkdtemp(prefix="externo-", dir=os.path.dirname(os.path.abspath(input_path)))
+        try:
+            output_path = os.path.join(tmp_dir, "saida.int32")
+            for threshold in thresholds:
+                label = algorithm_label(threshold, base, variant, external=True)
+                for num_threads in threads:
+                    for run in range(runs):
+                        times = self.external_sort(input_path, output_path, n, chunk, threshold, base,
+                                                   variant, num_threads, tmp_dir)
+                        rows.append((n, threshold, run + 1) + times + (label, num_threads, distribution)
+                                    + ('int32', 4, SINGLE_MEASUREMENT, MALLOC_BUFFERS))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return rows
+
+    def sweep(self, sizes, thresholds, runs=50, base='insertion', variant='topdown', threads=(1,),
+              distributions=(RANDOM_INPUT,), seed=DEFAULT_SEED, reuse_buffers=False, prefault=True,
+              hugepages=False, mem_limit=None, element='int32', counters=False, precise=False,
+              warmup=PRECISE_WARMUP, min_time=PRECISE_MIN_TIME):
+        """
+        Executa a grade (Distribuicao x Tamanho x Threshold x Threads) e retorna um
+        DataFrame no formato do raw_times (Tamanho, Threshold, Execucao, TempoCPU,
+        TempoReal), mais as colunas 'Algoritmo' (ver algorithm_label), 'Threads' e
+        'Distribuicao'. As entradas são lidas por memory-map dos arquivos de
+        datasets.py (gerados só na primeira vez).
+
+        Com reuse_buffers, os buffers são alocados uma vez por tamanho (sem
+        malloc/free a cada execução) e o custo do primeiro acesso às páginas
+        é registrado na coluna extra 'TempoPrimeiroAcesso'. A coluna 'Buffers'
+        (ver buffer_mode) separa essas execuções das que alocam a cada vez.
+
+        Com mem_limit (bytes), os tamanhos cujo vetor + temp não cabem no limite
+        usam a ordenação externa (ver external_sort), com o rótulo '(Externo)'.
+
+        Com element diferente de 'int32' (ver ELEMENT_TYPES), as chaves da entrada
+        são convertidas para o tipo (ver make_elements) e ordenadas com
+        test_sort_typed; o tipo e seu tamanho em bytes vão para as colunas
+        'Elemento' e 'TamanhoElemento'.
+
+        Com counters, cada execução também registra os contadores de hardware
+        (colunas COUNTER_COLUMNS; vazias se o perf_event_open não estiver disponível).
+
+        Com precise, cada execução usa test_sort_precise: TempoCPU e TempoReal passam
+        a ser a média por ordenação de um lote (resolução de nanossegundos), e as
+        colunas PRECISE_COLUMNS guardam os ciclos do TSC e o tamanho do lote. A coluna
+        'Medicao' vale 'lote' nessas linhas e 'unica' nas demais, e faz parte da chave
+        do summary (process_results.DIMENSIONS).
+        """
+        single = tuple(threads) == (1,) and not reuse_buffers and mem_limit is None and element == 'int32'
+        if counters and not single:
+            raise ValueError("Os contadores só são medidos em execuções int32, em memória, com 1 thread.")
+        if precise and (not single or counters):
+            raise ValueError("O modo de alta resolução só vale para execuções int32, em memória, com 1 thread "
+                             "e sem contadores.")
+        if base == 'network' and any(t > NETWORK_MAX_SIZE for t in thresholds):
+            raise ValueError(f"O caso base 'network' só tem redes para até {NETWORK_MAX_SIZE} elementos: "
+                             f"use thresholds de 1 a {NETWORK_MAX_SIZE} (ou -1 para o Merge Puro).")
+        if element != 'int32':
+            if variant != 'topdown' or tuple(threads) != (1,) or reuse_buffers or mem_limit is not None:
+                raise ValueError("Outros tipos de elemento só usam o híbrido top-down, em memória, com 1 thread.")
+            if base not in TYPED_BASES:
+                raise ValueError(f"Outros tipos de elemento só têm os casos base {' e '.join(TYPED_BASES)} "
+                                 f"(recebido: {base}).")
+            return self._typed_sweep(sizes, thresholds, runs, base, distributions, seed, element)
+
+        rows = []
+        for distribution in distributions:
+            for n in sizes:
+                if mem_limit is not None and n * BYTES_PER_ELEMENT > mem_limit:
+                    external = self._external_rows(n, distribution, seed, thresholds, runs, base, variant,
+                                                   threads, mem_limit)
+                    rows += [row + (None,) for row in external] if reuse_buffers else external
+                    continue
+
+                original = open_dataset(distribution, n, seed)
+                buffers = self.allocate(n, prefault, hugepages) if reuse_buffers else None
+                try:
+                    for threshold in thresholds:
+                        label = algorithm_label(threshold, base, variant)
+                        for num_threads in threads:
+                            for run in range(runs):
+                                cell = (n, threshold, run + 1)
+                                tags = (label, num_threads, distribution, 'int32', 4,
+                                        BATCH_MEASUREMENT if precise else SINGLE_MEASUREMENT,
+                                        buffer_mode(reuse_buffers, prefault, hugepages))
+                                if counters:
+                                    times, values = self.test_sort_counters(original, threshold, base, variant)
+                                    rows.append(cell + times + tags + values)
+                                elif precise:
+                                    times, cycles, batch = self.test_sort_precise(original, threshold, base,
+                                                                                  variant, warmup, min_time)
+                                    rows.append(cell + times + tags + (cycles, batch))
+                                elif buffers is None:
+                                    times = self.test_sort(original, threshold, base, variant, num_threads)
+                                    rows.append(cell + times + tags)
+                                else:
+                                    times = self.test_sort_buffers(original, buffers, threshold, base,
+                                                                   variant, num_threads)
+                                    rows.append(cell + times + tags + (buffers.first_touch_time,))
+                finally:
+                    if buffers is not None:
+                        self.release(buffers)
+
+        columns = RAW_COLUMNS.copy()
+        if reuse_buffers:
+            columns.append('TempoPrimeiroAcesso')
+        if counters:
+            columns += COUNTER_COLUMNS + [COUNTER_COVERAGE]
+        if precise:
+            columns += PRECISE_COLUMNS
+        return pd.DataFrame(rows, columns=columns)
+
+    def _typed_sweep(self, sizes, thresholds, runs, base, distributions, seed, element):
+        """Grade de sweep() para outros tipos de elemento."""
+        element_bytes = ELEMENT_TYPES[element][1].itemsize
+        rows = []
+        for distribution in distributions:
+            for n in sizes:
+                original = make_elements(open_dataset(distribution, n, seed), element)
+                for threshold in thresholds:
+                    label = algorithm_label(threshold, base)
+                    for run in range(runs):
+                        times = self.test_sort_typed(original, element, threshold, base)
+                        rows.append((n, threshold, run + 1) + times
+                                    + (label, 1, distribution, element, element_bytes, SINGLE_MEASUREMENT,
+                                       MALLOC_BUFFERS))
+        return pd.DataFrame(rows, columns=RAW_COLUMNS)
+
+####################################################################
+####################################################################
+# --- Gravação dos resultados das variantes ---
+####################################################################
+####################################################################
+
+def save_results(df_new, directory='.'):
+    """
+    Acrescenta execuções ao 'variantes-raw_times.csv' e regera o
+    'variantes-summary_results.csv' (agrupado também por 'Algoritmo').
+    """
+    raw_path = os.path.join(directory, VARIANTS_RAW)
+    if os.path.exists(raw_path):
+        df_new = pd.concat([read_csv_typed(raw_path), df_new], ignore_index=True)
+        # Execuções gravadas antes de uma coluna existir usam o valor padrão dela
+        df_new = df_new.fillna(BASELINE).astype({'Threads': np.int32, 'TamanhoElemento': np.int32})
+    if 'Lote' in df_new.columns:
+        df_new['Lote'] = df_new['Lote'].astype('Int64')
+    # Nanossegundos: com --precise, ordenações pequenas duram menos de 1 µs
+    df_new.to_csv(raw_path, index=False, float_format='%.9f')
+
+    summary_path = os.path.join(directory, VARIANTS_SUMMARY)
+    aggregate_raw(raw_path).to_csv(summary_path, index=False, float_format='%.9f')
+    print(f"Resultados salvos em '{raw_path}' e '{summary_path}'.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Executa variantes do Merge Sort pela biblioteca compartilhada.")
+    parser.add_argument('--base', choices=sorted(BASE_CASES), default='insertion', help="Caso base do híbrido.")
+    parser.add_argument('--variant', choices=sorted(VARIANTS), default='topdown', help="Variante do Merge Sort.")
+    parser.add_argument('--sizes', type=int, nargs='+', required=True, help="Tamanhos de entrada.")
+    parser.add_argument('--thresholds', type=int, nargs='+', required=True, help="Thresholds (-1 = Merge puro).")
+    parser.add_argument('--threads', type=int, nargs='+', default=[1], help="Números de threads a testar.")
+    parser.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS, default=[RANDOM_INPUT],
+                        help="Distribuições da entrada.")
+    parser.add_argument('--element', choices=list(ELEMENT_TYPES), default='int32',
+                        help="Tipo de elemento (chave int32/int64/double ou registros de 16/32/64 bytes).")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Semente das entradas (datasets.py).")
+    parser.add_argument('--runs', type=int, default=50, help="Execuções por célula.")
+    parser.add_argument('--reuse-buffers', action='store_true', help="Aloca os buffers uma vez por tamanho.")
+    parser.add_argument('--no-prefault', action='store_true',
+                        help="Não toca as páginas dos buffers antes da primeira execução (com --reuse-buffers).")
+    parser.add_argument('--hugepages', action='store_true',
+                        help="Pede huge pages para os buffers com madvise (com --reuse-buffers).")
+    parser.add_argument('--counters', action='store_true',
+                        help="Mede ciclos, instruções, falhas de desvio/cache e page faults (perf_event_open).")
+    parser.add_argument('--precise', action='store_true',
+                        help="Alta resolução: lotes calibrados, aquecimento e tempos em nanossegundos.")
+    parser.add_argument('--warmup', type=int, default=PRECISE_WARMUP,
+                        help="Lotes de aquecimento descartados (com --precise).")
+    parser.add_argument('--min-time', type=float, default=PRECISE_MIN_TIME,
+                        help="Duração mínima (s) de um lote medido (com --precise).")
+    parser.add_argument('--mem-gb', type=float, default=None,
+                        help="Limite de memória; tamanhos maiores usam a ordenação externa.")
+    parser.add_argument('--dir', default='.', help="Pasta onde os CSVs são gravados.")
+    args = parser.parse_args()
+    if (args.no_prefault or args.hugepages) and not args.reuse_buffers:
+        parser.error("--no-prefault e --hugepages só valem com --reuse-buffers")
+
+    df = Harness().sweep(args.sizes, args.thresholds, args.runs, args.base, args.variant, args.threads,
+                         args.distributions, args.seed, reuse_buffers=args.reuse_buffers,
+                         prefault=not args.no_prefault, hugepages=args.hugepages,
+                         mem_limit=int(args.mem_gb * 1024 ** 3) if args.mem_gb else None, element=args.element,
+                         counters=args.counters, precise=args.precise, warmup=args.warmup,
+                         min_time=args.min_time)
+    save_results(df, args.dir)
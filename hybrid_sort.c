@@ -0,0 +1,1508 @@
+#include <limits.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include <fcntl.h>
+#include <sys/ioctl.h>
+#include <sys/mman.h>
+#include <sys/syscall.h>
+#include <unistd.h>
+#ifdef __linux__
+#include <linux/perf_event.h>
+#endif
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#if defined(__x86_64__) || defined(__i386__)
+#include <x86intrin.h>
+#endif
+
+// Biblioteca compartilhada com o Merge Sort puro e o híbrido, usada pelo harness.py.
+// O caso base do híbrido (enum BaseCase) e a variante do Merge Sort (enum SortVariant)
+// são escolhidos em tempo de execução, então novos casos base e variantes não
+// exigem outra cópia do arquivo.
+//
+// Compilar (sem -fopenmp, só execuções com 1 thread são aceitas):
+// gcc -O2 -fopenmp -shared -fPIC -o build/libhybridsort.so hybrid_sort.c
+
+// --- Casos base disponíveis ---
+typedef enum
+{
+    BASE_BUBBLE = 0,
+    BASE_INSERTION = 1,
+    BASE_BINARY_INSERTION = 2,     // insertion com busca binária da posição + memmove
+    BASE_BRANCHLESS_INSERTION = 3, // insertion sem desvios dependentes dos dados
+    BASE_NETWORK = 4,              // rede de ordenação do tamanho do subvetor (até 16 elementos)
+    NUM_BASE_CASES
+} BaseCase;
+
+typedef void (*BaseSortFn)(int *array, int left, int right);
+
+// --- Variantes do Merge Sort (puro e híbrido) ---
+typedef enum
+{
+    VARIANT_TOPDOWN = 0,  // recursivo, copia array -> temp em cada merge()
+    VARIANT_PINGPONG = 1, // recursivo, alterna origem/destino entre os níveis
+    VARIANT_BOTTOMUP = 2, // iterativo: blocos de THRESHOLD + merges de largura dobrando
+    VARIANT_BOTTOMUP_L1 = 3, // bottom-up, ordenando por completo blocos que cabem na L1
+    VARIANT_BOTTOMUP_L2 = 4, // bottom-up, ordenando por completo blocos que cabem na L2
+    VARIANT_ADAPTIVE = 5,    // runs naturais (estilo TimSort), aproveita a ordem já existente
+    NUM_VARIANTS
+} SortVariant;
+
+// --- Estrutura para retorno de tempos ---
+typedef struct
+{
+    double cpu_time;
+    double wall_time;
+} TimeResult;
+
+// --- Buffers reutilizáveis (alocados uma vez por tamanho) ---
+typedef struct
+{
+    int *array;
+    int *temp;
+    int n;
+    double first_touch_time; // tempo (s) para tocar todas as páginas pela 1ª vez
+} SortBuffers;
+
+// Opções de buffers_init
+#define BUFFER_PREFAULT 1  // toca todas as páginas antes das execuções
+#define BUFFER_HUGEPAGES 2 // alinha em 2 MiB e pede huge pages (madvise)
+
+#define HUGE_PAGE_SIZE (2 * 1024 * 1024)
+
+// Abaixo destes tamanhos o trabalho segue sequencial (criar tarefas custa mais)
+#define PARALLEL_SORT_CUTOFF 65536
+#define PARALLEL_MERGE_CUTOFF 65536
+#define PARALLEL_COPY_CHUNK 262144
+
+// Pilha de runs do modo adaptativo: com a invariante de merge_collapse, os tamanhos
+// crescem pelo menos como Fibonacci, então 2^31 elementos usam bem menos que isso
+#define MAX_RUNS 128
+
+// Ordenação externa: elementos por escrita do arquivo de saída (4 MiB)
+#define EXTERNAL_OUT_BUFFER (1 << 20)
+// Cada run ocupa um mapeamento na 2ª fase (o kernel limita em vm.max_map_count),
+// então blocos muito pequenos são aumentados até caberem neste número de runs
+#define EXTERNAL_MAX_RUNS 4096
+
+// Tamanhos de cache usados se o sysconf não informar (valores típicos de x86)
+#define DEFAULT_L1_SIZE (32 * 1024)
+#define DEFAULT_L2_SIZE (1024 * 1024)
+
+// --- Função Bubble Sort ---
+void bubbleSort(int *array, int left, int right)
+{
+    for (int i = left; i <= right; i++)
+    {
+        for (int j = left; j < right - (i - left); j++)
+        {
+            if (array[j] > array[j + 1])
+            {
+                int tmp = array[j];
+                array[j] = array[j + 1];
+                array[j + 1] = tmp;
+            }
+        }
+    }
+}
+
+// Insertion Sort para subvetores pequenos
+void insertionSort(int *array, int left, int right)
+{
+    for (int i = left + 1; i <= right; i++)
+    {
+        int key = array[i];
+        int j = i - 1;
+        while (j >= left && array[j] > key)
+        {
+            array[j + 1] = array[j];
+            j--;
+        }
+        array[j + 1] = key;
+    }
+}
+
+// Insertion Sort com busca binária: menos comparações, mesmo número de movimentações
+void binaryInsertionSort(int *array, int left, int right)
+{
+    for (int i = left + 1; i <= right; i++)
+    {
+        int key = array[i];
+        int lo = left, hi = i;
+        // Primeira posição com valor > key (mantém a estabilidade)
+        while (lo < hi)
+        {
+            int mid = lo + (hi - lo) / 2;
+            if (array[mid] <= key)
+                lo = mid + 1;
+            else
+                hi = mid;
+        }
+        memmove(&array[lo + 1], &array[lo], (size_t)(i - lo) * sizeof(int));
+        array[lo] = key;
+    }
+}
+
+// Insertion Sort "branchless": percorre sempre o prefixo inteiro e desloca os
+// maiores que key com seleção condicional (cmov), sem desvios mal previstos.
+void branchlessInsertionSort(int *array, int left, int right)
+{
+    for (int i = left + 1; i <= right; i++)
+    {
+        int key = array[i];
+        int pos = i;
+        for (int j = i - 1; j >= left; j--)
+        {
+            int prev = array[j];
+            int greater = prev > key;
+            array[j + 1] = greater ? prev : array[j + 1];
+            pos -= greater;
+        }
+        array[pos] = key;
+    }
+}
+
+// Redes de ordenação para 2 a 16 entradas, uma por tamanho: a rede de n entradas
+// são os comparadores da odd-even merge (Batcher) de 16 entradas que só tocam
+// posições < n, sem os redundantes (conferido pelo princípio 0-1 para todas as
+// 2^n entradas binárias). De 2 a 8 entradas, o número de comparadores é o ótimo.
+#define NETWORK_MAX_SIZE 16
+static const unsigned char network_comparators[][2] = {
+    // n = 2: 1 comparador
+    {0, 1},
+    // n = 3: 3 comparadores
+    {0, 1}, {0, 2}, {1, 2},
+    // n = 4: 5 comparadores
+    {0, 1}, {2, 3}, {0, 2}, {1, 3}, {1, 2},
+    // n = 5: 9 comparadores
+    {0, 1}, {2, 3}, {0, 2}, {1, 3}, {1, 2}, {0, 4}, {2, 4}, {1, 2}, {3, 4},
+    // n = 6: 12 comparadores
+    {0, 1}, {2, 3}, {4, 5}, {0, 2}, {1, 3}, {1, 2}, {0, 4}, {1, 5}, {2, 4}, {3, 5}, {1, 2}, {3, 4},
+    // n = 7: 16 comparadores
+    {0, 1}, {2, 3}, {4, 5}, {0, 2}, {1, 3}, {4, 6}, {1, 2}, {5, 6}, {0, 4}, {1, 5}, {2, 6}, {2, 4},
+    {3, 5}, {1, 2}, {3, 4}, {5, 6},
+    // n = 8: 19 comparadores
+    {0, 1}, {2, 3}, {4, 5}, {6, 7}, {0, 2}, {1, 3}, {4, 6}, {5, 7}, {1, 2}, {5, 6}, {0, 4}, {1, 5},
+    {2, 6}, {3, 7}, {2, 4}, {3, 5}, {1, 2}, {3, 4}, {5, 6},
+    // n = 9: 27 comparadores
+    {0, 1}, {2, 3}, {4, 5}, {6, 7}, {0, 2}, {1, 3}, {4, 6}, {5, 7}, {1, 2}, {5, 6}, {0, 4}, {1, 5},
+    {2, 6}, {3, 7}, {2, 4}, {3, 5}, {1, 2}, {3, 4}, {5, 6}, {0, 8}, {4, 8}, {2, 4}, {6, 8}, {1, 2},
+    {3, 4}, {5, 6}, {7, 8},
+    // n = 10: 32 comparadores
+    {0, 1}, {2, 3}, {4, 5}, {6, 7}, {8, 9}, {0, 2}, {1, 3}, {4, 6}, {5, 7}, {1, 2}, {5, 6}, {0, 4},
+    {1, 5}, {2, 6}, {3, 7}, {2, 4}, {3, 5}, {1, 2}, {3, 4}, {5, 6}, {0, 8}, {1, 9}, {4, 8}, {5, 9},
+    {2, 4}, {3, 5}, {6, 8}, {7, 9}, {1, 2}, {3, 4}, {5, 6}, {7, 8},
+    // n = 11: 37 comparadores
+    {0, 1}, {2, 3}, {4, 5}, {6, 7}, {8, 9}, {0, 2}, {1, 3}, {4, 6}, {5, 7}, {8, 10}, {1, 2}, {5, 6},
+    {9, 10}, {0, 4}, {1, 5}, {2, 6}, {3, 7}, {2, 4}, {3, 5}, {1, 2}, {3, 4}, {5, 6}, {0, 8}, {1, 9},
+    {2, 10}, {4, 8}, {5, 9}, {6, 10}, {2, 4}, {3, 5}, {6, 8}, {7, 9}, {1, 2}, {3, 4}, {5, 6},
+    {7, 8}, {9, 10},
+    // n = 12: 41 comparadores
+    {0, 1}, {2, 3}, {4, 5}, {6, 7}, {8, 9}, {10, 11}, {0, 2}, {1, 3}, {4, 6}, {5, 7}, {8, 10},
+    {9, 11}, {1, 2}, {5, 6}, {9, 10}, {0, 4}, {1, 5}, {2, 6}, {3, 7}, {2, 4}, {3, 5}, {1, 2},
+    {3, 4}, {5, 6}, {0, 8}, {1, 9}, {2, 10}, {3, 11}, {4, 8}, {5, 9}, {6, 10}, {7, 11}, {2, 4},
+    {3, 5}, {6, 8}, {7, 9}, {1, 2}, {3, 4}, {5, 6}, {7, 8}, {9, 10},
+    // n = 13: 48 comparadores
+    {0, 1}, {2, 3}, {4, 5}, {6, 7}, {8, 9}, {10, 11}, {0, 2}, {1, 3}, {4, 6}, {5, 7}, {8, 10},
+    {9, 11}, {1, 2}, {5, 6}, {9, 10}, {0, 4}, {1, 5}, {2, 6}, {3, 7}, {8, 12}, {2, 4}, {3, 5},
+    {10, 12}, {1, 2}, {3, 4}, {5, 6}, {9, 10}, {11, 12}, {0, 8}, {1, 9}, {2, 10}, {3, 11}, {4, 12},
+    {4, 8}, {5, 9}, {6, 10}, {7, 11}, {2, 4}, {3, 5}, {6, 8}, {7, 9}, {10, 12}, {1, 2}, {3, 4},
+    {5, 6}, {7, 8}, {9, 10}, {11, 12},
+    // n = 14: 53 comparadores
+    {0, 1}, {2, 3}, {4, 5}, {6, 7}, {8, 9}, {10, 11}, {12, 13}, {0, 2}, {1, 3}, {4, 6}, {5, 7},
+    {8, 10}, {9, 11}, {1, 2}, {5, 6}, {9, 10}, {0, 4}, {1, 5}, {2, 6}, {3, 7}, {8, 12}, {9, 13},
+    {2, 4}, {3, 5}, {10, 12}, {11, 13}, {1, 2}, {3, 4}, {5, 6}, {9, 10}, {11, 12}, {0, 8}, {1, 9},
+    {2, 10}, {3, 11}, {4, 12}, {5, 13}, {4, 8}, {5, 9}, {6, 10}, {7, 11}, {2, 4}, {3, 5}, {6, 8},
+    {7, 9}, {10, 12}, {11, 13}, {1, 2}, {3, 4}, {5, 6}, {7, 8}, {9, 10}, {11, 12},
+    // n = 15: 59 comparadores
+    {0, 1}, {2, 3}, {4, 5}, {6, 7}, {8, 9}, {10, 11}, {12, 13}, {0, 2}, {1, 3}, {4, 6}, {5, 7},
+    {8, 10}, {9, 11}, {12, 14}, {1, 2}, {5, 6}, {9, 10}, {13, 14}, {0, 4}, {1, 5}, {2, 6}, {3, 7},
+    {8, 12}, {9, 13}, {10, 14}, {2, 4}, {3, 5}, {10, 12}, {11, 13}, {1, 2}, {3, 4}, {5, 6}, {9, 10},
+    {11, 12}, {13, 14}, {0, 8}, {1, 9}, {2, 10}, {3, 11}, {4, 12}, {5, 13}, {6, 14}, {4, 8}, {5, 9},
+    {6, 10}, {7, 11}, {2, 4}, {3, 5}, {6, 8}, {7, 9}, {10, 12}, {11, 13}, {1, 2}, {3, 4}, {5, 6},
+    {7, 8}, {9, 10}, {11, 12}, {13, 14},
+    // n = 16: 63 comparadores
+    {0, 1}, {2, 3}, {4, 5}, {6, 7}, {8, 9}, {10, 11}, {12, 13}, {14, 15}, {0, 2}, {1, 3}, {4, 6},
+    {5, 7}, {8, 10}, {9, 11}, {12, 14}, {13, 15}, {1, 2}, {5, 6}, {9, 10}, {13, 14}, {0, 4}, {1, 5},
+    {2, 6}, {3, 7}, {8, 12}, {9, 13}, {10, 14}, {11, 15}, {2, 4}, {3, 5}, {10, 12}, {11, 13},
+    {1, 2}, {3, 4}, {5, 6}, {9, 10}, {11, 12}, {13, 14}, {0, 8}, {1, 9}, {2, 10}, {3, 11}, {4, 12},
+    {5, 13}, {6, 14}, {7, 15}, {4, 8}, {5, 9}, {6, 10}, {7, 11}, {2, 4}, {3, 5}, {6, 8}, {7, 9},
+    {10, 12}, {11, 13}, {1, 2}, {3, 4}, {5, 6}, {7, 8}, {9, 10}, {11, 12}, {13, 14},
+};
+
+// Comparadores da rede de n entradas: network_comparators[network_start[n] .. network_start[n + 1])
+static const unsigned short network_start[NETWORK_MAX_SIZE + 2] = {0, 0, 0, 1, 4, 9, 18, 30, 46, 65, 92, 124, 161, 202, 250, 303, 362, 425};
+
+// Caso base com a rede do tamanho exato do subvetor (até NETWORK_MAX_SIZE elementos;
+// valid_config recusa THRESHOLD maior com este caso base).
+void networkSort(int *array, int left, int right)
+{
+    int *items = &array[left];
+    int n = right - left + 1;
+    for (int c = network_start[n]; c < network_start[n + 1]; c++)
+    {
+        int a = items[network_comparators[c][0]], b = items[network_comparators[c][1]];
+        items[network_comparators[c][0]] = a < b ? a : b;
+        items[network_comparators[c][1]] = a < b ? b : a;
+    }
+}
+
+// Tabela de casos base, indexada por BaseCase
+static const BaseSortFn base_sorts[NUM_BASE_CASES] = {
+    [BASE_BUBBLE] = bubbleSort,
+    [BASE_INSERTION] = insertionSort,
+    [BASE_BINARY_INSERTION] = binaryInsertionSort,
+    [BASE_BRANCHLESS_INSERTION] = branchlessInsertionSort,
+    [BASE_NETWORK] = networkSort,
+};
+
+// --- Merge Sort ---
+void merge(int *array, int *temp, int left, int mid, int right)
+{
+    int i = left, j = mid + 1, k = left;
+    for (int l = left; l <= right; l++)
+        temp[l] = array[l];
+
+    while (i <= mid && j <= right)
+    {
+        if (temp[i] <= temp[j])
+            array[k++] = temp[i++];
+        else
+            array[k++] = temp[j++];
+    }
+
+    while (i <= mid)
+        array[k++] = temp[i++];
+    while (j <= right)
+        array[k++] = temp[j++];
+}
+
+void mergeSort(int *array, int *temp, int left, int right)
+{
+    if (left < right)
+    {
+        int mid = left + (right - left) / 2;
+        mergeSort(array, temp, left, mid);
+        mergeSort(array, temp, mid + 1, right);
+        merge(array, temp, left, mid, right);
+    }
+}
+
+// --- Merge Sort híbrido (caso base por ponteiro de função) ---
+static void hybridSortFn(int *array, int *temp, int left, int right, int threshold, BaseSortFn base)
+{
+    if (right - left + 1 <= threshold)
+    {
+        base(array, left, right);
+    }
+    else if (left < right)
+    {
+        int mid = left + (right - left) / 2;
+        hybridSortFn(array, temp, left, mid, threshold, base);
+        hybridSortFn(array, temp, mid + 1, right, threshold, base);
+        merge(array, temp, left, mid, right);
+    }
+}
+
+// Retorna 0 em caso de sucesso e -1 se o caso base for inválido
+int hybridSort(int *array, int *temp, int left, int right, int threshold, int base_case)
+{
+    if (base_case < 0 || base_case >= NUM_BASE_CASES)
+        return -1;
+    hybridSortFn(array, temp, left, right, threshold, base_sorts[base_case]);
+    return 0;
+}
+
+// --- Merge Sort "ping-pong" ---
+// Mescla src[left..mid] e src[mid+1..right] diretamente em dst (sem cópia prévia)
+static void mergeInto(const int *src, int *dst, int left, int mid, int right)
+{
+    int i = left, j = mid + 1, k = left;
+
+    while (i <= mid && j <= right)
+    {
+        if (src[i] <= src[j])
+            dst[k++] = src[i++];
+        else
+            dst[k++] = src[j++];
+    }
+
+    while (i <= mid)
+        dst[k++] = src[i++];
+    while (j <= right)
+        dst[k++] = src[j++];
+}
+
+// Ordena o intervalo deixando o resultado em dst. As metades são ordenadas em src
+// (papéis trocados a cada nível) e depois mescladas em dst. Pré-condição: src e dst
+// têm o mesmo conteúdo no intervalo, então o caso base pode ordenar direto em dst.
+static void pingPongSplit(int *src, int *dst, int left, int right, int threshold, BaseSortFn base)
+{
+    if (left >= right)
+        return;
+
+    if (right - left + 1 <= threshold)
+    {
+        base(dst, left, right);
+        return;
+    }
+
+    int mid = left + (right - left) / 2;
+    pingPongSplit(dst, src, left, mid, threshold, base);
+    pingPongSplit(dst, src, mid + 1, right, threshold, base);
+    mergeInto(src, dst, left, mid, right);
+}
+
+// Uma única cópia array -> temp no início, em vez de uma cópia por merge.
+// threshold == -1 executa o Merge Sort puro (recursão até n=1).
+static void pingPongSort(int *array, int *temp, int left, int right, int threshold, BaseSortFn base)
+{
+    memcpy(temp + left, array + left, (size_t)(right - left + 1) * sizeof(int));
+    pingPongSplit(temp, array, left, right, threshold, base);
+}
+
+// Retorna 0 em caso de sucesso e -1 se o caso base for inválido
+int hybridSortPingPong(int *array, int *temp, int left, int right, int threshold, int base_case)
+{
+    if (base_case < 0 || base_case >= NUM_BASE_CASES)
+        return -1;
+    pingPongSort(array, temp, left, right, threshold, base_sorts[base_case]);
+    return 0;
+}
+
+// --- Merge Sort bottom-up (iterativo) ---
+// Mescla runs já ordenados de 'width' elementos, dobrando a largura a cada passada.
+// Alterna array/temp como origem e destino; o resultado final volta para array.
+static void bottomUpMergePasses(int *array, int *temp, long n, long width)
+{
+    int *src = array, *dst = temp;
+
+    for (; width < n; width *= 2)
+    {
+        for (long left = 0; left < n; left += 2 * width)
+        {
+            long mid = left + width - 1;
+            long right = left + 2 * width - 1;
+            if (mid >= n - 1)
+            {
+                // Run sem par nesta passada: só copia para o destino
+                memcpy(dst + left, src + left, (size_t)(n - left) * sizeof(int));
+                continue;
+            }
+            if (right > n - 1)
+                right = n - 1;
+            mergeInto(src, dst, (int)left, (int)mid, (int)right);
+        }
+        int *swap = src;
+        src = dst;
+        dst = swap;
+    }
+
+    if (src != array)
+        memcpy(array, src, (size_t)n * sizeof(int));
+}
+
+// Número de elementos por bloco de cache: array e temp do bloco precisam caber juntos.
+// Arredondado para run * 2^k, para que os merges dentro do bloco fiquem balanceados.
+static long cache_block(int variant, long run)
+{
+    long bytes = 0;
+#ifdef _SC_LEVEL1_DCACHE_SIZE
+    bytes = sysconf(variant == VARIANT_BOTTOMUP_L1 ? _SC_LEVEL1_DCACHE_SIZE : _SC_LEVEL2_CACHE_SIZE);
+#endif
+    if (bytes <= 0)
+        bytes = variant == VARIANT_BOTTOMUP_L1 ? DEFAULT_L1_SIZE : DEFAULT_L2_SIZE;
+
+    long elements = bytes / (long)(2 * sizeof(int));
+    long block = run;
+    while (2 * block <= elements)
+        block *= 2;
+    return block;
+}
+
+// Ordena blocos de exatamente THRESHOLD elementos (só o último pode ser menor) com o
+// caso base e depois mescla de baixo para cima. Com 'block' < n, cada bloco de cache
+// é ordenado por completo antes do próximo, e só então os blocos são mesclados.
+// threshold == -1 executa o Merge Sort bottom-up puro (runs de 1 elemento).
+static void bottomUpSort(int *array, int *temp, long n, int threshold, BaseSortFn base, long block)
+{
+    long run = threshold > 1 ? threshold : 1;
+    if (block < run)
+        block = run;
+
+    for (long start = 0; start < n; start += block)
+    {
+        long len = block < n - start ? block : n - start;
+        if (run > 1)
+        {
+            for (long left = 0; left < len; left += run)
+            {
+                long right = left + run - 1 < len - 1 ? left + run - 1 : len - 1;
+                base(array + start, (int)left, (int)right);
+            }
+        }
+        bottomUpMergePasses(array + start, temp + start, len, run);
+    }
+
+    bottomUpMergePasses(array, temp, n, block);
+}
+
+// --- Merge Sort adaptativo (runs naturais) ---
+static void reverseRange(int *array, long lo, long hi)
+{
+    while (lo < hi)
+    {
+        int tmp = array[lo];
+        array[lo++] = array[hi];
+        array[hi--] = tmp;
+    }
+}
+
+// Tamanho do run que começa em lo (até hi, exclusivo). Runs estritamente
+// decrescentes são invertidos, então o run retornado está sempre em ordem crescente.
+static long naturalRun(int *array, long lo, long hi)
+{
+    long run_hi = lo + 1;
+    if (run_hi == hi)
+        return 1;
+
+    if (array[run_hi++] < array[lo])
+    {
+        while (run_hi < hi && array[run_hi] < array[run_hi - 1])
+            run_hi++;
+        reverseRange(array, lo, run_hi - 1);
+    }
+    else
+    {
+        while (run_hi < hi && array[run_hi] >= array[run_hi - 1])
+            run_hi++;
+    }
+    return run_hi - lo;
+}
+
+// Mescla os runs i e i+1 da pilha. Se o último do 1º run já é <= ao primeiro do 2º,
+// os dois juntos já estão ordenados e o merge é pulado.
+static void mergeAt(int *array, int *temp, long *run_start, long *run_len, int *num_runs, int i)
+{
+    long left = run_start[i];
+    long mid = left + run_len[i] - 1;
+    long right = mid + run_len[i + 1];
+    if (array[mid] > array[mid + 1])
+        merge(array, temp, (int)left, (int)mid, (int)right);
+
+    run_len[i] += run_len[i + 1];
+    if (i == *num_runs - 3)
+    {
+        run_start[i + 1] = run_start[i + 2];
+        run_len[i + 1] = run_len[i + 2];
+    }
+    (*num_runs)--;
+}
+
+// Mantém a invariante da pilha (versão corrigida do TimSort): cada run é maior que
+// a soma dos dois acima dele, o que deixa os merges balanceados.
+static void mergeCollapse(int *array, int *temp, long *run_start, long *run_len, int *num_runs)
+{
+    while (*num_runs > 1)
+    {
+        int i = *num_runs - 2;
+        if ((i > 0 && run_len[i - 1] <= run_len[i] + run_len[i + 1]) ||
+            (i > 1 && run_len[i - 2] <= run_len[i - 1] + run_len[i]))
+        {
+            if (run_len[i - 1] < run_len[i + 1])
+                i--;
+        }
+        else if (run_len[i] > run_len[i + 1])
+        {
+            break;
+        }
+        mergeAt(array, temp, run_start, run_len, num_runs, i);
+    }
+}
+
+// Encontra os runs naturais (crescentes ou decrescentes); runs menores que THRESHOLD
+// são estendidos até THRESHOLD elementos com o caso base. threshold == -1 usa só os
+// runs naturais, sem estender.
+static void adaptiveSort(int *array, int *temp, long n, int threshold, BaseSortFn base)
+{
+    long min_run = threshold > 1 ? threshold : 1;
+    long run_start[MAX_RUNS], run_len[MAX_RUNS];
+    int num_runs = 0;
+
+    for (long lo = 0; lo < n;)
+    {
+        long len = naturalRun(array, lo, n);
+        if (len < min_run)
+        {
+            len = min_run < n - lo ? min_run : n - lo;
+            base(array, (int)lo, (int)(lo + len - 1));
+        }
+
+        run_start[num_runs] = lo;
+        run_len[num_runs] = len;
+        num_runs++;
+        mergeCollapse(array, temp, run_start, run_len, &num_runs);
+        lo += len;
+    }
+
+    // Mescla o que sobrou na pilha
+    while (num_runs > 1)
+    {
+        int i = num_runs - 2;
+        if (i > 0 && run_len[i - 1] < run_len[i + 1])
+            i--;
+        mergeAt(array, temp, run_start, run_len, &num_runs, i);
+    }
+}
+
+// --- Escolha da variante ---
+static int valid_config(int threshold, int base_case, int variant, int threads)
+{
+    if (variant < 0 || variant >= NUM_VARIANTS)
+        return 0;
+#ifdef _OPENMP
+    if (threads < 1)
+        return 0;
+#else
+    if (threads != 1)
+        return 0;
+#endif
+    if (threshold == -1)
+        return 1;
+    if (base_case == BASE_NETWORK && threshold > NETWORK_MAX_SIZE)
+        return 0;
+    return base_case >= 0 && base_case < NUM_BASE_CASES;
+}
+
+static void run_sort(int *array, int *temp, int n, int threshold, int base_case, int variant)
+{
+    BaseSortFn base = threshold == -1 ? insertionSort : base_sorts[base_case];
+
+    switch (variant)
+    {
+    case VARIANT_PINGPONG:
+        pingPongSort(array, temp, 0, n - 1, threshold, base);
+        break;
+    case VARIANT_BOTTOMUP:
+        bottomUpSort(array, temp, n, threshold, base, n);
+        break;
+    case VARIANT_BOTTOMUP_L1:
+    case VARIANT_BOTTOMUP_L2:
+        bottomUpSort(array, temp, n, threshold, base, cache_block(variant, threshold > 1 ? threshold : 1));
+        break;
+    case VARIANT_ADAPTIVE:
+        adaptiveSort(array, temp, n, threshold, base);
+        break;
+    default:
+        if (threshold == -1)
+            mergeSort(array, temp, 0, n - 1);
+        else
+            hybridSortFn(array, temp, 0, n - 1, threshold, base);
+        break;
+    }
+}
+
+// --- Versão paralela (OpenMP tasks) ---
+#ifdef _OPENMP
+// Mescla src[a..a_end) e src[b..b_end) em dst a partir da posição k
+static void mergeRange(const int *src, long a, long a_end, long b, long b_end, int *dst, long k)
+{
+    while (a < a_end && b < b_end)
+        dst[k++] = src[a] <= src[b] ? src[a++] : src[b++];
+    while (a < a_end)
+        dst[k++] = src[a++];
+    while (b < b_end)
+        dst[k++] = src[b++];
+}
+
+// Primeira posição de src[lo..hi) com valor >= key
+static long lowerBound(const int *src, long lo, long hi, int key)
+{
+    while (lo < hi)
+    {
+        long mid = lo + (hi - lo) / 2;
+        if (src[mid] < key)
+            lo = mid + 1;
+        else
+            hi = mid;
+    }
+    return lo;
+}
+
+// Merge paralelo: o elemento do meio do run maior é posicionado via busca binária
+// no outro run, e as duas metades independentes são mescladas em tarefas separadas.
+static void parallelMerge(const int *src, long a, long a_end, long b, long b_end, int *dst, long k)
+{
+    if ((a_end - a) + (b_end - b) <= PARALLEL_MERGE_CUTOFF)
+    {
+        mergeRange(src, a, a_end, b, b_end, dst, k);
+        return;
+    }
+    if (a_end - a < b_end - b)
+    {
+        long swap = a;
+        a = b;
+        b = swap;
+        swap = a_end;
+        a_end = b_end;
+        b_end = swap;
+    }
+
+    long mid_a = a + (a_end - a) / 2;
+    long mid_b = lowerBound(src, b, b_end, src[mid_a]);
+    long k_mid = k + (mid_a - a) + (mid_b - b);
+    dst[k_mid] = src[mid_a];
+
+#pragma omp task
+    parallelMerge(src, a, mid_a, b, mid_b, dst, k);
+    parallelMerge(src, mid_a + 1, a_end, mid_b, b_end, dst, k_mid + 1);
+#pragma omp taskwait
+}
+
+// Divide os níveis de cima da recursão em tarefas; abaixo de 'depth' níveis (ou de
+// PARALLEL_SORT_CUTOFF elementos) cada pedaço é ordenado pela variante sequencial.
+static void parallelSortRange(int *array, int *temp, long left, long n, int threshold, int base_case,
+                              int variant, int depth)
+{
+    if (depth == 0 || n <= PARALLEL_SORT_CUTOFF)
+    {
+        run_sort(array + left, temp + left, (int)n, threshold, base_case, variant);
+        return;
+    }
+
+    long half = n / 2;
+#pragma omp task
+    parallelSortRange(array, temp, left, half, threshold, base_case, variant, depth - 1);
+    parallelSortRange(array, temp, left + half, n - half, threshold, base_case, variant, depth - 1);
+#pragma omp taskwait
+
+#pragma omp taskloop
+    for (long chunk = left; chunk < left + n; chunk += PARALLEL_COPY_CHUNK)
+    {
+        long len = left + n - chunk < PARALLEL_COPY_CHUNK ? left + n - chunk : PARALLEL_COPY_CHUNK;
+        memcpy(temp + chunk, array + chunk, (size_t)len * sizeof(int));
+    }
+    parallelMerge(temp, left, left + half, left + half, left + n, array, left);
+}
+#endif
+
+static void run_sort_threads(int *array, int *temp, int n, int threshold, int base_case, int variant,
+                             int threads)
+{
+    if (threads <= 1)
+    {
+        run_sort(array, temp, n, threshold, base_case, variant);
+        return;
+    }
+#ifdef _OPENMP
+    // Alguns níveis a mais que log2(threads), para balancear pedaços de custo diferente
+    int depth = 2;
+    for (int t = 1; t < threads; t *= 2)
+        depth++;
+
+#pragma omp parallel num_threads(threads)
+#pragma omp single
+    parallelSortRange(array, temp, 0, n, threshold, base_case, variant, depth);
+#endif
+}
+
+// Ordena array (temp com o mesmo tamanho) com qualquer variante e número de threads.
+// Retorna 0 em caso de sucesso e -1 para configuração inválida.
+int sort_array(int *array, int *temp, int n, int threshold, int base_case, int variant, int threads)
+{
+    if (!valid_config(threshold, base_case, variant, threads))
+        return -1;
+    run_sort_threads(array, temp, n, threshold, base_case, variant, threads);
+    return 0;
+}
+
+// --- Alocação única dos buffers de trabalho ---
+static double elapsed(struct timespec start, struct timespec end)
+{
+    return (end.tv_sec - start.tv_sec) + (end.tv_nsec - start.tv_nsec) / 1e9;
+}
+
+static int *alloc_buffer(size_t bytes, int flags)
+{
+    void *ptr = NULL;
+    if (flags & BUFFER_HUGEPAGES)
+    {
+        if (posix_memalign(&ptr, HUGE_PAGE_SIZE, bytes) != 0)
+            return NULL;
+#ifdef MADV_HUGEPAGE
+        madvise(ptr, bytes, MADV_HUGEPAGE);
+#endif
+    }
+    else
+    {
+        ptr = malloc(bytes);
+    }
+    return ptr;
+}
+
+void buffers_free(SortBuffers *buffers)
+{
+    free(buffers->array);
+    free(buffers->temp);
+    buffers->array = NULL;
+    buffers->temp = NULL;
+    buffers->n = 0;
+}
+
+// Retorna 0 em caso de sucesso e -2 se não houver memória.
+// Com BUFFER_PREFAULT, o custo do primeiro acesso (page faults) é medido
+// aqui e fica fora do tempo das ordenações.
+int buffers_init(SortBuffers *buffers, int n, int flags)
+{
+    size_t bytes = (size_t)n * sizeof(int);
+    buffers->n = n;
+    buffers->first_touch_time = 0.0;
+    buffers->array = alloc_buffer(bytes, flags);
+    buffers->temp = alloc_buffer(bytes, flags);
+    if (!buffers->array || !buffers->temp)
+    {
+        buffers_free(buffers);
+        return -2;
+    }
+
+    if (flags & BUFFER_PREFAULT)
+    {
+        struct timespec start, end;
+        clock_gettime(CLOCK_MONOTONIC, &start);
+        memset(buffers->array, 0, bytes);
+        memset(buffers->temp, 0, bytes);
+        clock_gettime(CLOCK_MONOTONIC, &end);
+        buffers->first_touch_time = elapsed(start, end);
+    }
+    return 0;
+}
+
+// --- Execução cronometrada sobre buffers já alocados ---
+// Só copia a entrada original para o buffer de trabalho; nenhuma alocação.
+// O tempo de CPU (clock()) soma todas as threads; o tempo real é o de relógio.
+int test_sort_buffers(const int *original, SortBuffers *buffers, int threshold, int base_case, int variant,
+                      int threads, TimeResult *result)
+{
+    if (!valid_config(threshold, base_case, variant, threads))
+        return -1;
+
+    int n = buffers->n;
+    memcpy(buffers->array, original, (size_t)n * sizeof(int));
+
+    struct timespec start_wall, end_wall;
+    clock_t start_cpu, end_cpu;
+
+    clock_gettime(CLOCK_MONOTONIC, &start_wall);
+    start_cpu = clock();
+
+    run_sort_threads(buffers->array, buffers->temp, n, threshold, base_case, variant, threads);
+
+    end_cpu = clock();
+    clock_gettime(CLOCK_MONOTONIC, &end_wall);
+
+    result->cpu_time = (double)(end_cpu - start_cpu) / CLOCKS_PER_SEC;
+    result->wall_time = elapsed(start_wall, end_wall);
+    return 0;
+}
+
+// --- Função de teste de uma execução ---
+// threshold == -1 executa o Merge Sort puro. Retorna 0 em caso de sucesso,
+// -1 para configuração inválida e -2 se não houver memória (sem exit(),
+// para não derrubar o processo Python que chamou a biblioteca).
+int test_sort(const int *original, int n, int threshold, int base_case, int variant, int threads,
+              TimeResult *result)
+{
+    if (!valid_config(threshold, base_case, variant, threads))
+        return -1;
+
+    // Modo original: aloca e libera os buffers a cada execução
+    SortBuffers buffers;
+    if (buffers_init(&buffers, n, 0) != 0)
+        return -2;
+
+    int status = test_sort_buffers(original, &buffers, threshold, base_case, variant, threads, result);
+    buffers_free(&buffers);
+    return status;
+}
+
+// --- Contadores de hardware (perf_event_open) ---
+// Os contadores de hardware formam um grupo cujo líder é o primeiro que abrir
+// (normalmente os ciclos): o kernel agenda o grupo inteiro de uma vez, então
+// ciclos, instruções e falhas são contados na mesma janela e as razões (IPC,
+// MPKI) são consistentes. Se o PMU multiplexar o grupo, as contagens são
+// escaladas por time_enabled / time_running e a fração fica em 'coverage'; se o
+// grupo não chegar a rodar, todos ficam como -1. Um contador que não existir na
+// CPU (ou que o perf_event_paranoid não permitir) fica fora do grupo, como -1.
+// As falhas de página (evento de software, nunca multiplexado) são abertas à parte.
+typedef enum
+{
+    COUNTER_CYCLES = 0,
+    COUNTER_INSTRUCTIONS = 1,
+    COUNTER_BRANCH_MISSES = 2,
+    COUNTER_L1D_MISSES = 3,
+    COUNTER_LLC_MISSES = 4,
+    COUNTER_PAGE_FAULTS = 5,
+    NUM_COUNTERS
+} Counter;
+
+typedef struct
+{
+    long long values[NUM_COUNTERS]; // -1 = contador indisponível
+    double coverage;                // time_running / time_enabled do grupo (-1 = sem grupo)
+} CounterResult;
+
+#ifdef __linux__
+// Abre um contador; com group_fd == -1 ele é líder (do grupo de hardware ou sozinho)
+static int open_counter(int counter, int group_fd)
+{
+    struct perf_event_attr attr;
+    memset(&attr, 0, sizeof(attr));
+    attr.size = sizeof(attr);
+    attr.exclude_hv = 1;
+    attr.exclude_kernel = 1;
+    attr.read_format = PERF_FORMAT_TOTAL_TIME_ENABLED | PERF_FORMAT_TOTAL_TIME_RUNNING;
+    if (group_fd == -1)
+    {
+        // Só o líder começa desligado: os membros seguem o ENABLE/DISABLE dele
+        attr.disabled = 1;
+        if (counter != COUNTER_PAGE_FAULTS)
+            attr.read_format |= PERF_FORMAT_GROUP;
+    }
+
+    switch (counter)
+    {
+    case COUNTER_CYCLES:
+        attr.type = PERF_TYPE_HARDWARE;
+        attr.config = PERF_COUNT_HW_CPU_CYCLES;
+        break;
+    case COUNTER_INSTRUCTIONS:
+        attr.type = PERF_TYPE_HARDWARE;
+        attr.config = PERF_COUNT_HW_INSTRUCTIONS;
+        break;
+    case COUNTER_BRANCH_MISSES:
+        attr.type = PERF_TYPE_HARDWARE;
+        attr.config = PERF_COUNT_HW_BRANCH_MISSES;
+        break;
+    case COUNTER_L1D_MISSES:
+        attr.type = PERF_TYPE_HW_CACHE;
+        attr.config = PERF_COUNT_HW_CACHE_L1D | (PERF_COUNT_HW_CACHE_OP_READ << 8) |
+                      (PERF_COUNT_HW_CACHE_RESULT_MISS << 16);
+        break;
+    case COUNTER_LLC_MISSES:
+        attr.type = PERF_TYPE_HARDWARE;
+        attr.config = PERF_COUNT_HW_CACHE_MISSES;
+        break;
+    default:
+        // Page faults são contadas pelo kernel: não dá para excluir o modo kernel
+        attr.type = PERF_TYPE_SOFTWARE;
+        attr.config = PERF_COUNT_SW_PAGE_FAULTS;
+        attr.exclude_kernel = 0;
+        break;
+    }
+    // Só a thread que chama (pid 0), em qualquer CPU (-1)
+    return (int)syscall(SYS_perf_event_open, &attr, 0, -1, group_fd, 0);
+}
+
+// Liga (enable = 1) ou desliga um líder e, com PERF_IOC_FLAG_GROUP, o seu grupo
+static void switch_counter(int fd, int enable)
+{
+    if (fd < 0)
+        return;
+    if (enable)
+    {
+        ioctl(fd, PERF_EVENT_IOC_RESET, PERF_IOC_FLAG_GROUP);
+        ioctl(fd, PERF_EVENT_IOC_ENABLE, PERF_IOC_FLAG_GROUP);
+    }
+    else
+        ioctl(fd, PERF_EVENT_IOC_DISABLE, PERF_IOC_FLAG_GROUP);
+}
+
+// Contagem escalada pela fração do tempo em que o evento foi contado (-1 se nunca rodou)
+static long long scaled_count(unsigned long long value, unsigned long long enabled, unsigned long long running)
+{
+    if (running == 0)
+        return -1;
+    if (running == enabled)
+        return (long long)value;
+    return (long long)((double)value * (double)enabled / (double)running + 0.5);
+}
+#else
+static int open_counter(int counter, int group_fd)
+{
+    (void)counter;
+    (void)group_fd;
+    return -1;
+}
+
+static void switch_counter(int fd, int enable)
+{
+    (void)fd;
+    (void)enable;
+}
+#endif
+
+// Como test_sort (1 thread), medindo também os contadores de hardware da ordenação.
+// Retorna 0, -1 (configuração inválida) ou -2 (sem memória).
+int test_sort_counters(const int *original, int n, int threshold, int base_case, int variant,
+                       TimeResult *result, CounterResult *counters)
+{
+    if (!valid_config(threshold, base_case, variant, 1))
+        return -1;
+
+    SortBuffers buffers;
+    if (buffers_init(&buffers, n, 0) != 0)
+        return -2;
+    memcpy(buffers.array, original, (size_t)n * sizeof(int));
+
+    // Grupo de hardware: 'slots' é a posição de cada contador na leitura do grupo
+    int fds[NUM_COUNTERS];
+    int slots[NUM_COUNTERS];
+    int leader = -1;
+    int members = 0;
+    for (int i = 0; i < COUNTER_PAGE_FAULTS; i++)
+    {
+        fds[i] = open_counter(i, leader);
+        slots[i] = -1;
+        if (fds[i] >= 0)
+        {
+            if (leader < 0)
+                leader = fds[i];
+            slots[i] = members++;
+        }
+    }
+    fds[COUNTER_PAGE_FAULTS] = open_counter(COUNTER_PAGE_FAULTS, -1);
+    slots[COUNTER_PAGE_FAULTS] = -1;
+
+    struct timespec start_wall, end_wall;
+    clock_t start_cpu, end_cpu;
+
+    switch_counter(leader, 1);
+    switch_counter(fds[COUNTER_PAGE_FAULTS], 1);
+    clock_gettime(CLOCK_MONOTONIC, &start_wall);
+    start_cpu = clock();
+
+    run_sort(buffers.array, buffers.temp, n, threshold, base_case, variant);
+
+    end_cpu = clock();
+    clock_gettime(CLOCK_MONOTONIC, &end_wall);
+    switch_counter(leader, 0);
+    switch_counter(fds[COUNTER_PAGE_FAULTS], 0);
+
+    result->cpu_time = (double)(end_cpu - start_cpu) / CLOCKS_PER_SEC;
+    result->wall_time = elapsed(start_wall, end_wall);
+
+    for (int i = 0; i < NUM_COUNTERS; i++)
+        counters->values[i] = -1;
+    counters->coverage = -1.0;
+
+#ifdef __linux__
+    // Leitura do grupo: nr, time_enabled, time_running e um valor por membro (na ordem de abertura)
+    if (leader >= 0)
+    {
+        unsigned long long group[3 + NUM_COUNTERS];
+        ssize_t expected = (ssize_t)((3 + members) * sizeof(unsigned long long));
+        if (read(leader, group, sizeof(group)) == expected && group[0] == (unsigned long long)members &&
+            group[1] > 0)
+        {
+            counters->coverage = (double)group[2] / (double)group[1];
+            for (int i = 0; i < COUNTER_PAGE_FAULTS; i++)
+                if (slots[i] >= 0)
+                    counters->values[i] = scaled_count(group[3 + slots[i]], group[1], group[2]);
+        }
+    }
+    if (fds[COUNTER_PAGE_FAULTS] >= 0)
+    {
+        unsigned long long single[3];
+        if (read(fds[COUNTER_PAGE_FAULTS], single, sizeof(single)) == sizeof(single))
+            counters->values[COUNTER_PAGE_FAULTS] = scaled_count(single[0], single[1], single[2]);
+    }
+#endif
+
+    for (int i = 0; i < NUM_COUNTERS; i++)
+        if (fds[i] >= 0)
+            close(fds[i]);
+
+    buffers_free(&buffers);
+    return 0;
+}
+
+// --- Cronometragem de alta resolução (lotes + aquecimento) ---
+// clock() tem resolução de microssegundos: ordenações de poucos elementos saem como 0.
+// Aqui a mesma entrada é ordenada em lotes (cópias preparadas fora da medição) até o
+// lote durar pelo menos min_time segundos, e o resultado é o tempo médio por ordenação.
+typedef struct
+{
+    double cpu_time;  // CLOCK_THREAD_CPUTIME_ID, por ordenação
+    double wall_time; // CLOCK_MONOTONIC, por ordenação
+    double cycles;    // ciclos do TSC por ordenação (-1 fora de x86)
+    long batch;       // ordenações por lote
+} PreciseResult;
+
+// Limite de elementos nas cópias de um lote (64 MiB de int)
+#define PRECISE_MAX_ELEMENTS (1L << 24)
+
+static long long read_tsc(void)
+{
+#if defined(__x86_64__) || defined(__i386__)
+    return (long long)__rdtsc();
+#else
+    return -1;
+#endif
+}
+
+// Ordena 'batch' cópias da entrada e mede o lote inteiro.
+static void time_batch(const int *original, int *copies, int *temp, int n, long batch, int threshold,
+                       int base_case, int variant, PreciseResult *result)
+{
+    for (long i = 0; i < batch; i++)
+        memcpy(copies + i * n, original, (size_t)n * sizeof(int));
+
+    struct timespec start_wall, end_wall, start_cpu, end_cpu;
+    clock_gettime(CLOCK_THREAD_CPUTIME_ID, &start_cpu);
+    clock_gettime(CLOCK_MONOTONIC, &start_wall);
+    long long start_tsc = read_tsc();
+
+    for (long i = 0; i < batch; i++)
+        run_sort(copies + i * n, temp, n, threshold, base_case, variant);
+
+    long long end_tsc = read_tsc();
+    clock_gettime(CLOCK_MONOTONIC, &end_wall);
+    clock_gettime(CLOCK_THREAD_CPUTIME_ID, &end_cpu);
+
+    result->cpu_time = elapsed(start_cpu, end_cpu);
+    result->wall_time = elapsed(start_wall, end_wall);
+    result->cycles = start_tsc < 0 ? -1.0 : (double)(end_tsc - start_tsc);
+    result->batch = batch;
+}
+
+// Uma execução cronometrada (1 thread) com lote calibrado e 'warmup' lotes descartados.
+// Retorna 0, -1 (configuração inválida) ou -2 (sem memória).
+int test_sort_precise(const int *original, int n, int threshold, int base_case, int variant, int warmup,
+                      double min_time, PreciseResult *result)
+{
+    if (!valid_config(threshold, base_case, variant, 1) || n < 1)
+        return -1;
+
+    long batch = 1;
+    int *copies = malloc((size_t)n * sizeof(int));
+    int *temp = malloc((size_t)n * sizeof(int));
+    if (!copies || !temp)
+    {
+        free(copies);
+        free(temp);
+        return -2;
+    }
+
+    // Calibração: dobra o lote até ele durar min_time (ou atingir o limite de memória)
+    time_batch(original, copies, temp, n, batch, threshold, base_case, variant, result);
+    while (result->wall_time < min_time && 2 * batch * n <= PRECISE_MAX_ELEMENTS)
+    {
+        int *larger = realloc(copies, (size_t)(2 * batch * n) * sizeof(int));
+        if (!larger)
+            break;
+        copies = larger;
+        batch *= 2;
+        time_batch(original, copies, temp, n, batch, threshold, base_case, variant, result);
+    }
+
+    // Aquecimento (caches, preditor de desvios, frequência da CPU): medido e descartado
+    for (int i = 0; i < warmup; i++)
+        time_batch(original, copies, temp, n, batch, threshold, base_case, variant, result);
+
+    time_batch(original, copies, temp, n, batch, threshold, base_case, variant, result);
+    result->cpu_time /= batch;
+    result->wall_time /= batch;
+    if (result->cycles >= 0)
+        result->cycles /= batch;
+
+    free(copies);
+    free(temp);
+    return 0;
+}
+
+// --- Ordenação externa (entradas maiores que a memória) ---
+// Entrada e saída são arquivos binários com n inteiros int32 (ver datasets.py).
+// Blocos de 'chunk' elementos são ordenados em memória com o híbrido, gravados como
+// runs em tmp_dir e depois mesclados (k-way, com um heap) a partir dos runs mapeados.
+typedef struct
+{
+    int value;
+    long run;
+} HeapItem;
+
+static void heapSiftDown(HeapItem *heap, long size, long i)
+{
+    for (;;)
+    {
+        long smallest = i, l = 2 * i + 1, r = 2 * i + 2;
+        if (l < size && heap[l].value < heap[smallest].value)
+            smallest = l;
+        if (r < size && heap[r].value < heap[smallest].value)
+            smallest = r;
+        if (smallest == i)
+            return;
+        HeapItem tmp = heap[i];
+        heap[i] = heap[smallest];
+        heap[smallest] = tmp;
+        i = smallest;
+    }
+}
+
+static int *mapReadOnly(const char *path, long n)
+{
+    int fd = open(path, O_RDONLY);
+    if (fd < 0)
+        return NULL;
+    void *data = mmap(NULL, (size_t)n * sizeof(int), PROT_READ, MAP_PRIVATE, fd, 0);
+    close(fd);
+    if (data == MAP_FAILED)
+        return NULL;
+#ifdef MADV_SEQUENTIAL
+    madvise(data, (size_t)n * sizeof(int), MADV_SEQUENTIAL);
+#endif
+    return data;
+}
+
+static void runPath(char *path, size_t size, const char *tmp_dir, long run)
+{
+    snprintf(path, size, "%s/run-%ld.int32", tmp_dir, run);
+}
+
+// 1ª fase: ordena cada bloco em memória e grava como um run. Retorna 0, -2 ou -3.
+static int writeRuns(const char *input_path, long n, long chunk, int threshold, int base_case, int variant,
+                     int threads, const char *tmp_dir)
+{
+    int *input = mapReadOnly(input_path, n);
+    if (!input)
+        return -3;
+
+    SortBuffers buffers;
+    if (buffers_init(&buffers, (int)(chunk < n ? chunk : n), 0) != 0)
+    {
+        munmap(input, (size_t)n * sizeof(int));
+        return -2;
+    }
+
+    int status = 0;
+    char path[4096];
+    for (long start = 0, run = 0; start < n && status == 0; start += chunk, run++)
+    {
+        long len = chunk < n - start ? chunk : n - start;
+        memcpy(buffers.array, input + start, (size_t)len * sizeof(int));
+        run_sort_threads(buffers.array, buffers.temp, (int)len, threshold, base_case, variant, threads);
+
+        runPath(path, sizeof(path), tmp_dir, run);
+        FILE *f = fopen(path, "wb");
+        if (!f || fwrite(buffers.array, sizeof(int), (size_t)len, f) != (size_t)len)
+            status = -3;
+        if (f && fclose(f) != 0)
+            status = -3;
+    }
+
+    buffers_free(&buffers);
+    munmap(input, (size_t)n * sizeof(int));
+    return status;
+}
+
+// 2ª fase: k-way merge dos runs mapeados em memória para o arquivo de saída.
+static int mergeRuns(const char *output_path, long n, long chunk, const char *tmp_dir)
+{
+    long num_runs = (n + chunk - 1) / chunk;
+    int **runs = calloc(num_runs, sizeof(int *));
+    long *pos = calloc(num_runs, sizeof(long));
+    HeapItem *heap = malloc(num_runs * sizeof(HeapItem));
+    int *out = malloc(EXTERNAL_OUT_BUFFER * sizeof(int));
+    FILE *f = fopen(output_path, "wb");
+    int status = (runs && pos && heap && out) ? 0 : -2;
+    if (status == 0 && !f)
+        status = -3;
+
+    char path[4096];
+    long heap_size = 0;
+    for (long r = 0; r < num_runs && status == 0; r++)
+    {
+        runPath(path, sizeof(path), tmp_dir, r);
+        runs[r] = mapReadOnly(path, chunk < n - r * chunk ? chunk : n - r * chunk);
+        if (!runs[r])
+            status = -3;
+        else
+            heap[heap_size++] = (HeapItem){runs[r][0], r};
+    }
+
+    if (status == 0)
+    {
+        for (long i = heap_size / 2 - 1; i >= 0; i--)
+            heapSiftDown(heap, heap_size, i);
+
+        long k = 0;
+        while (heap_size > 0 && status == 0)
+        {
+            long r = heap[0].run;
+            long run_len = chunk < n - r * chunk ? chunk : n - r * chunk;
+            out[k++] = heap[0].value;
+            if (++pos[r] < run_len)
+                heap[0].value = runs[r][pos[r]];
+            else
+                heap[0] = heap[--heap_size];
+            heapSiftDown(heap, heap_size, 0);
+
+            if (k == EXTERNAL_OUT_BUFFER || heap_size == 0)
+            {
+                if (fwrite(out, sizeof(int), (size_t)k, f) != (size_t)k)
+                    status = -3;
+                k = 0;
+            }
+        }
+    }
+
+    if (f && fclose(f) != 0 && status == 0)
+        status = -3;
+    for (long r = 0; runs && r < num_runs; r++)
+    {
+        if (runs[r])
+            munmap(runs[r], (size_t)(chunk < n - r * chunk ? chunk : n - r * chunk) * sizeof(int));
+    }
+    free(runs);
+    free(pos);
+    free(heap);
+    free(out);
+    return status;
+}
+
+static void removeRuns(long n, long chunk, const char *tmp_dir)
+{
+    char path[4096];
+    for (long r = 0; r < (n + chunk - 1) / chunk; r++)
+    {
+        runPath(path, sizeof(path), tmp_dir, r);
+        unlink(path);
+    }
+}
+
+// Retorna 0 em caso de sucesso, -1 para configuração inválida, -2 se não houver
+// memória e -3 para erro de leitura/escrita. O tempo inclui as duas fases (com E/S).
+int external_sort(const char *input_path, const char *output_path, long n, long chunk, int threshold,
+                  int base_case, int variant, int threads, const char *tmp_dir, TimeResult *result)
+{
+    if (!valid_config(threshold, base_case, variant, threads) || n < 1 || chunk < 1)
+        return -1;
+    if ((n + chunk - 1) / chunk > EXTERNAL_MAX_RUNS)
+        chunk = (n + EXTERNAL_MAX_RUNS - 1) / EXTERNAL_MAX_RUNS;
+    if (chunk > INT_MAX)
+        return -1;
+
+    struct timespec start_wall, end_wall;
+    clock_t start_cpu, end_cpu;
+
+    clock_gettime(CLOCK_MONOTONIC, &start_wall);
+    start_cpu = clock();
+
+    int status = writeRuns(input_path, n, chunk, threshold, base_case, variant, threads, tmp_dir);
+    if (status == 0)
+        status = mergeRuns(output_path, n, chunk, tmp_dir);
+    removeRuns(n, chunk, tmp_dir);
+
+    end_cpu = clock();
+    clock_gettime(CLOCK_MONOTONIC, &end_wall);
+
+    result->cpu_time = (double)(end_cpu - start_cpu) / CLOCKS_PER_SEC;
+    result->wall_time = elapsed(start_wall, end_wall);
+    return status;
+}
+
+// --- Ordenação de outros tipos de elemento (chaves maiores e registros) ---
+// O híbrido top-down (mesmo algoritmo de hybridSortFn) é gerado por macro para cada
+// tipo. Os registros têm chave int64 + payload; só a chave é comparada, mas o
+// registro inteiro é movido, como em uma ordenação de structs real.
+typedef enum
+{
+    ELEM_INT32 = 0,
+    ELEM_INT64 = 1,
+    ELEM_DOUBLE = 2,
+    ELEM_RECORD16 = 3, // chave int64 + 8 bytes (ex: chave + índice)
+    ELEM_RECORD32 = 4, // chave int64 + 24 bytes
+    ELEM_RECORD64 = 5, // chave int64 + 56 bytes
+    NUM_ELEMENT_TYPES
+} ElementType;
+
+typedef struct
+{
+    int64_t key;
+    char payload[8];
+} Record16;
+
+typedef struct
+{
+    int64_t key;
+    char payload[24];
+} Record32;
+
+typedef struct
+{
+    int64_t key;
+    char payload[56];
+} Record64;
+
+#define SCALAR_KEY(x) (x)
+#define RECORD_KEY(x) ((x).key)
+
+#define DEFINE_TYPED_SORT(NAME, TYPE, KEY)                                                      \
+    static void bubble_##NAME(TYPE *array, long left, long right)                               \
+    {                                                                                           \
+        for (long i = left; i <= right; i++)                                                    \
+            for (long j = left; j < right - (i - left); j++)                                    \
+                if (KEY(array[j]) > KEY(array[j + 1]))                                          \
+                {                                                                               \
+                    TYPE tmp = array[j];                                                        \
+                    array[j] = array[j + 1];                                                    \
+                    array[j + 1] = tmp;                                                         \
+                }                                                                               \
+    }                                                                                           \
+                                                                                                \
+    static void insertion_##NAME(TYPE *array, long left, long right)                            \
+    {                                                                                           \
+        for (long i = left + 1; i <= right; i++)                                                \
+        {                                                                                       \
+            TYPE item = array[i];                                                               \
+            long j = i - 1;                                                                     \
+            while (j >= left && KEY(array[j]) > KEY(item))                                      \
+            {                                                                                   \
+                array[j + 1] = array[j];                                                        \
+                j--;                                                                            \
+            }                                                                                   \
+            array[j + 1] = item;                                                                \
+        }                                                                                       \
+    }                                                                                           \
+                                                                                                \
+    static void merge_##NAME(TYPE *array, TYPE *temp, long left, long mid, long right)          \
+    {                                                                                           \
+        long i = left, j = mid + 1, k = left;                                                   \
+        memcpy(temp + left, array + left, (size_t)(right - left + 1) * sizeof(TYPE));           \
+        while (i <= mid && j <= right)                                                          \
+            array[k++] = KEY(temp[i]) <= KEY(temp[j]) ? temp[i++] : temp[j++];                  \
+        while (i <= mid)                                                                        \
+            array[k++] = temp[i++];                                                             \
+        while (j <= right)                                                                      \
+            array[k++] = temp[j++];                                                             \
+    }                                                                                           \
+                                                                                                \
+    static void hybrid_##NAME(TYPE *array, TYPE *temp, long left, long right, int threshold,    \
+                              int base_case)                                                    \
+    {                                                                                           \
+        if (right - left + 1 <= threshold)                                                      \
+        {                                                                                       \
+            if (base_case == BASE_BUBBLE)                                                       \
+                bubble_##NAME(array, left, right);                                              \
+            else                                                                                \
+                insertion_##NAME(array, left, right);                                           \
+        }                                                                                       \
+        else if (left < right)                                                                  \
+        {                                                                                       \
+            long mid = left + (right - left) / 2;                                               \
+            hybrid_##NAME(array, temp, left, mid, threshold, base_case);                        \
+            hybrid_##NAME(array, temp, mid + 1, right, threshold, base_case);                   \
+            merge_##NAME(array, temp, left, mid, right);                                        \
+        }                                                                                       \
+    }
+
+DEFINE_TYPED_SORT(int32, int32_t, SCALAR_KEY)
+DEFINE_TYPED_SORT(int64, int64_t, SCALAR_KEY)
+DEFINE_TYPED_SORT(double, double, SCALAR_KEY)
+DEFINE_TYPED_SORT(record16, Record16, RECORD_KEY)
+DEFINE_TYPED_SORT(record32, Record32, RECORD_KEY)
+DEFINE_TYPED_SORT(record64, Record64, RECORD_KEY)
+
+static const size_t element_sizes[NUM_ELEMENT_TYPES] = {
+    [ELEM_INT32] = sizeof(int32_t),
+    [ELEM_INT64] = sizeof(int64_t),
+    [ELEM_DOUBLE] = sizeof(double),
+    [ELEM_RECORD16] = sizeof(Record16),
+    [ELEM_RECORD32] = sizeof(Record32),
+    [ELEM_RECORD64] = sizeof(Record64),
+};
+
+// Tamanho em bytes de um elemento do tipo (0 se o tipo for inválido)
+size_t element_size(int element_type)
+{
+    if (element_type < 0 || element_type >= NUM_ELEMENT_TYPES)
+        return 0;
+    return element_sizes[element_type];
+}
+
+static void run_sort_typed(void *array, void *temp, long n, int threshold, int base_case, int element_type)
+{
+    switch (element_type)
+    {
+    case ELEM_INT32:
+        hybrid_int32(array, temp, 0, n - 1, threshold, base_case);
+        break;
+    case ELEM_INT64:
+        hybrid_int64(array, temp, 0, n - 1, threshold, base_case);
+        break;
+    case ELEM_DOUBLE:
+        hybrid_double(array, temp, 0, n - 1, threshold, base_case);
+        break;
+    case ELEM_RECORD16:
+        hybrid_record16(array, temp, 0, n - 1, threshold, base_case);
+        break;
+    case ELEM_RECORD32:
+        hybrid_record32(array, temp, 0, n - 1, threshold, base_case);
+        break;
+    case ELEM_RECORD64:
+        hybrid_record64(array, temp, 0, n - 1, threshold, base_case);
+        break;
+    }
+}
+
+// Ordena no lugar um vetor de n elementos do tipo. Só os casos base Bubble e
+// Insertion (e threshold == -1, o Merge Puro). Retorna 0 ou -1 (configuração inválida).
+int sort_typed(void *array, void *temp, long n, int threshold, int base_case, int element_type)
+{
+    if (element_size(element_type) == 0 ||
+        (threshold != -1 && base_case != BASE_BUBBLE && base_case != BASE_INSERTION))
+        return -1;
+    run_sort_typed(array, temp, n, threshold, base_case, element_type);
+    return 0;
+}
+
+// Como test_sort, para outros tipos de elemento. Retorna 0, -1 ou -2 (sem memória).
+int test_sort_typed(const void *original, long n, int threshold, int base_case, int element_type,
+                    TimeResult *result)
+{
+    if (element_size(element_type) == 0 ||
+        (threshold != -1 && base_case != BASE_BUBBLE && base_case != BASE_INSERTION))
+        return -1;
+
+    size_t bytes = (size_t)n * element_size(element_type);
+    void *array = malloc(bytes);
+    void *temp = malloc(bytes);
+    if (!array || !temp)
+    {
+        free(array);
+        free(temp);
+        return -2;
+    }
+    memcpy(array, original, bytes);
+
+    struct timespec start_wall, end_wall;
+    clock_t start_cpu, end_cpu;
+
+    clock_gettime(CLOCK_MONOTONIC, &start_wall);
+    start_cpu = clock();
+
+    run_sort_typed(array, temp, n, threshold, base_case, element_type);
+
+    end_cpu = clock();
+    clock_gettime(CLOCK_MONOTONIC, &end_wall);
+
+    result->cpu_time = (double)(end_cpu - start_cpu) / CLOCKS_PER_SEC;
+    result->wall_time = elapsed(start_wall, end_wall);
+
+    free(array);
+    free(temp);
+    return 0;
+}
@@ -0,0 +1,148 @@
+"""
+Ingestão incremental de novas execuções de benchmark.
+
+As novas linhas (mesmo formato do raw_times) são acrescentadas ao CSV bruto e às
+partições do armazenamento colunar. As estatísticas acumuladas (Welford) só são
+atualizadas nas células (Tamanho, Threshold) que receberam linhas novas.
+
+Na primeira ingestão ainda não há estado acumulado: é preciso rodar com --rebuild,
+que recalcula o summary inteiro a partir do raw_times (sobrescrevendo o arquivo).
+
+Uso:
+    python ingest.py bubble novas_execucoes.csv --rebuild   # primeira vez
+    python ingest.py bubble novas_execucoes.csv
+"""
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from data_store import (CACHE_DIR, align_rows, append_rows, list_partitions, load_csv,
+                        read_csv_typed, read_partition)
+from process_results import (KEYS, RAW_FILES, SUMMARY_COLUMNS, SUMMARY_FILES, aggregate_raw,
+                             best_tables, chunk_stats, merge_stats, robust_stats, stats_to_summary)
+
+####################################################################
+####################################################################
+# --- Estado persistido (n, média, M2) por célula ---
+####################################################################
+####################################################################
+
+def _state_paths(directory, name):
+    """Caminho da tabela Welford e do arquivo que registra a versão do CSV bruto."""
+    base = os.path.join(directory, CACHE_DIR, f"{name}-welford")
+    return base + ".csv", base + ".json"
+
+
+def load_state(directory, name):
+    """
+    Carrega o estado Welford de um dataset. Retorna None se não existir ou se o
+    CSV bruto foi alterado por fora depois da última ingestão.
+    """
+    state_path, meta_path = _state_paths(directory, name)
+    if not (os.path.exists(state_path) and os.path.exists(meta_path)):
+        return None
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    stat = os.stat(os.path.join(directory, RAW_FILES[name]))
+    if meta.get('mtime_ns') != stat.st_mtime_ns or meta.get('size') != stat.st_size:
+        return None
+    return pd.read_csv(state_path, index_col=KEYS)
+
+
+def save_state(directory, name, stats):
+    """Grava o estado Welford com precisão total e a versão atual do CSV bruto."""
+    state_path, meta_path = _state_paths(directory, name)
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    stats.to_csv(state_path, float_format='%.17g')
+    stat = os.stat(os.path.join(directory, RAW_FILES[name]))
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}, f)
+
+
+def full_state(raw_path):
+    """Calcula o estado Welford do arquivo bruto inteiro (usado só na primeira ingestão)."""
+    stats = None
+    for df_chunk in pd.read_csv(raw_path, encoding='utf-8-sig', chunksize=200_000):
+        stats = merge_stats(stats, chunk_stats(df_chunk))
+    return stats
+
+####################################################################
+####################################################################
+# --- Atualização das células afetadas ---
+####################################################################
+####################################################################
+
+def affected_rows(raw_path, tamanhos):
+    """Todas as execuções (antigas + novas) dos Tamanhos afetados."""
+    partitions = list_partitions(raw_path)
+    if partitions is None:
+        df_raw = load_csv(raw_path)
+        return df_raw[df_raw['Tamanho'].isin(tamanhos)]
+    return pd.concat([read_partition(partitions[t]) for t in tamanhos], ignore_index=True)
+
+
+def ingest(name, new_rows_path, directory='.', rebuild=False):
+    """
+    Acrescenta as execuções de 'new_rows_path' ao dataset 'name' ('bubble' ou
+    'insertion') e recalcula apenas as células afetadas do summary.
+    Sem estado Welford válido (primeira ingestão ou CSV alterado por fora), só
+    continua com rebuild=True, que regrava o summary inteiro a partir do raw_times.
+    Retorna as células (Tamanho, Threshold) recalculadas.
+    """
+    raw_path = os.path.join(directory, RAW_FILES[name])
+    summary_path = os.path.join(directory, SUMMARY_FILES[name])
+
+    # Valida as colunas antes de tocar em qualquer arquivo
+    df_new = align_rows(raw_path, read_csv_typed(new_rows_path))
+
+    stats = None if rebuild else load_state(directory, name)
+    if stats is None:
+        if not rebuild:
+            raise ValueError(f"Não há estado acumulado válido para '{name}'. Rode com --rebuild para "
+                             f"recalcular '{summary_path}' a partir de '{raw_path}'.")
+        print(f"Reconstruindo '{summary_path}' a partir de '{raw_path}'...")
+        stats = full_state(raw_path)
+        aggregate_raw(raw_path).to_csv(summary_path, index=False, float_format='%.6f')
+
+    new_stats = chunk_stats(df_new)
+    stats = merge_stats(stats, new_stats)
+    cells = new_stats.index
+
+    tamanhos = append_rows(raw_path, df_new)
+    save_state(directory, name, stats)
+
+    # Novas linhas do summary, só para as células afetadas
+    updated = stats_to_summary(stats.loc[cells])
+    df_affected = affected_rows(raw_path, tamanhos).set_index(KEYS)
+    df_affected = df_affected[df_affected.index.isin(cells)].reset_index()
+    updated = updated.join(robust_stats(df_affected))
+
+    summary = read_csv_typed(summary_path).set_index(KEYS)
+    new_cells = updated.index[~updated.index.isin(summary.index)]
+    summary = summary.reindex(summary.index.append(new_cells))
+    summary.loc[updated.index, updated.columns] = updated
+    summary = summary.reset_index()
+    extra = [c for c in summary.columns if c not in SUMMARY_COLUMNS]
+    summary[SUMMARY_COLUMNS + extra].to_csv(summary_path, index=False, float_format='%.6f')
+
+    # As tabelas de melhores resultados são pequenas (1 linha por Tamanho): regera todas
+    summaries = {n: read_csv_typed(os.path.join(directory, f)) for n, f in SUMMARY_FILES.items()}
+    for table_name, table in best_tables(summaries['bubble'], summaries['insertion']).items():
+        table.to_csv(os.path.join(directory, f"melhores_resultados_{table_name}.csv"),
+                     index=False, float_format='%.8f')
+
+    return list(cells)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Acrescenta novas execuções sem reprocessar o histórico.")
+    parser.add_argument('dataset', choices=sorted(RAW_FILES), help="Dataset que recebe as execuções.")
+    parser.add_argument('new_rows', help="CSV com as novas linhas (mesmo formato do raw_times).")
+    parser.add_argument('--dir', default='.', help="Pasta com os arquivos de resultados.")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Recalcula o summary inteiro a partir do raw_times (obrigatório na primeira ingestão).")
+    args = parser.parse_args()
+    cells = ingest(args.dataset, args.new_rows, args.dir, args.rebuild)
+    print(f"{len(cells)} célula(s) (Tamanho, Threshold) atualizada(s).")
@@ -3,6 +3,10 @@
 #include <string.h>
 #include <time.h>
 #include <math.h>
+#include <fcntl.h>
+#include <unistd.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
 
 #define NUM_THRESHOLDS 23
 int thresholds[NUM_THRESHOLDS] = {-1, 100, 90, 80, 70, 60, 50, 40, 30, 28,
@@ -132,8 +136,73 @@ TimeResult test_sort(int *original, int n, int threshold)
     return result;
 }
 
-int main()
+// --- Entrada gerada pelo datasets.py (n inteiros int32), lida via memory-map ---
+int *map_dataset(const char *path, int n)
 {
+    int fd = open(path, O_RDONLY);
+    if (fd < 0)
+        return NULL;
+
+    struct stat st;
+    if (fstat(fd, &st) != 0 || st.st_size != (off_t)n * (off_t)sizeof(int))
+    {
+        close(fd);
+        return NULL;
+    }
+
+    void *data = mmap(NULL, st.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+    close(fd);
+    return data == MAP_FAILED ? NULL : data;
+}
+
+// --- Execução de uma única célula (Tamanho, Threshold) ---
+// Usada pelo sweep.py para distribuir a grade entre vários processos.
+// Imprime as linhas do raw_times (sem cabeçalho) na saída padrão.
+// Sem 'dataset', a entrada é gerada com rand() (srand(42)), como no main()
+int run_cell(int n, int threshold, int runs, const char *dataset)
+{
+    int *original;
+    if (dataset)
+    {
+        original = map_dataset(dataset, n);
+        if (!original)
+        {
+            fprintf(stderr, "Erro ao abrir a entrada %s\n", dataset);
+            return 1;
+        }
+    }
+    else
+    {
+        srand(42);
+        original = malloc(n * sizeof(int));
+        if (!original)
+        {
+            fprintf(stderr, "Erro ao alocar vetor original\n");
+            return 1;
+        }
+        for (int i = 0; i < n; i++)
+            original[i] = rand();
+    }
+
+    for (int run = 0; run < runs; run++)
+    {
+        TimeResult result = test_sort(original, n, threshold);
+        printf("%d,%d,%d,%.6f,%.6f\n", n, threshold, run + 1, result.cpu_time, result.wall_time);
+    }
+
+    if (dataset)
+        munmap(original, (size_t)n * sizeof(int));
+    else
+        free(original);
+    return 0;
+}
+
+int main(int argc, char *argv[])
+{
+    // Modo célula: ./exec <tamanho> <threshold> <execucoes> [arquivo .int32 do datasets.py]
+    if (argc == 4 || argc == 5)
+        return run_cell(atoi(argv[1]), atoi(argv[2]), atoi(argv[3]), argc == 5 ? argv[4] : NULL);
+
     srand(42);
 
     FILE *raw_file = fopen("merge-insertion-raw_times.csv", "w");
@@ -0,0 +1,430 @@
+"""
+Pipeline de agregação: gera os arquivos summary e 'melhores_resultados_*' a partir
+dos arquivos raw_times, substituindo os três process_best_*_results.c.
+
+Uso:
+    python process_results.py --dir . --chunksize 200000
+"""
+import argparse
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from best_config import (MERGE, MERGE_BUBBLE, MERGE_INSERTION, MERGE_THRESHOLD,
+                         best_for, build_best_index, tag_summaries)
+from data_store import COLUMN_TYPES, list_partitions, read_partition
+
+####################################################################
+####################################################################
+# --- Configuração ---
+####################################################################
+####################################################################
+
+RAW_FILES = {
+    'bubble': "merge-bubble-raw_times.csv",
+    'insertion': "merge-insertion-raw_times.csv",
+}
+
+SUMMARY_FILES = {
+    'bubble': "merge-bubble-summary_results.csv",
+    'insertion': "merge-insertion-summary_results.csv",
+}
+
+KEYS = ['Tamanho', 'Threshold']
+
+# Colunas opcionais que também identificam uma célula (ex: arquivo das variantes)
+DIMENSIONS = ['Algoritmo', 'Threads', 'Distribuicao', 'Elemento', 'TamanhoElemento', 'Medicao', 'Buffers']
+
+# Coluna do raw_times -> sufixo usado nas colunas do summary
+METRICS = {'TempoCPU': 'CPU', 'TempoReal': 'Real'}
+
+PERCENTILES = [5, 95]
+
+# Fração cortada de cada ponta na média aparada
+TRIM = 0.1
+
+# IC da mediana por bootstrap (percentil); semente fixa para o summary ser reprodutível
+CONFIDENCE = 0.95
+BOOTSTRAP_SAMPLES = 1000
+BOOTSTRAP_SEED = 0
+
+# Elementos reamostrados por bloco no bootstrap (limita a memória)
+BOOTSTRAP_CHUNK = 1 << 23
+
+# Nível de significância do teste de empate do melhor threshold
+ALPHA = 0.05
+
+# Contadores de hardware do raw_times (harness.py --counters), na ordem do enum Counter
+COUNTER_COLUMNS = ['Ciclos', 'Instrucoes', 'FalhasDesvio', 'FalhasL1', 'FalhasLLC', 'FalhasPagina']
+
+# Fração do tempo em que o grupo de contadores de hardware foi contado (1 = sem multiplexação)
+COUNTER_COVERAGE = 'CoberturaContadores'
+
+# Contadores de falhas convertidos em falhas por mil instruções (MPKI)
+MISS_COUNTERS = {'FalhasDesvio': 'MPKIDesvio', 'FalhasL1': 'MPKIL1', 'FalhasLLC': 'MPKILLC'}
+
+# Colunas do summary na mesma ordem em que os programas .c gravam
+SUMMARY_COLUMNS = ['Tamanho', 'Threshold', 'MediaCPU', 'DesvioCPU', 'MediaReal', 'DesvioReal']
+
+####################################################################
+####################################################################
+# --- Estatísticas em uma passada (Welford / Chan) ---
+####################################################################
+####################################################################
+
+def group_keys(columns):
+    """Chaves de agrupamento: (Tamanho, Threshold) mais as DIMENSIONS presentes."""
+    return KEYS + [c for c in DIMENSIONS if c in columns]
+
+
+def chunk_stats(df_chunk):
+    """
+    Calcula (n, média, M2) por (Tamanho, Threshold) para um bloco do raw_times.
+    M2 é a soma dos quadrados dos desvios (variância populacional = M2 / n).
+    """
+    grouped = df_chunk.groupby(group_keys(df_chunk.columns), sort=False, dropna=False)
+    parts = {'n': grouped.size()}
+    for column in METRICS:
+        parts[f'mean_{column}'] = grouped[column].mean()
+        parts[f'M2_{column}'] = grouped[column].var(ddof=0) * parts['n']
+    return pd.DataFrame(parts)
+
+
+def merge_stats(a, b):
+    """
+    Combina duas tabelas (n, média, M2) com a fórmula paralela de Chan.
+    As duas tabelas são indexadas por (Tamanho, Threshold); células presentes em
+    apenas uma delas são mantidas como estão.
+    """
+    if a is None or a.empty:
+        return b.copy()
+    if b is None or b.empty:
+        return a.copy()
+
+    index = a.index.append(b.index[~b.index.isin(a.index)])
+    a = a.reindex(index)
+    b = b.reindex(index)
+    n_a = a['n'].fillna(0).to_numpy()
+    n_b = b['n'].fillna(0).to_numpy()
+    n = n_a + n_b
+
+    merged = {'n': n}
+    for column in METRICS:
+        mean_a = a[f'mean_{column}'].fillna(0).to_numpy()
+        mean_b = b[f'mean_{column}'].fillna(0).to_numpy()
+        delta = mean_b - mean_a
+        merged[f'mean_{column}'] = mean_a + delta * n_b / n
+        merged[f'M2_{column}'] = (a[f'M2_{column}'].fillna(0).to_numpy()
+                                  + b[f'M2_{column}'].fillna(0).to_numpy()
+                                  + delta ** 2 * n_a * n_b / n)
+
+    return pd.DataFrame(merged, index=index).astype({'n': np.int64})
+
+
+def stats_to_summary(stats):
+    """Converte a tabela (n, média, M2) para o formato das colunas do summary."""
+    summary = pd.DataFrame(index=stats.index)
+    for column, suffix in METRICS.items():
+        summary[f'Media{suffix}'] = stats[f'mean_{column}']
+        summary[f'Desvio{suffix}'] = np.sqrt(stats[f'M2_{column}'] / stats['n'])
+    return summary
+
+####################################################################
+####################################################################
+# --- Estatísticas robustas (vetorizadas por célula) ---
+####################################################################
+####################################################################
+
+def bootstrap_median_ci(values, counts, samples=BOOTSTRAP_SAMPLES, confidence=CONFIDENCE,
+                        seed=BOOTSTRAP_SEED):
+    """
+    IC da mediana de cada célula por bootstrap percentil. 'values' é a matriz
+    (células x execuções) em ordem crescente, completada com NaN, e 'counts' o
+    número de execuções de cada célula. Células com o mesmo número de execuções
+    são reamostradas juntas, em um único array (células x reamostras x execuções).
+    """
+    rng = np.random.default_rng(seed)
+    alpha = (1 - confidence) / 2
+    low = np.full(len(counts), np.nan)
+    high = np.full(len(counts), np.nan)
+    for n in np.unique(counts):
+        cells = np.flatnonzero(counts == n)
+        block = max(1, BOOTSTRAP_CHUNK // (samples * n))
+        for start in range(0, len(cells), block):
+            rows = cells[start:start + block]
+            picks = rng.integers(0, n, size=(len(rows), samples, n))
+            medians = np.median(values[rows[:, None, None], picks], axis=2)
+            low[rows], high[rows] = np.quantile(medians, [alpha, 1 - alpha], axis=1)
+    return low, high
+
+
+def cell_layout(df_raw):
+    """
+    Posição de cada execução na matriz (células x execuções): retorna as chaves de
+    cada célula (uma linha por célula), o código da célula e a coluna de cada
+    execução, e o número de execuções por célula.
+    """
+    keys = group_keys(df_raw.columns)
+    grouped = df_raw.groupby(keys, sort=False, dropna=False)
+    codes = grouped.ngroup().to_numpy()
+    positions = grouped.cumcount().to_numpy()
+    counts = np.bincount(codes)
+
+    first = np.flatnonzero(positions == 0)
+    first = first[np.argsort(codes[first])]
+    cells = df_raw[keys].iloc[first].reset_index(drop=True)
+    return cells, codes, positions, counts
+
+
+def cell_matrix(df_raw, column, layout):
+    """Valores de 'column' na matriz (células x execuções), em ordem crescente e completada com NaN."""
+    _, codes, positions, counts = layout
+    values = np.full((len(counts), counts.max()), np.nan)
+    values[codes, positions] = df_raw[column].to_numpy()
+    values.sort(axis=1)  # NaN vão para o final de cada linha
+    return values
+
+
+def robust_stats(df_raw):
+    """
+    Mediana, média aparada, MAD (desvio absoluto mediano, sem fator de escala),
+    percentis e IC da mediana por célula, para cada métrica de METRICS.
+
+    Os valores de todas as células vão para uma matriz (células x execuções), então
+    cada estatística é uma única operação do numpy, sem laço por célula.
+    """
+    layout = cell_layout(df_raw)
+    cells, _, _, counts = layout
+    stats = pd.DataFrame(index=pd.MultiIndex.from_frame(cells))
+
+    trim = np.floor(TRIM * counts).astype(np.int64)
+    columns = np.arange(counts.max())
+    kept = (columns >= trim[:, None]) & (columns < (counts - trim)[:, None])
+
+    for column, suffix in METRICS.items():
+        values = cell_matrix(df_raw, column, layout)
+
+        median = np.nanmedian(values, axis=1)
+        stats[f'Mediana{suffix}'] = median
+        stats[f'MediaAparada{suffix}'] = np.where(kept, values, 0).sum(axis=1) / kept.sum(axis=1)
+        stats[f'MAD{suffix}'] = np.nanmedian(np.abs(values - median[:, None]), axis=1)
+        for p, value in zip(PERCENTILES, np.nanpercentile(values, PERCENTILES, axis=1)):
+            stats[f'P{p}{suffix}'] = value
+        stats[f'ICInf{suffix}'], stats[f'ICSup{suffix}'] = bootstrap_median_ci(values, counts)
+    return stats
+
+####################################################################
+####################################################################
+# --- Empates estatísticos do melhor threshold ---
+####################################################################
+####################################################################
+
+# math.erfc elemento a elemento, com resultado float64 (não um array de objetos)
+_erfc = np.vectorize(math.erfc, otypes=[np.float64])
+
+
+def _normal_sf(z):
+    """Função de sobrevivência da normal padrão (cauda superior, P(Z > z)), elemento a elemento."""
+    return 0.5 * _erfc(np.asarray(z, dtype=np.float64) / math.sqrt(2))
+
+
+def _tie_term(values, rows):
+    """Soma de (t³ - t) dos grupos de valores repetidos de cada linha (correção de empates)."""
+    valid = ~np.isnan(values)
+    df = pd.DataFrame({'row': np.broadcast_to(rows[:, None], values.shape)[valid], 'value': values[valid]})
+    t = df.groupby(['row', 'value']).size()
+    return (t ** 3 - t).groupby(level='row').sum().reindex(rows, fill_value=0).to_numpy()
+
+
+def tied_thresholds(df_raw, metric='MediaReal', alpha=ALPHA):
+    """
+    Compara, em cada Tamanho, as execuções do melhor Threshold (menor 'metric':
+    MediaReal, MedianaReal, MediaCPU ou MedianaCPU) com as de cada outro Threshold.
+
+    Usa o teste de Mann-Whitney unilateral (H1: o outro threshold é mais lento), com
+    aproximação normal e correção de empates. Os tempos têm resolução de 1 µs e
+    repetem muito, por isso a correção é necessária. Todos os pares são testados
+    de uma vez, em uma matriz (células x execuções x execuções do melhor). Um
+    Threshold está 'Empatado' com o melhor quando o valor-p é >= alpha.
+    O Merge Puro (Threshold -1) fica de fora.
+    """
+    suffix = metric[-4:] if metric.endswith('Real') else metric[-3:]
+    column = next(c for c, s in METRICS.items() if s == suffix)
+    df_raw = df_raw[df_raw['Threshold'] != MERGE_THRESHOLD]
+
+    layout = cell_layout(df_raw)
+    cells, _, _, counts = layout
+    values = cell_matrix(df_raw, column, layout)
+    center = np.nanmedian(values, axis=1) if metric.startswith('Mediana') else np.nanmean(values, axis=1)
+
+    # Melhor célula de cada grupo (mesmas chaves, exceto o Threshold); empate: menor Threshold
+    group_columns = [c for c in cells.columns if c != 'Threshold']
+    group = cells.groupby(group_columns, sort=False, dropna=False).ngroup().to_numpy()
+    order = np.lexsort((cells['Threshold'].to_numpy(), center, group))
+    first = order[np.r_[True, group[order][1:] != group[order][:-1]]]
+    best = np.empty(len(cells), dtype=np.int64)
+    best[group[first]] = first
+    best = best[group]
+
+    # U = nº de pares (outro, melhor) em que o outro é mais lento (+ 1/2 nos empates)
+    others, bests = values[:, :, None], values[best][:, None, :]
+    u = (others > bests).sum(axis=(1, 2)) + 0.5 * (others == bests).sum(axis=(1, 2))
+
+    n_a, n_b = counts, counts[best]
+    n = n_a + n_b
+    combined = np.concatenate([values, values[best]], axis=1)
+    variance = n_a * n_b / 12 * ((n + 1) - _tie_term(combined, np.arange(len(cells))) / (n * (n - 1)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(variance > 0, (u - n_a * n_b / 2 - 0.5) / np.sqrt(variance), 0.0)
+    p_value = np.where(best == np.arange(len(cells)), 1.0, _normal_sf(z))
+
+    result = cells.copy()
+    result[metric] = center
+    result['MelhorThreshold'] = cells['Threshold'].to_numpy()[best]
+    result['U'] = u
+    result['Z'] = z
+    result['ValorP'] = p_value
+    result['Empatado'] = p_value >= alpha
+    return result
+
+
+def tie_bands(df_ties):
+    """
+    Resume tied_thresholds por Tamanho: o melhor Threshold, a faixa (mín./máx.) dos
+    thresholds empatados com ele e quantos são.
+    """
+    group_columns = [c for c in group_keys(df_ties.columns) if c != 'Threshold']
+    tied = df_ties[df_ties['Empatado']]
+    bands = tied.groupby(group_columns, dropna=False).agg(
+        Threshold=('MelhorThreshold', 'first'),
+        ThresholdMin=('Threshold', 'min'),
+        ThresholdMax=('Threshold', 'max'),
+        Empatados=('Threshold', 'size'),
+        Lista=('Threshold', lambda t: ', '.join(str(v) for v in sorted(t))),
+    )
+    return bands.reset_index()
+
+
+def stable_threshold(df_ties):
+    """Threshold empatado com o melhor no maior número de Tamanhos (candidato para produção)."""
+    counts = df_ties[df_ties['Empatado']].groupby('Threshold').size()
+    return int(counts.idxmax()), int(counts.max())
+
+####################################################################
+####################################################################
+# --- Leitura em blocos ---
+####################################################################
+####################################################################
+
+def aggregate_raw(raw_path, chunksize=200_000):
+    """
+    Lê um arquivo raw_times em blocos e retorna o summary por (Tamanho, Threshold).
+
+    Média e desvio padrão são acumulados bloco a bloco (Welford/Chan), com memória
+    proporcional ao bloco. As estatísticas robustas (ver robust_stats) precisam de
+    todas as execuções de cada célula: elas são calculadas uma partição por vez
+    (um Tamanho, ver data_store.list_partitions), então a memória é a da maior
+    partição. Sem pyarrow não há partições e todas as amostras (chaves e tempos)
+    ficam em memória de uma vez.
+    """
+    header = pd.read_csv(raw_path, nrows=0, encoding='utf-8-sig').columns
+    dtypes = {col: COLUMN_TYPES[col] for col in header if col in COLUMN_TYPES}
+    keys = group_keys(header)
+    partitions = list_partitions(raw_path)
+    stats = None
+    samples = []
+
+    reader = pd.read_csv(raw_path, dtype=dtypes, encoding='utf-8-sig', chunksize=chunksize)
+    for df_chunk in reader:
+        stats = merge_stats(stats, chunk_stats(df_chunk))
+        if partitions is None:
+            samples.append(df_chunk[keys + list(METRICS)])
+
+    if partitions is None:
+        robust = robust_stats(pd.concat(samples, ignore_index=True))
+    else:
+        robust = pd.concat([robust_stats(read_partition(path)) for _, path in sorted(partitions.items())])
+
+    summary = stats_to_summary(stats)
+    summary = summary.join(robust.reindex(summary.index))
+    summary = summary.reset_index()
+    extra = [c for c in summary.columns if c not in SUMMARY_COLUMNS]
+    return summary[SUMMARY_COLUMNS + extra]
+
+####################################################################
+####################################################################
+# --- Contadores de hardware ---
+####################################################################
+####################################################################
+
+def counter_rates(df_raw):
+    """
+    Médias dos contadores por célula e as taxas derivadas: IPC (instruções por
+    ciclo), MPKI de desvios/L1/LLC e falhas de página por execução.
+
+    Linhas sem contadores são ignoradas; um contador indisponível na máquina
+    (coluna vazia) resulta em taxa NaN, sem derrubar as demais. A cobertura
+    (COUNTER_COVERAGE) da célula é a menor entre as execuções.
+    """
+    counters = [c for c in COUNTER_COLUMNS if c in df_raw.columns]
+    df = df_raw.dropna(subset=counters, how='all')
+    keys = group_keys(df.columns)
+    grouped = df.groupby(keys, sort=True, dropna=False)
+    means = grouped[counters + list(METRICS)].mean()
+    if COUNTER_COVERAGE in df.columns:
+        means[COUNTER_COVERAGE] = grouped[COUNTER_COVERAGE].min()
+    means = means.reset_index()
+
+    means['IPC'] = means['Instrucoes'] / means['Ciclos'].where(means['Ciclos'] > 0)
+    instructions = means['Instrucoes'].where(means['Instrucoes'] > 0)
+    for column, rate in MISS_COUNTERS.items():
+        means[rate] = 1000 * means[column] / instructions
+    return means
+
+
+def best_tables(df_bubble, df_insertion, metric='MediaCPU'):
+    """
+    Gera as tabelas 'melhores_resultados_*' a partir dos dois summaries.
+
+    O critério padrão é a menor MediaCPU, o mesmo usado pelos process_best_*.c,
+    para que os arquivos gerados sejam compatíveis com os antigos.
+    """
+    best_index = build_best_index(tag_summaries(df_bubble, df_insertion), metric=metric)
+    tables = {
+        'merge': best_for(best_index, MERGE)[SUMMARY_COLUMNS],
+        'mergebubble': best_for(best_index, MERGE_BUBBLE)[SUMMARY_COLUMNS],
+        'mergeinsertion': best_for(best_index, MERGE_INSERTION)[SUMMARY_COLUMNS],
+    }
+    labels = {'merge': 'Merge', 'mergebubble': MERGE_BUBBLE, 'mergeinsertion': MERGE_INSERTION}
+    tables['merge_hibridos'] = pd.concat(
+        [tables[name].assign(Algoritmo=label) for name, label in labels.items()],
+        ignore_index=True
+    ).sort_values('Tamanho', kind='stable')
+    return tables
+
+
+def run(directory='.', chunksize=200_000, metric='MediaCPU'):
+    """Gera todos os arquivos summary e 'melhores_resultados_*' de uma vez."""
+    summaries = {}
+    for name, raw_file in RAW_FILES.items():
+        summaries[name] = aggregate_raw(os.path.join(directory, raw_file), chunksize)
+        out_path = os.path.join(directory, SUMMARY_FILES[name])
+        summaries[name].to_csv(out_path, index=False, float_format='%.6f')
+        print(f"Arquivo '{out_path}' gerado com sucesso!")
+
+    for name, table in best_tables(summaries['bubble'], summaries['insertion'], metric).items():
+        out_path = os.path.join(directory, f"melhores_resultados_{name}.csv")
+        table.to_csv(out_path, index=False, float_format='%.8f')
+        print(f"Arquivo '{out_path}' gerado com sucesso!")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gera os summaries e melhores resultados a partir dos raw_times.")
+    parser.add_argument('--dir', default='.', help="Pasta com os arquivos raw_times (e onde os resultados são gravados).")
+    parser.add_argument('--chunksize', type=int, default=200_000, help="Linhas lidas por bloco.")
+    parser.add_argument('--metric', default='MediaCPU', choices=['MediaCPU', 'MediaReal', 'MedianaCPU', 'MedianaReal'],
+                        help="Métrica usada para escolher o melhor threshold.")
+    args = parser.parse_args()
+    run(args.dir, args.chunksize, args.metric)
@@ -0,0 +1,232 @@
+"""
+Executor paralelo e retomável da grade de benchmark (Tamanho x Threshold).
+
+Compila merge4_final.c / merge5_final.c, distribui as células (Tamanho, Threshold)
+entre um pool de processos (cada um fixado em um núcleo) e grava cada célula
+terminada em disco. Se a execução for interrompida, rodar de novo pula as células
+já concluídas. No final, gera o raw_times e o summary no mesmo formato lido pelo app.
+
+Com --from-datasets, cada célula lê a entrada 'aleatorio' gerada pelo datasets.py
+(memory-map) em vez de gerá-la com rand(): os dois híbridos ordenam os mesmos bytes
+e as entradas não são geradas de novo a cada rodada.
+
+Uso:
+    python sweep.py insertion --jobs 8 --mem-gb 12
+    python sweep.py bubble --max-size 10485760
+    python sweep.py insertion --from-datasets
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import Manager
+
+import pandas as pd
+
+from datasets import RANDOM_INPUT, generate_dataset
+from process_results import RAW_FILES, SUMMARY_FILES, aggregate_raw, best_tables
+
+####################################################################
+####################################################################
+# --- Configuração ---
+####################################################################
+####################################################################
+
+HARNESSES = {
+    'bubble': {'source': "merge4_final.c", 'binary': "execmerge4"},
+    'insertion': {'source': "merge5_final.c", 'binary': "execmerge5"},
+}
+
+BUILD_DIR = "build"
+CHECKPOINT_DIR = "checkpoints"
+RAW_HEADER = "Tamanho,Threshold,Execucao,TempoCPU,TempoReal\n"
+
+# Memória usada por uma célula: vetor original + cópia + temp (int de 4 bytes)
+BYTES_PER_ELEMENT = 3 * 4
+
+####################################################################
+####################################################################
+# --- Grade e compilação ---
+####################################################################
+####################################################################
+
+def read_c_array(source, name):
+    """Lê os valores de um vetor C (ex: 'sizes' ou 'thresholds') direto do código-fonte."""
+    match = re.search(rf"int {name}\[\w+\]\s*=\s*\{{([^}}]*)\}}", source)
+    if match is None:
+        raise ValueError(f"Vetor '{name}' não encontrado no código-fonte.")
+    return [int(v) for v in match.group(1).replace("\n", " ").split(",")]
+
+
+def read_grid(source_path):
+    """Retorna (sizes, thresholds, NUM_RUNS) definidos no arquivo .c."""
+    with open(source_path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    runs = int(re.search(r"#define NUM_RUNS (\d+)", source).group(1))
+    return read_c_array(source, 'sizes'), read_c_array(source, 'thresholds'), runs
+
+
+def compile_harness(name):
+    """Compila o harness com os mesmos flags indicados no final do arquivo .c."""
+    harness = HARNESSES[name]
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    binary = os.path.join(BUILD_DIR, harness['binary'])
+    subprocess.run(["gcc", "-O2", "-o", binary, harness['source'], "-lm"], check=True)
+    return os.path.abspath(binary)
+
+####################################################################
+####################################################################
+# --- Execução das células ---
+####################################################################
+####################################################################
+
+def checkpoint_dir(name, from_datasets=False):
+    """Células com entradas do datasets.py ficam separadas das geradas com rand()."""
+    return os.path.join(CHECKPOINT_DIR, f"{name}-datasets" if from_datasets else name)
+
+
+def cell_path(name, n, threshold, from_datasets=False):
+    return os.path.join(checkpoint_dir(name, from_datasets), f"{n}_{threshold}.csv")
+
+
+def _pin_worker(cores):
+    """Inicializador do pool: fixa cada processo em um núcleo diferente."""
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {cores.get()})
+
+
+def run_cell(binary, out_path, n, threshold, runs, dataset=None):
+    """
+    Roda uma célula e grava o checkpoint de forma atômica (arquivo temporário +
+    rename), para que uma célula interrompida nunca pareça concluída.
+    """
+    command = [binary, str(n), str(threshold), str(runs)] + ([dataset] if dataset else [])
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Célula ({n}, {threshold}) falhou: {result.stderr.strip()}")
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(result.stdout)
+    os.replace(tmp_path, out_path)
+    return n, threshold
+
+
+def sweep(name, jobs=None, mem_gb=None, max_size=None, runs=None, from_datasets=False):
+    """
+    Executa todas as células pendentes da grade de 'name' ('bubble' ou 'insertion').
+
+    As células maiores são enviadas primeiro (melhor balanceamento). Com 'mem_gb',
+    novas células só são iniciadas enquanto a soma da memória das células em
+    execução couber no limite.
+    """
+    harness = HARNESSES[name]
+    sizes, thresholds, default_runs = read_grid(harness['source'])
+    runs = runs or default_runs
+    if max_size is not None:
+        sizes = [n for n in sizes if n <= max_size]
+
+    binary = compile_harness(name)
+    os.makedirs(checkpoint_dir(name, from_datasets), exist_ok=True)
+
+    pending = [(n, t) for n in sizes for t in thresholds
+               if not os.path.exists(cell_path(name, n, t, from_datasets))]
+
+    # As entradas são geradas aqui, uma vez por tamanho, antes de distribuir as células
+    datasets = {}
+    if from_datasets:
+        for n in sorted({n for n, _ in pending}):
+            datasets[n] = os.path.abspath(generate_dataset(RANDOM_INPUT, n))
+    pending.sort(key=lambda cell: cell[0], reverse=True)
+    total = len(sizes) * len(thresholds)
+    print(f"{total - len(pending)}/{total} células já concluídas; {len(pending)} pendentes.")
+
+    jobs = jobs or os.cpu_count()
+    budget = mem_gb * 1024 ** 3 if mem_gb else None
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(jobs))
+
+    with Manager() as manager:
+        # Um núcleo por processo (reaproveita os núcleos se houver mais processos que núcleos)
+        core_queue = manager.Queue()
+        for i in range(jobs):
+            core_queue.put(cores[i % len(cores)])
+
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_pin_worker,
+                                 initargs=(core_queue,)) as pool:
+            running = {}
+            done_count = total - len(pending)
+            while pending or running:
+                in_use = sum(n * BYTES_PER_ELEMENT for n, _ in running.values())
+                # Envia a maior célula pendente que ainda cabe no limite de memória
+                while pending and len(running) < jobs:
+                    fits = [c for c in pending
+                            if budget is None or not running
+                            or in_use + c[0] * BYTES_PER_ELEMENT <= budget]
+                    if not fits:
+                        break
+                    n, t = fits[0]
+                    pending.remove((n, t))
+                    future = pool.submit(run_cell, binary, cell_path(name, n, t, from_datasets), n, t, runs,
+                                         datasets.get(n))
+                    running[future] = (n, t)
+                    in_use += n * BYTES_PER_ELEMENT
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    running.pop(future)
+                    n, t = future.result()
+                    done_count += 1
+                    print(f"[{done_count}/{total}] Tamanho={n} Threshold={t}")
+
+    return sizes, thresholds
+
+####################################################################
+####################################################################
+# --- Consolidação ---
+####################################################################
+####################################################################
+
+def collect(name, sizes, thresholds, directory='.', from_datasets=False):
+    """
+    Junta os checkpoints no raw_times (na ordem da grade do .c) e gera o summary.
+    Se os dois summaries existirem, também regera os 'melhores_resultados_*'.
+    """
+    raw_path = os.path.join(directory, RAW_FILES[name])
+    with open(raw_path, 'w', encoding='utf-8') as raw_file:
+        raw_file.write(RAW_HEADER)
+        for n in sizes:
+            for t in thresholds:
+                with open(cell_path(name, n, t, from_datasets), 'r', encoding='utf-8') as f:
+                    raw_file.write(f.read())
+
+    summary_path = os.path.join(directory, SUMMARY_FILES[name])
+    aggregate_raw(raw_path).to_csv(summary_path, index=False, float_format='%.6f')
+    print(f"Resultados salvos em '{raw_path}' e '{summary_path}'.")
+
+    summary_paths = {n: os.path.join(directory, f) for n, f in SUMMARY_FILES.items()}
+    if all(os.path.exists(p) for p in summary_paths.values()):
+        summaries = {n: pd.read_csv(p, encoding='utf-8-sig') for n, p in summary_paths.items()}
+        for table_name, table in best_tables(summaries['bubble'], summaries['insertion']).items():
+            table.to_csv(os.path.join(directory, f"melhores_resultados_{table_name}.csv"),
+                         index=False, float_format='%.8f')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Executa a grade de benchmark em paralelo, com checkpoints.")
+    parser.add_argument('harness', choices=sorted(HARNESSES), help="Algoritmo híbrido a executar.")
+    parser.add_argument('--jobs', type=int, default=None, help="Processos em paralelo (padrão: núcleos disponíveis).")
+    parser.add_argument('--mem-gb', type=float, default=None, help="Limite de memória para as células simultâneas.")
+    parser.add_argument('--max-size', type=int, default=None, help="Ignora tamanhos maiores que este valor.")
+    parser.add_argument('--runs', type=int, default=None, help="Execuções por célula (padrão: NUM_RUNS do .c).")
+    parser.add_argument('--from-datasets', action='store_true',
+                        help="Lê as entradas dos arquivos do datasets.py em vez de usar rand().")
+    args = parser.parse_args()
+
+    try:
+        sizes, thresholds = sweep(args.harness, args.jobs, args.mem_gb, args.max_size, args.runs,
+                                  args.from_datasets)
+    except KeyboardInterrupt:
+        print("\nInterrompido. Rode o mesmo comando para continuar de onde parou.")
+        sys.exit(1)
+    collect(args.harness, sizes, thresholds, from_datasets=args.from_datasets)
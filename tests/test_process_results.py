@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from process_results import _normal_sf, tied_thresholds
+
+
+def raw_times(runs):
+    """raw_times de um único Tamanho a partir de {Threshold: tempos} (mesmos tempos em CPU e Real)."""
+    rows = [(100, threshold, time, time) for threshold, times in runs.items() for time in times]
+    return pd.DataFrame(rows, columns=['Tamanho', 'Threshold', 'TempoCPU', 'TempoReal'])
+
+
+def test_normal_sf():
+    assert _normal_sf([0.0])[0] == pytest.approx(0.5)
+    assert _normal_sf([1.959963984540054])[0] == pytest.approx(0.025)
+
+
+def test_tied_thresholds_matches_mann_whitney():
+    # Exemplo da documentação do scipy.stats.mannwhitneyu: U = 17 e valor-p
+    # bilateral assintótico (com correção de continuidade) 0.11134688653314041
+    males = [19, 22, 16, 29, 24]
+    females = [20, 11, 17, 12]
+    df_ties = tied_thresholds(raw_times({2: females, 4: males})).set_index('Threshold')
+
+    assert df_ties.loc[2, 'ValorP'] == 1.0
+    assert df_ties.loc[4, 'MelhorThreshold'] == 2
+    assert df_ties.loc[4, 'U'] == 17
+    assert df_ties.loc[4, 'ValorP'] == pytest.approx(0.11134688653314041 / 2)
+    assert df_ties.loc[4, 'Empatado']
+
+
+def test_tied_thresholds_tie_correction():
+    # U = 8.5 e variância 3·3/12 · (7 - 18/30) = 4.8 com três pares de valores repetidos
+    df_ties = tied_thresholds(raw_times({2: [1, 1, 2], 4: [2, 3, 3]})).set_index('Threshold')
+
+    assert df_ties.loc[4, 'U'] == 8.5
+    assert df_ties.loc[4, 'Z'] == pytest.approx(3.5 / 4.8 ** 0.5)
+    assert df_ties.loc[4, 'ValorP'] == pytest.approx(0.05507446209297349)